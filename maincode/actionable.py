@@ -0,0 +1,446 @@
+"""Columnar snapshot of the actionable low fill rate rows.
+
+The actionable set (Fill_Rate_Percent below the configured threshold with a
+valid State and Plant_Name) is small enough to keep in memory. It is loaded
+once per zepto_automation data version into NumPy columns: categorical codes
+for the text columns, datetime64 dates and float quantities, pre-sorted the
+way the listings are (Delivery_Date DESC, Processing_Date DESC).
+
+The columns are published through snapshot_store as memory-mapped .npy files,
+so every worker process maps the same pages and a restarted worker is warm
+without querying SQL Server; one worker rebuilds per data version. Feedback
+is append-only: each process folds rows newer than the snapshot into a small
+overlay by id, at most every FEEDBACK_POLL_SECONDS (and on the next read
+after a submit in this process).
+
+Reads never wait on the database: one thread at a time refreshes, outside
+the snapshot lock, while the others keep serving the snapshot they have.
+
+Filters are evaluated as vectorized boolean masks, so listings, counts and
+exports for any filter combination no longer go back to SQL Server.
+
+Alongside the columns, every value of the facets (state, plant, material,
+delivery month, feedback status) gets a packed bitset of its rows.
+facet_counts() ANDs the bitsets of the selected values and popcounts each
+facet's bitsets against the selection of the other facets, so the counts
+next to every filter option stay correct under any combination.
+
+    from actionable import snapshot
+    rows = snapshot.listing(threshold, state='Telangana')   # None -> use SQL
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_version
+import fill_rate
+import snapshot_store
+from routes import data_routes
+
+SNAPSHOT_KIND = 'actionable'
+# New feedback rows are folded into the overlay at most this often
+FEEDBACK_POLL_SECONDS = float(os.environ.get('ACTIONABLE_FEEDBACK_POLL_SECONDS', 2))
+
+# Text columns are stored as int32 codes into per-column labels (-1 = NULL)
+CATEGORICAL = ['State', 'Plant_Name', 'Material_Description', 'PO_No', 'Material', 'UOM', 'Sales_District',
+               'Cust_Group', 'reason', 'comments']
+DATES = ['PO_Date', 'Delivery_Date', 'Processing_Date', 'feedback_date']
+NUMBERS = ['PO_Quantity_Liters', 'Sales_Quantity_Matched', 'Fill_Rate_Percent']
+
+_SNAPSHOT_SQL = """
+SELECT z.ID, z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date,
+       z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent,
+       z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
+       f.id, f.reason, f.comments, f.created_at
+FROM zepto_automation z
+LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
+WHERE z.Fill_Rate_Percent < ?
+AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
+AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
+ORDER BY z.Delivery_Date DESC, z.Processing_Date DESC
+"""
+_SNAPSHOT_COLUMNS = ['ID', 'PO_No', 'Material_Description', 'Material', 'PO_Date', 'Delivery_Date', 'UOM',
+                     'PO_Quantity_Liters', 'Sales_Quantity_Matched', 'Fill_Rate_Percent', 'State', 'Plant_Name',
+                     'Sales_District', 'Cust_Group', 'Processing_Date',
+                     'feedback_id', 'reason', 'comments', 'feedback_date']
+
+_NEW_FEEDBACK_SQL = """
+SELECT id, record_id, reason, comments, created_at
+FROM fill_rate_feedback
+WHERE id > ?
+ORDER BY id
+"""
+
+_SENTINEL = np.datetime64('1900-01-01')
+
+# Facets in response order; each is also a filter argument of /api/faceted-counts
+FACETS = ['state', 'plant', 'material', 'month', 'feedback']
+FEEDBACK_STATUSES = ['pending', 'provided']
+
+# Set bits per byte value, for popcounts over np.packbits bitsets
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _format_dates(values, fmt):
+    """safe_date_format over a datetime64 array: '' for missing and 1900-01-01"""
+    text = pd.Series(values).dt.strftime(fmt).to_numpy(dtype=object)
+    text[pd.isna(values) | (values == _SENTINEL)] = ''
+    return text
+
+
+def _bitsets(codes, size):
+    """(size, ceil(rows / 8)) array holding one packed bitset per code"""
+    return np.stack([np.packbits(codes == code) for code in range(size)]) if size else \
+        np.zeros((0, (len(codes) + 7) // 8), dtype=np.uint8)
+
+
+def _popcount(bits):
+    return _POPCOUNT[bits].sum(axis=-1, dtype=np.int64)
+
+
+class ActionableSnapshot:
+    """Columns of the actionable set for one data version"""
+
+    def __init__(self, threshold=None, root=None):
+        self._threshold = threshold
+        self._root = root
+        self._lock = threading.Lock()
+        # Held by the one thread doing database I/O for a refresh
+        self._refresh_lock = threading.Lock()
+        self._version = None
+        self._feedback_id = 0
+        self._folded_at = 0.0
+        self._columns = None
+        self._categories = {}
+        self._labels = {}
+        self._facets = {}
+        # position -> (reason, comments, created_at) for feedback newer than the snapshot
+        self._overlay = {}
+        self._meta = None
+
+    @property
+    def threshold(self):
+        return fill_rate.DEFAULT_THRESHOLD if self._threshold is None else self._threshold
+
+    def _build(self, cursor, version):
+        """Query the actionable set and return (arrays, meta) ready to publish"""
+        cursor.execute(_SNAPSHOT_SQL, (self.threshold,))
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=_SNAPSHOT_COLUMNS)
+        frame = frame.drop_duplicates('ID', keep='first')
+
+        arrays = {'ID': frame['ID'].to_numpy(dtype=np.int64)}
+        categories = {}
+        for name in CATEGORICAL:
+            values = pd.Categorical(frame[name].where(frame[name].notna(), None))
+            arrays[name] = values.codes.astype(np.int32)
+            categories[name] = [str(label) for label in values.categories]
+        for name in DATES:
+            arrays[name] = pd.to_datetime(frame[name], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        for name in NUMBERS:
+            arrays[name] = np.nan_to_num(pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float))
+        arrays['by_id'] = np.argsort(arrays['ID'], kind='stable')
+
+        facets = {}
+        for facet, labels, bitsets in self._build_facets(arrays, categories):
+            facets[facet] = labels
+            arrays[f'facet_{facet}'] = bitsets
+
+        feedback_ids = pd.to_numeric(frame['feedback_id'], errors='coerce')
+        meta = {
+            'version': version,
+            'threshold': self.threshold,
+            'rows': len(frame),
+            'feedback_id': int(feedback_ids.max()) if feedback_ids.notna().any() else 0,
+            'categories': categories,
+            'facets': facets,
+            'created_at': time.time(),
+        }
+        return arrays, meta
+
+    @staticmethod
+    def _build_facets(arrays, categories):
+        """Yield (facet, value labels, bitsets)"""
+        delivery = arrays['Delivery_Date']
+        months = pd.Series(delivery).dt.strftime('%Y-%m').where(~pd.isna(delivery) & (delivery != _SENTINEL))
+        months = pd.Categorical(months)
+        feedback = (arrays['reason'] >= 0).astype(np.int8)
+        for facet, labels, codes in (
+                ('state', categories['State'], arrays['State']),
+                ('plant', categories['Plant_Name'], arrays['Plant_Name']),
+                ('material', categories['Material_Description'], arrays['Material_Description']),
+                ('month', list(months.categories), months.codes),
+                ('feedback', FEEDBACK_STATUSES, feedback)):
+            yield facet, list(labels), _bitsets(codes, len(labels))
+
+    def _attach(self, meta, arrays):
+        """Switch to a snapshot; only the feedback bitsets are copied, the rest stays mapped"""
+        self._columns = arrays
+        self._categories = {name: pd.Index(labels, dtype=object) for name, labels in meta['categories'].items()}
+        self._labels = {name: np.array(labels + [None], dtype=object) for name, labels in meta['categories'].items()}
+        self._facets = {facet: (labels, arrays[f'facet_{facet}']) for facet, labels in meta['facets'].items()}
+        self._facets['feedback'] = (self._facets['feedback'][0], np.array(arrays['facet_feedback']))
+        self._feedback_id = meta['feedback_id']
+        self._overlay = {}
+        self._meta = meta
+        self._version = meta['version']
+
+    def _published(self, version):
+        """(meta, arrays) of the published snapshot if it matches this version, else None"""
+        published = snapshot_store.load(SNAPSHOT_KIND, self._root)
+        if published is None:
+            return None
+        meta, arrays = published
+        if (meta.get('version') != version or meta.get('threshold') != self.threshold
+                or snapshot_store.expired(meta)):
+            return None
+        return published
+
+    def _rebuild(self, cursor, version):
+        """(meta, arrays) for this version: the published snapshot, or a new one built and published.
+
+        None if another worker is still building it after LOCK_WAIT_SECONDS.
+        """
+        published = self._published(version)
+        if published:
+            return published
+        with snapshot_store.build_lock(SNAPSHOT_KIND, self._root) as locked:
+            if not locked:
+                print("Actionable snapshot is being built by another worker; serving what we have")
+                return None
+            published = self._published(version)
+            if published:
+                return published
+            arrays, meta = self._build(cursor, version)
+            try:
+                snapshot_store.publish(SNAPSHOT_KIND, arrays, meta, self._root)
+                published = self._published(version)
+                if published:
+                    return published
+            except OSError as e:
+                print(f"Actionable snapshot publish error: {e}")
+            return meta, arrays
+
+    def _fold_feedback(self, rows):
+        """Apply feedback rows newer than the snapshot (caller holds the lock)"""
+        columns = self._columns
+        by_id = columns['by_id']
+        ids = columns['ID'][by_id]
+        for feedback_id, record_id, reason, comments, created_at in rows:
+            self._feedback_id = max(self._feedback_id, int(feedback_id))
+            i = np.searchsorted(ids, record_id)
+            if i < len(ids) and ids[i] == record_id:
+                position = int(by_id[i])
+                if columns['reason'][position] < 0 and position not in self._overlay:
+                    self._overlay[position] = (reason, comments, created_at)
+                    bits = self._facets['feedback'][1]
+                    byte, bit = position >> 3, np.uint8(0x80 >> (position & 7))
+                    bits[0, byte] &= ~bit
+                    bits[1, byte] |= bit
+
+    def _current(self, version):
+        return self._columns is not None and version == self._version and not snapshot_store.expired(self._meta)
+
+    def feedback_changed(self):
+        """Fold new feedback on the next read instead of waiting for the poll interval"""
+        with self._lock:
+            self._folded_at = 0.0
+
+    def refresh(self):
+        """Bring the snapshot up to date; returns False if there is no snapshot to serve (use SQL)"""
+        version = data_version.current_version('zepto_automation')
+        with self._lock:
+            if self._current(version) and time.monotonic() - self._folded_at < FEEDBACK_POLL_SECONDS:
+                return True
+            serving = self._columns is not None
+        # Someone else is already refreshing: keep serving what we have
+        if not self._refresh_lock.acquire(blocking=False):
+            return serving
+        try:
+            return self._refresh(version)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, version):
+        """Database side of refresh(); only the snapshot swap and feedback fold take the lock"""
+        with self._lock:
+            rebuild = not self._current(version)
+            if not rebuild and time.monotonic() - self._folded_at < FEEDBACK_POLL_SECONDS:
+                return True
+        if not data_routes.ensure_feedback_table():
+            return False
+        conn = data_routes.get_db_connection()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            if rebuild:
+                rebuilt = self._rebuild(cursor, version)
+                if rebuilt is None:
+                    # The previous snapshot if there is one, else the SQL path
+                    with self._lock:
+                        return self._columns is not None
+                meta, arrays = rebuilt
+                with self._lock:
+                    self._attach(meta, arrays)
+            # Only this thread advances _feedback_id, so it can be read without the lock
+            cursor.execute(_NEW_FEEDBACK_SQL, (self._feedback_id,))
+            rows = cursor.fetchall()
+            with self._lock:
+                if rows:
+                    self._fold_feedback(rows)
+                self._folded_at = time.monotonic()
+            conn.commit()
+            return True
+        except Exception as e:
+            # Keep serving the snapshot we have; the next read tries again
+            print(f"Actionable snapshot refresh error: {e}")
+            with self._lock:
+                return self._columns is not None
+        finally:
+            conn.close()
+
+    def _select(self, state=None, plant=None, material=None, date_from=None, date_to=None):
+        """Row positions matching the filters, in listing order"""
+        columns = self._columns
+        mask = np.ones(len(columns['ID']), dtype=bool)
+        for name, value in (('State', state), ('Plant_Name', plant), ('Material_Description', material)):
+            if value:
+                code = self._categories[name].get_indexer([value])[0]
+                if code < 0:
+                    return np.empty(0, dtype=np.int64)
+                mask &= columns[name] == code
+        if date_from:
+            mask &= columns['Delivery_Date'] >= np.datetime64(pd.Timestamp(date_from))
+        if date_to:
+            mask &= columns['Delivery_Date'] <= np.datetime64(pd.Timestamp(date_to))
+        return np.flatnonzero(mask)
+
+    def _take(self, positions):
+        columns = self._columns
+        out = {name: np.asarray(columns[name][positions]) for name in ['ID'] + NUMBERS}
+        for name in CATEGORICAL:
+            # code -1 picks the trailing None label
+            out[name] = self._labels[name][columns[name][positions]]
+        feedback_date = np.array(columns['feedback_date'][positions])
+        for position, (reason, comments, created_at) in self._overlay.items():
+            i = np.searchsorted(positions, position)
+            if i < len(positions) and positions[i] == position:
+                out['reason'][i] = reason
+                out['comments'][i] = comments
+                feedback_date[i] = np.datetime64(created_at, 'ns') if created_at else np.datetime64('NaT')
+        out['PO_Date'] = _format_dates(columns['PO_Date'][positions], '%Y-%m-%d')
+        out['Delivery_Date'] = _format_dates(columns['Delivery_Date'][positions], '%Y-%m-%d')
+        out['Processing_Date'] = _format_dates(columns['Processing_Date'][positions], '%Y-%m-%d %H:%M')
+        out['feedback_date'] = _format_dates(feedback_date, '%Y-%m-%d %H:%M')
+        return out
+
+    def _selection(self, selected, date_from=None, date_to=None):
+        """Packed bitset of the rows matching every selected facet value and the date range"""
+        rows = len(self._columns['ID'])
+        bits = np.packbits(np.ones(rows, dtype=bool))
+        if date_from or date_to:
+            delivery = self._columns['Delivery_Date']
+            mask = np.ones(rows, dtype=bool)
+            if date_from:
+                mask &= delivery >= np.datetime64(pd.Timestamp(date_from))
+            if date_to:
+                mask &= delivery <= np.datetime64(pd.Timestamp(date_to))
+            bits &= np.packbits(mask)
+        for facet, value in selected.items():
+            labels, bitsets = self._facets[facet]
+            if value in labels:
+                bits &= bitsets[labels.index(value)]
+            else:
+                bits[:] = 0
+        return bits
+
+    def facet_counts(self, threshold, selected=None, date_from=None, date_to=None):
+        """{'total': n, 'facets': {facet: {value: count}}}, or None when the snapshot is unavailable.
+
+        Each facet is counted under the selection of the other facets, so a
+        facet's own choice doesn't hide its alternatives.
+        """
+        if not self._usable(threshold):
+            return None
+        selected = {facet: value for facet, value in (selected or {}).items() if value and facet in FACETS}
+        with self._lock:
+            total = int(_popcount(self._selection(selected, date_from, date_to)))
+            facets = {}
+            for facet in FACETS:
+                others = {name: value for name, value in selected.items() if name != facet}
+                base = self._selection(others, date_from, date_to)
+                labels, bitsets = self._facets[facet]
+                counts = _popcount(bitsets & base)
+                facets[facet] = {label: int(count) for label, count in zip(labels, counts) if count}
+        return {'total': total, 'facets': facets}
+
+    def _usable(self, threshold):
+        return threshold == self.threshold and self.refresh()
+
+    def count(self, threshold, **filters):
+        """Number of actionable rows matching the filters, or None to use SQL"""
+        if not self._usable(threshold):
+            return None
+        with self._lock:
+            return int(len(self._select(**filters)))
+
+    def listing(self, threshold, **filters):
+        """Rows shaped like /api/filtered-data, or None to use SQL"""
+        if not self._usable(threshold):
+            return None
+        with self._lock:
+            c = self._take(self._select(**filters))
+        return [{
+            'id': int(c['ID'][i]),
+            'po_no': c['PO_No'][i],
+            'material_description': c['Material_Description'][i],
+            'material': c['Material'][i],
+            'po_date': c['PO_Date'][i],
+            'delivery_date': c['Delivery_Date'][i],
+            'uom': c['UOM'][i],
+            'po_quantity': float(c['PO_Quantity_Liters'][i]),
+            'sales_quantity': float(c['Sales_Quantity_Matched'][i]),
+            'fill_rate_percent': float(c['Fill_Rate_Percent'][i]),
+            'state': c['State'][i],
+            'plant_name': c['Plant_Name'][i],
+            'sales_district': c['Sales_District'][i],
+            'cust_group': c['Cust_Group'][i],
+            'processing_date': c['Processing_Date'][i],
+            'has_feedback': c['reason'][i] is not None,
+            'feedback_reason': c['reason'][i],
+            'feedback_comments': c['comments'][i],
+            'feedback_date': c['feedback_date'][i],
+        } for i in range(len(c['ID']))]
+
+    def export(self, threshold, **filters):
+        """DataFrame shaped like the /api/download-data sheet, or None to use SQL"""
+        if not self._usable(threshold):
+            return None
+        with self._lock:
+            c = self._take(self._select(**filters))
+        reason = c['reason']
+        return pd.DataFrame({
+            'PO Number': c['PO_No'],
+            'Material Description': c['Material_Description'],
+            'Material': c['Material'],
+            'PO Date': c['PO_Date'],
+            'Delivery Date': c['Delivery_Date'],
+            'UOM': c['UOM'],
+            'PO Quantity (L)': c['PO_Quantity_Liters'],
+            'Sales Quantity': c['Sales_Quantity_Matched'],
+            'Fill Rate %': c['Fill_Rate_Percent'],
+            'State': c['State'],
+            'Plant Name': c['Plant_Name'],
+            'Sales District': c['Sales_District'],
+            'Customer Group': c['Cust_Group'],
+            'Processing Date': c['Processing_Date'],
+            'Feedback Status': np.where(pd.isna(reason), 'Pending Feedback', reason),
+            'Feedback Comments': np.where(pd.isna(c['comments']), '', c['comments']),
+            'Feedback Date': c['feedback_date'],
+        })
+
+
+snapshot = ActionableSnapshot()
@@ -0,0 +1,162 @@
+"""Admission control for heavy endpoints.
+
+Excel exports run a full-table query plus a pandas/xlsxwriter build, and a
+few repeated "Download Excel" clicks can tie up every worker thread while
+the dashboard's light API calls wait behind them. Requests are classified by
+path: heavy ones must get a slot first, everything else is admitted at once.
+
+- At most MAX_HEAVY heavy requests run at a time across all users.
+- At most MAX_HEAVY_PER_USER run at a time per session user. A user who is
+  over that limit is rejected straight away instead of queueing clicks.
+- When all global slots are taken, up to MAX_QUEUE requests wait in arrival
+  order for QUEUE_TIMEOUT_SECONDS. Anything beyond that gets a 429 with a
+  Retry-After estimated from recent heavy request durations.
+
+    import admission
+    ticket = admission.controller.acquire('a@heritagefoods.in')   # raises Rejected
+    try: ... finally: admission.controller.release(ticket)
+    admission.controller.stats()   # running / queued / per user / totals
+"""
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+
+HEAVY_ENDPOINTS = frozenset({
+    '/api/download-data',
+    '/api/download-feedback-reports',
+    '/api/download-plant-feedback-stats',
+})
+
+MAX_HEAVY = int(os.environ.get('ADMISSION_MAX_HEAVY', 2))
+MAX_HEAVY_PER_USER = int(os.environ.get('ADMISSION_MAX_HEAVY_PER_USER', 1))
+MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 8))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', 20))
+# Assumed heavy request duration until some have been measured
+DEFAULT_DURATION_SECONDS = 10.0
+DURATION_SMOOTHING = 0.2
+
+
+def is_heavy(path):
+    return path in HEAVY_ENDPOINTS
+
+
+class Rejected(Exception):
+    """Not admitted; retry_after is a suggested wait in whole seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ('id', 'user', 'started')
+
+    def __init__(self, ticket_id, user):
+        self.id = ticket_id
+        self.user = user
+        self.started = None
+
+
+class AdmissionController:
+    """Global and per-user concurrency caps with a bounded FIFO wait queue"""
+
+    def __init__(self, max_heavy=MAX_HEAVY, max_per_user=MAX_HEAVY_PER_USER,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.max_heavy = max_heavy
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._queue = deque()
+        self._running = 0
+        self._by_user = Counter()
+        self._avg_duration = DEFAULT_DURATION_SECONDS
+        self._totals = Counter()
+        self._max_wait = 0.0
+
+    def _retry_after(self):
+        # Time for everyone ahead (running + queued) to drain through the slots
+        ahead = self._running + len(self._queue)
+        return max(1, math.ceil(self._avg_duration * max(ahead, 1) / self.max_heavy))
+
+    def _reject(self, reason):
+        self._totals['rejected'] += 1
+        self._totals[f'rejected_{reason}'] += 1
+        return Rejected(reason, self._retry_after())
+
+    def acquire(self, user):
+        """Block until a heavy slot is free for user; raises Rejected if it can't be had"""
+        with self._cond:
+            # Counts queued requests too, so repeated clicks can't fill the queue
+            if self._by_user[user] >= self.max_per_user:
+                raise self._reject('user_limit')
+            if self._running >= self.max_heavy and len(self._queue) >= self.max_queue:
+                raise self._reject('queue_full')
+
+            ticket = _Ticket(next(self._ids), user)
+            self._by_user[user] += 1
+            self._queue.append(ticket)
+            queued_at = time.monotonic()
+            deadline = queued_at + self.queue_timeout
+            while self._queue[0] is not ticket or self._running >= self.max_heavy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self._release_user(user)
+                    self._cond.notify_all()
+                    raise self._reject('timeout')
+                self._cond.wait(remaining)
+
+            self._queue.popleft()
+            self._running += 1
+            ticket.started = time.monotonic()
+            waited = ticket.started - queued_at
+            self._totals['admitted'] += 1
+            if waited > 0.001:
+                self._totals['queued'] += 1
+            self._max_wait = max(self._max_wait, waited)
+            self._cond.notify_all()
+            return ticket
+
+    def _release_user(self, user):
+        self._by_user[user] -= 1
+        if self._by_user[user] <= 0:
+            del self._by_user[user]
+
+    def release(self, ticket):
+        with self._cond:
+            duration = time.monotonic() - ticket.started
+            self._avg_duration += DURATION_SMOOTHING * (duration - self._avg_duration)
+            self._running -= 1
+            self._release_user(ticket.user)
+            self._totals['completed'] += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'heavy_endpoints': sorted(HEAVY_ENDPOINTS),
+                'limits': {
+                    'max_heavy': self.max_heavy,
+                    'max_heavy_per_user': self.max_per_user,
+                    'max_queue': self.max_queue,
+                    'queue_timeout_seconds': self.queue_timeout,
+                },
+                'running': self._running,
+                'queue_depth': len(self._queue),
+                'by_user': dict(self._by_user),
+                'avg_duration_seconds': round(self._avg_duration, 3),
+                'max_wait_seconds': round(self._max_wait, 3),
+                'retry_after_seconds': self._retry_after(),
+                'totals': {key: self._totals[key] for key in
+                           ('admitted', 'queued', 'completed', 'rejected',
+                            'rejected_user_limit', 'rejected_queue_full', 'rejected_timeout')},
+            }
+
+
+controller = AdmissionController()
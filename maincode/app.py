@@ -6,6 +6,8 @@ import tempfile
 import os
 from datetime import datetime, timedelta
 from auth import auth_bp, require_auth
+import fill_rate
+import query_filters
 
 app = Flask(__name__)
 
@@ -19,6 +21,25 @@ app.register_blueprint(auth_bp)
 from routes.data_routes import data_bp  # Adjust path as needed
 app.register_blueprint(data_bp)
 
+from routes.ingest_routes import ingest_bp
+app.register_blueprint(ingest_bp)
+
+from routes.cube_routes import cube_bp
+app.register_blueprint(cube_bp)
+
+from routes.bootstrap_routes import bootstrap_bp
+app.register_blueprint(bootstrap_bp)
+
+# Caps concurrent Excel exports globally and per user
+from routes.admission_routes import admission_bp
+app.register_blueprint(admission_bp)
+
+# Page CSS/JS are served as content-hashed bundles; build any that changed
+import assets
+from routes.asset_routes import assets_bp
+app.register_blueprint(assets_bp)
+assets.assets.build()
+
 
 # Database configuration
 DB_CONFIG = {
@@ -1110,7 +1131,8 @@ def not_found(error):
 @app.route('/api/plant-feedback-stats')
 @require_auth()
 def get_plant_feedback_stats():
-    """Get plant and date wise feedback statistics - UPDATED to exclude Unknown and >=95% fill rate"""
+    """Get plant and date wise feedback statistics - UPDATED to exclude Unknown and fill rate at/above the threshold"""
+    threshold = fill_rate.get_threshold()
     try:
         # Get filter parameters
         state_filter = request.args.get('state', '')
@@ -1125,7 +1147,7 @@ def get_plant_feedback_stats():
         cursor = conn.cursor()
         
         try:
-            # Updated query to exclude Unknown Plant/State and fill rate >= 95%
+            # Updated query to exclude Unknown Plant/State and fill rate at/above the threshold
             query = """
             WITH FeedbackStats AS (
                 SELECT 
@@ -1142,7 +1164,7 @@ def get_plant_feedback_stats():
                 AND state != '' 
                 AND state != '0'
                 AND state != 'Unknown State'
-                AND fill_rate_percent < 95
+                AND fill_rate_percent < ?
                 GROUP BY plant_name, state, CAST(delivery_date AS DATE)
             ),
             TotalStats AS (
@@ -1154,7 +1176,7 @@ def get_plant_feedback_stats():
                          ELSE CAST(Processing_Date AS DATE) END as delivery_date,
                     COUNT(*) as total_records
                 FROM zepto_automation
-                WHERE Fill_Rate_Percent < 95
+                WHERE Fill_Rate_Percent < ?
                 AND Plant_Name IS NOT NULL 
                 AND Plant_Name != '' 
                 AND Plant_Name != '0'
@@ -1185,8 +1207,10 @@ def get_plant_feedback_stats():
             ORDER BY t.state, t.plant_name, t.delivery_date DESC
             """
             
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            rows = fill_rate.histogram.plant_date_counts(threshold)
+            if rows is None:
+                cursor.execute(query, (threshold, threshold))
+                rows = cursor.fetchall()
             
             plant_stats = []
             for row in rows:
@@ -1371,13 +1395,12 @@ def debug_record_ids():
 @require_auth()
 def download_plant_feedback_stats():
     """Download plant feedback statistics as Excel file"""
+    threshold = fill_rate.get_threshold()
+    try:
+        filters = query_filters.record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
-        # Get filter parameters
-        state_filter = request.args.get('state', '')
-        plant_filter = request.args.get('plant', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
-        
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
@@ -1385,70 +1408,8 @@ def download_plant_feedback_stats():
         cursor = conn.cursor()
         
         try:
-            # Build dynamic query for download - CORRECTED VERSION
-            query = """
-            SELECT 
-                z.Plant_Name as 'Plant Name',
-                z.State as 'State',
-                CASE 
-                    WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01' 
-                    THEN CAST(z.Delivery_Date AS DATE) 
-                    ELSE CAST(z.Processing_Date AS DATE)
-                END as 'Date',
-                COUNT(z.ID) as 'Total Records',
-                SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) as 'Feedback Provided',
-                COUNT(z.ID) - SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) as 'Pending Feedback',
-                CASE 
-                    WHEN COUNT(z.ID) > 0 
-                    THEN CAST((SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) * 100.0 / COUNT(z.ID)) AS DECIMAL(5,2))
-                    ELSE 0.00
-                END as 'Completion %'
-            FROM zepto_automation z
-            LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
-            WHERE z.Fill_Rate_Percent < 95 
-            AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
-            AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
-            """
-            
-            params = []
-            conditions = []
-            
-            if state_filter:
-                conditions.append("z.State = ?")
-                params.append(state_filter)
-                
-            if plant_filter:
-                conditions.append("z.Plant_Name = ?")
-                params.append(plant_filter)
-                
-            if date_from:
-                conditions.append("(z.Delivery_Date >= ? OR (z.Delivery_Date IS NULL AND z.Processing_Date >= ?))")
-                params.extend([date_from, date_from])
-                
-            if date_to:
-                conditions.append("(z.Delivery_Date <= ? OR (z.Delivery_Date IS NULL AND z.Processing_Date <= ?))")
-                params.extend([date_to + ' 23:59:59', date_to + ' 23:59:59'])
-            
-            if conditions:
-                query += " AND " + " AND ".join(conditions)
-            
-            query += """
-            GROUP BY z.Plant_Name, z.State, 
-                CASE 
-                    WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01' 
-                    THEN CAST(z.Delivery_Date AS DATE) 
-                    ELSE CAST(z.Processing_Date AS DATE)
-                END
-            HAVING COUNT(z.ID) > 0
-            ORDER BY z.State, z.Plant_Name, 
-                CASE 
-                    WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01' 
-                    THEN CAST(z.Delivery_Date AS DATE) 
-                    ELSE CAST(z.Processing_Date AS DATE)
-                END DESC
-            """
-            
-            cursor.execute(query, params)
+            query = query_filters.plant_stats_export(threshold, filters)
+            cursor.execute(query.sql, query.params)
             rows = cursor.fetchall()
             
             # Convert to list of dictionaries for DataFrame
@@ -1493,37 +1454,8 @@ def download_plant_feedback_stats():
         except Exception as table_error:
             print(f"Plant feedback table error: {table_error}")
             # Handle case when feedback table doesn't exist - same fallback logic
-            fallback_query = """
-            SELECT 
-                z.Plant_Name as 'Plant Name',
-                z.State as 'State',
-                CASE 
-                    WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01' 
-                    THEN CAST(z.Delivery_Date AS DATE) 
-                    ELSE CAST(z.Processing_Date AS DATE)
-                END as 'Date',
-                COUNT(*) as 'Total Records'
-            FROM zepto_automation z
-            WHERE z.Fill_Rate_Percent < 95 
-            AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
-            AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
-            """
-            
-            # Apply same filters as above
-            if conditions:
-                fallback_query += " AND " + " AND ".join(conditions)
-            
-            fallback_query += """
-            GROUP BY z.Plant_Name, z.State, 
-                CASE 
-                    WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01' 
-                    THEN CAST(z.Delivery_Date AS DATE) 
-                    ELSE CAST(z.Processing_Date AS DATE)
-                END
-            ORDER BY z.State, z.Plant_Name
-            """
-            
-            cursor.execute(fallback_query, params)
+            fallback_query = query_filters.plant_stats_export(threshold, filters, with_feedback=False)
+            cursor.execute(fallback_query.sql, fallback_query.params)
             rows = cursor.fetchall()
             
             data_list = []
@@ -1659,4 +1591,10 @@ if __name__ == '__main__':
     print("Dashboard will be available at: http://localhost:8000/dashboard (after login)")
     print("Reports will be available at: http://localhost:8000/reports (after login)")
 
+    # Table DDL runs once at startup instead of on the request path (retried on first use if the DB is down)
+    from routes.data_routes import ensure_feedback_table
+    from ingest import ensure_staging_table
+    ensure_feedback_table()
+    ensure_staging_table()
+
     app.run(debug=True, host='0.0.0.0', port=8000)
@@ -0,0 +1,151 @@
+"""Fingerprinted, precompressed static bundles for the page templates.
+
+The pages' CSS and JavaScript live under static/css and static/js. build()
+copies each file to static/dist/<name>.<hash>.<ext>, where the hash is taken
+from the file's content, writes .gz (and .br when the brotli package is
+installed) variants next to it and records the mapping in manifest.json.
+Templates link through asset_url('css/dashboard.css'); because a changed file
+gets a new URL, /assets/ can serve every bundle with a one-year immutable
+Cache-Control and a repeat page load only transfers the HTML shell.
+
+The app builds on startup (unchanged files are skipped). Run it at deploy
+time to prebuild, e.g. on a host that has brotli:
+
+    python assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SOURCE_DIRS = ('css', 'js')
+DIST_DIR = os.environ.get('ASSET_DIST_DIR', os.path.join(STATIC_DIR, 'dist'))
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+# Variants are only worth keeping when they are noticeably smaller
+MIN_SAVING = 0.9
+
+# Content-Encoding -> variant file suffix, in order of preference
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=11)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _sources(static_dir):
+    for folder in SOURCE_DIRS:
+        root = os.path.join(static_dir, folder)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+def hashed_name(name, data):
+    """css/dashboard.css -> css/dashboard.<content hash>.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Write hashed files and compressed variants; returns the manifest
+
+    manifest: {"css/dashboard.css": {"file": "css/dashboard.3f2a9c0d1e4b.css",
+                                     "encodings": ["br", "gzip"]}, ...}
+    Output for content that was already built is reused, so this is cheap to
+    call on every startup and safe to run from several workers at once.
+    """
+    manifest = {}
+    for name, path in _sources(static_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        target = hashed_name(name, data)
+        target_path = os.path.join(dist_dir, target)
+        if not os.path.exists(target_path):
+            _write_atomic(target_path, data)
+
+        encodings = []
+        for encoding, suffix in ENCODINGS.items():
+            variant = target_path + suffix
+            if not os.path.exists(variant):
+                # A variant prebuilt elsewhere (e.g. .br) is served even if this host can't make it
+                if encoding not in COMPRESSORS:
+                    continue
+                packed = COMPRESSORS[encoding](data)
+                if len(packed) > len(data) * MIN_SAVING:
+                    continue
+                _write_atomic(variant, packed)
+            encodings.append(encoding)
+        manifest[name] = {'file': target, 'encodings': encodings}
+
+    _write_atomic(os.path.join(dist_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class Assets:
+    """The current manifest plus lookups for templates and the /assets route"""
+
+    def __init__(self, static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._by_file = {}
+        self._mtime = None
+
+    def build(self):
+        manifest = build(self.static_dir, self.dist_dir)
+        with self._lock:
+            self._manifest = manifest
+            self._by_file = {entry['file']: entry for entry in manifest.values()}
+            self._mtime = self._source_mtime()
+        return manifest
+
+    def _source_mtime(self):
+        return max((os.path.getmtime(path) for _, path in _sources(self.static_dir)), default=0)
+
+    def refresh(self):
+        """Rebuild if a source file changed since the last build (used in debug mode)"""
+        if self._source_mtime() != self._mtime:
+            self.build()
+
+    def url(self, name):
+        """URL of the hashed bundle for name; the plain static file if it was never built"""
+        entry = self._manifest.get(name)
+        if entry is None:
+            return url_for('static', filename=name)
+        return url_for('assets.hashed_asset', filename=entry['file'])
+
+    def lookup(self, filename):
+        """Manifest entry for a hashed filename, or None"""
+        return self._by_file.get(filename)
+
+
+assets = Assets()
+
+
+def asset_url(name):
+    return assets.url(name)
+
+
+if __name__ == '__main__':
+    built = assets.build()
+    for name, entry in sorted(built.items()):
+        print(f"{name} -> {entry['file']} ({', '.join(entry['encodings']) or 'uncompressed'})")
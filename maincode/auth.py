@@ -1,5 +1,4 @@
 from flask import Blueprint, request, jsonify, session
-import smtplib
 import random
 import string
 import time
@@ -9,27 +8,34 @@ from email.mime.multipart import MIMEMultipart
 import hashlib
 import os
 from functools import wraps
+from auth_store import create_auth_store
+from mail_config import EMAIL_CONFIG
+from mail_dispatcher import MailDispatcher
 
 auth_bp = Blueprint('auth', __name__)
 
-# Email configuration
-EMAIL_CONFIG = {
-    'smtp_server': 'smtp.gmail.com',
-    'smtp_port': 587,
-    'email': 'saisridhar.k@heritagefoods.in',
-    'password': 'iyau hnuf ilav wses'  # App password
-}
+# OTP mails are sent by background workers over reused SMTP sessions
+mail_dispatcher = MailDispatcher(EMAIL_CONFIG, workers=2, pool_size=2, max_retries=3)
 
-# In-memory storage for OTPs (in production, use Redis or database)
-otp_storage = {}
-login_attempts = {}
+# OTP / rate-limit store ('memory' per process, or 'redis' shared by all workers)
+AUTH_STORE_CONFIG = {
+    'backend': os.environ.get('AUTH_STORE_BACKEND', 'memory'),
+    'redis_url': os.environ.get('AUTH_STORE_REDIS_URL', 'redis://localhost:6379/0'),
+    'max_entries': 10000,
+    'sweep_interval': 60
+}
 
 # Rate limiting configuration
 MAX_OTP_REQUESTS_PER_HOUR = 5
 MAX_LOGIN_ATTEMPTS = 3
+RATE_LIMIT_WINDOW_SECONDS = 3600
 OTP_VALIDITY_MINUTES = 10
+# Expired OTPs are kept a little longer so users get "expired" rather than "not found"
+OTP_RETENTION_SECONDS = OTP_VALIDITY_MINUTES * 60 + 3600
 SESSION_DURATION_HOURS = 8
 
+auth_store = create_auth_store(AUTH_STORE_CONFIG)
+
 def generate_otp():
     """Generate a 6-digit OTP"""
     return ''.join(random.choices(string.digits, k=6))
@@ -90,7 +96,7 @@ def get_email_template(otp, email):
     """
 
 def send_otp_email(email, otp):
-    """Send OTP via email"""
+    """Queue OTP email; returns (success, delivery id or error message)"""
     try:
         msg = MIMEMultipart('alternative')
         msg['Subject'] = f"Heritage Foods - Your OTP: {otp}"
@@ -120,13 +126,12 @@ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} IST
         msg.attach(text_part)
         msg.attach(html_part)
         
-        # Send email
-        with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-            server.starttls()
-            server.login(EMAIL_CONFIG['email'], EMAIL_CONFIG['password'])
-            server.send_message(msg)
+        # Queue for background delivery
+        delivery_id = mail_dispatcher.submit(msg)
+        if delivery_id is None:
+            return False, "Too many emails being sent right now. Please try again shortly."
             
-        return True, "OTP sent successfully"
+        return True, delivery_id
         
     except Exception as e:
         print(f"Email sending error: {e}")
@@ -134,30 +139,18 @@ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} IST
 
 def is_rate_limited(email, request_type='otp'):
     """Check if user is rate limited"""
-    current_time = time.time()
-    key = f"{email}_{request_type}"
-    
-    if key not in login_attempts:
-        login_attempts[key] = []
-    
-    # Remove attempts older than 1 hour
-    login_attempts[key] = [timestamp for timestamp in login_attempts[key] 
-                          if current_time - timestamp < 3600]
+    attempts = auth_store.count_attempts(f"{email}_{request_type}", RATE_LIMIT_WINDOW_SECONDS)
     
     if request_type == 'otp':
-        return len(login_attempts[key]) >= MAX_OTP_REQUESTS_PER_HOUR
+        return attempts >= MAX_OTP_REQUESTS_PER_HOUR
     else:  # login attempts
-        return len(login_attempts[key]) >= MAX_LOGIN_ATTEMPTS
+        return attempts >= MAX_LOGIN_ATTEMPTS
 
 def add_attempt(email, request_type='otp'):
-    """Add attempt to rate limiting"""
-    current_time = time.time()
-    key = f"{email}_{request_type}"
-    
-    if key not in login_attempts:
-        login_attempts[key] = []
-    
-    login_attempts[key].append(current_time)
+    """Add attempt to rate limiting; False if the store is full and refused a new counter"""
+    return auth_store.add_attempt(f"{email}_{request_type}", RATE_LIMIT_WINDOW_SECONDS)
+
+STORE_FULL_ERROR = 'Too many sign-in requests right now. Please try again in a few minutes.'
 
 @auth_bp.route('/api/send-otp', methods=['POST'])
 def send_otp():
@@ -180,36 +173,54 @@ def send_otp():
                 'error': f'Too many OTP requests. Maximum {MAX_OTP_REQUESTS_PER_HOUR} requests per hour allowed.'
             }), 429
         
+        # Add to rate limiting (before sending, so a full store can refuse the request)
+        if not add_attempt(email, 'otp'):
+            return jsonify({'error': STORE_FULL_ERROR}), 503
+        
         # Generate OTP
         otp = generate_otp()
         
+        # Store OTP with timestamp
+        otp_hash = hashlib.sha256(f"{email}_{otp}".encode()).hexdigest()
+        if not auth_store.put_otp(email, otp_hash, OTP_RETENTION_SECONDS):
+            return jsonify({'error': STORE_FULL_ERROR}), 503
+        
         # Send email
-        success, message = send_otp_email(email, otp)
+        success, delivery_id = send_otp_email(email, otp)
         
         if not success:
-            return jsonify({'error': message}), 500
-        
-        # Store OTP with timestamp
-        otp_hash = hashlib.sha256(f"{email}_{otp}".encode()).hexdigest()
-        otp_storage[email] = {
-            'otp_hash': otp_hash,
-            'timestamp': time.time(),
-            'attempts': 0
-        }
+            auth_store.delete_otp(email)
+            return jsonify({'error': delivery_id}), 503
         
-        # Add to rate limiting
-        add_attempt(email, 'otp')
+        # Only this browser session may ask about the delivery
+        session['otp_delivery_id'] = delivery_id
         
         return jsonify({
             'message': 'OTP sent successfully',
             'email': email,
-            'valid_for_minutes': OTP_VALIDITY_MINUTES
+            'valid_for_minutes': OTP_VALIDITY_MINUTES,
+            'delivery_id': delivery_id
         }), 200
         
     except Exception as e:
         print(f"Send OTP error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@auth_bp.route('/api/otp-delivery-status/<delivery_id>', methods=['GET'])
+def otp_delivery_status(delivery_id):
+    """Get delivery status (queued/sending/retrying/sent/failed) of the OTP email this session requested"""
+    status = None
+    if session.get('otp_delivery_id') == delivery_id:
+        status = mail_dispatcher.get_status(delivery_id)
+    if status is None:
+        return jsonify({'error': 'Unknown delivery id'}), 404
+    
+    # SMTP error text stays in the server log
+    return jsonify({
+        'delivery_id': delivery_id,
+        'status': status['status']
+    }), 200
+
 @auth_bp.route('/api/verify-otp', methods=['POST'])
 def verify_otp():
     """Verify OTP and create session"""
@@ -232,40 +243,42 @@ def verify_otp():
             }), 429
         
         # Check if OTP exists for email
-        if email not in otp_storage:
+        stored_otp_data = auth_store.get_otp(email)
+        if stored_otp_data is None:
             return jsonify({'error': 'No OTP found. Please request a new one.'}), 404
         
-        stored_otp_data = otp_storage[email]
         current_time = time.time()
         
         # Check if OTP has expired
         if current_time - stored_otp_data['timestamp'] > (OTP_VALIDITY_MINUTES * 60):
-            del otp_storage[email]
+            auth_store.delete_otp(email)
             return jsonify({'error': 'OTP has expired. Please request a new one.'}), 410
         
-        # Check attempt limit for this OTP
-        if stored_otp_data['attempts'] >= 3:
-            del otp_storage[email]
+        # Count this attempt before checking it: the store increments atomically, so concurrent
+        # guesses each get their own count and only the first 3 are ever compared
+        attempts = auth_store.increment_otp_attempts(email)
+        if attempts == 0:
+            return jsonify({'error': 'No OTP found. Please request a new one.'}), 404
+        if attempts > 3:
+            auth_store.delete_otp(email)
             return jsonify({'error': 'Maximum OTP attempts exceeded. Please request a new one.'}), 429
         
         # Verify OTP
         otp_hash = hashlib.sha256(f"{email}_{otp}".encode()).hexdigest()
         
         if otp_hash != stored_otp_data['otp_hash']:
-            # Increment attempt counter
-            stored_otp_data['attempts'] += 1
-            otp_storage[email] = stored_otp_data
-            
-            # Add to rate limiting
-            add_attempt(email, 'login')
+            # Add to rate limiting; if the store can't count it, fail closed
+            if not add_attempt(email, 'login'):
+                auth_store.delete_otp(email)
+                return jsonify({'error': STORE_FULL_ERROR}), 429
             
-            remaining_attempts = 3 - stored_otp_data['attempts']
+            remaining_attempts = 3 - attempts
             if remaining_attempts > 0:
                 return jsonify({
                     'error': f'Invalid OTP. {remaining_attempts} attempts remaining.'
                 }), 401
             else:
-                del otp_storage[email]
+                auth_store.delete_otp(email)
                 return jsonify({
                     'error': 'Invalid OTP. Maximum attempts exceeded. Please request a new OTP.'
                 }), 429
@@ -277,12 +290,10 @@ def verify_otp():
         session.permanent = True
         
         # Clean up OTP
-        del otp_storage[email]
+        auth_store.delete_otp(email)
         
         # Clean up rate limiting for successful login
-        login_key = f"{email}_login"
-        if login_key in login_attempts:
-            del login_attempts[login_key]
+        auth_store.reset_attempts(f"{email}_login")
         
         return jsonify({
             'message': 'Login successful',
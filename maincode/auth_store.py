@@ -0,0 +1,237 @@
+"""OTP and rate-limit state for the auth blueprint.
+
+AuthStore is the interface auth.py talks to. InMemoryAuthStore keeps the
+state in this process (thread-safe, TTL expiry with a background sweeper and a
+hard cap on entries); RedisAuthStore shares it between worker processes.
+
+The cap never evicts live state: dropping an unexpired counter would let a
+flood of new emails reset someone's rate limit. At the cap, expired entries
+are dropped first and a new key is refused if that frees no room.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+
+
+class AuthStore:
+    """Interface for OTP records and sliding-window attempt counters"""
+
+    def put_otp(self, email, otp_hash, ttl):
+        """Store a fresh OTP hash for email, replacing any previous one; False if the store is full"""
+        raise NotImplementedError
+
+    def get_otp(self, email):
+        """Return {'otp_hash', 'timestamp', 'attempts'} or None"""
+        raise NotImplementedError
+
+    def increment_otp_attempts(self, email):
+        """Atomically count a verification attempt; returns the new count, or 0 if there is no OTP.
+
+        Callers check the returned count against their limit rather than a count
+        read earlier, so concurrent attempts cannot all pass the same check.
+        """
+        raise NotImplementedError
+
+    def delete_otp(self, email):
+        raise NotImplementedError
+
+    def add_attempt(self, key, window):
+        """Record an attempt for key, counted for `window` seconds; False if the store is full"""
+        raise NotImplementedError
+
+    def count_attempts(self, key, window):
+        """Number of attempts for key within the last `window` seconds"""
+        raise NotImplementedError
+
+    def reset_attempts(self, key):
+        raise NotImplementedError
+
+
+class InMemoryAuthStore(AuthStore):
+    """Process-local store: O(1) amortized window counters, TTL sweep and size cap"""
+
+    def __init__(self, max_entries=10000, sweep_interval=60):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # email -> (expires_at, record); key -> (expires_at, deque of timestamps)
+        self._otps = {}
+        self._attempts = {}
+        self._sweeper = None
+        if sweep_interval:
+            self._sweeper = threading.Thread(target=self._sweep_loop, args=(sweep_interval,), daemon=True)
+            self._sweeper.start()
+
+    def put_otp(self, email, otp_hash, ttl):
+        now = time.time()
+        with self._lock:
+            if not self._has_room(self._otps, email, now):
+                return False
+            self._otps.pop(email, None)
+            self._otps[email] = (now + ttl, {'otp_hash': otp_hash, 'timestamp': now, 'attempts': 0})
+            return True
+
+    def get_otp(self, email):
+        with self._lock:
+            entry = self._otps.get(email)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._otps[email]
+                return None
+            return dict(entry[1])
+
+    def increment_otp_attempts(self, email):
+        with self._lock:
+            entry = self._otps.get(email)
+            if entry is None:
+                return 0
+            entry[1]['attempts'] += 1
+            return entry[1]['attempts']
+
+    def delete_otp(self, email):
+        with self._lock:
+            self._otps.pop(email, None)
+
+    def add_attempt(self, key, window):
+        now = time.time()
+        with self._lock:
+            if not self._has_room(self._attempts, key, now):
+                return False
+            entry = self._attempts.pop(key, None)
+            timestamps = entry[1] if entry else deque()
+            timestamps.append(now)
+            self._trim(timestamps, now - window)
+            self._attempts[key] = (now + window, timestamps)
+            return True
+
+    def count_attempts(self, key, window):
+        now = time.time()
+        with self._lock:
+            entry = self._attempts.get(key)
+            if entry is None:
+                return 0
+            self._trim(entry[1], now - window)
+            return len(entry[1])
+
+    def reset_attempts(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def sweep(self):
+        """Drop expired OTPs and idle counters; returns the number removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for entries in (self._otps, self._attempts):
+                expired = [key for key, (expires_at, _) in entries.items() if expires_at <= now]
+                for key in expired:
+                    del entries[key]
+                removed += len(expired)
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return len(self._otps) + len(self._attempts)
+
+    @staticmethod
+    def _trim(timestamps, cutoff):
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
+
+    def _has_room(self, entries, key, now):
+        """Whether key may be stored: it already exists, or there is room once expired entries are gone"""
+        if key in entries or len(entries) < self.max_entries:
+            return True
+        for expired in [k for k, (expires_at, _) in entries.items() if expires_at <= now]:
+            del entries[expired]
+        return len(entries) < self.max_entries
+
+    def _sweep_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Auth store sweep error: {e}")
+
+
+class RedisAuthStore(AuthStore):
+    """Shared store for multi-process deployments (requires the redis package)"""
+
+    # HINCRBY only if the OTP still exists, so an expired key is not recreated without a TTL
+    _INCREMENT_ATTEMPTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+return redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='gap:auth:', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.redis = client
+        self.prefix = prefix
+
+    def _otp_key(self, email):
+        return f"{self.prefix}otp:{email}"
+
+    def _attempt_key(self, key):
+        return f"{self.prefix}attempts:{key}"
+
+    def put_otp(self, email, otp_hash, ttl):
+        key = self._otp_key(email)
+        pipe = self.redis.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={'otp_hash': otp_hash, 'timestamp': time.time(), 'attempts': 0})
+        pipe.expire(key, int(ttl))
+        pipe.execute()
+        return True
+
+    def get_otp(self, email):
+        data = self.redis.hgetall(self._otp_key(email))
+        if not data:
+            return None
+        data = {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+                for k, v in data.items()}
+        return {
+            'otp_hash': data['otp_hash'],
+            'timestamp': float(data['timestamp']),
+            'attempts': int(data['attempts']),
+        }
+
+    def increment_otp_attempts(self, email):
+        return int(self.redis.eval(self._INCREMENT_ATTEMPTS, 1, self._otp_key(email)))
+
+    def delete_otp(self, email):
+        self.redis.delete(self._otp_key(email))
+
+    def add_attempt(self, key, window):
+        now = time.time()
+        redis_key = self._attempt_key(key)
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(redis_key, 0, now - window)
+        pipe.zadd(redis_key, {uuid.uuid4().hex: now})
+        pipe.expire(redis_key, int(window) + 1)
+        pipe.execute()
+        return True
+
+    def count_attempts(self, key, window):
+        now = time.time()
+        redis_key = self._attempt_key(key)
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(redis_key, 0, now - window)
+        pipe.zcard(redis_key)
+        return int(pipe.execute()[1])
+
+    def reset_attempts(self, key):
+        self.redis.delete(self._attempt_key(key))
+
+
+def create_auth_store(config):
+    """Build the store selected by config['backend'] ('memory' or 'redis')"""
+    if config.get('backend') == 'redis':
+        return RedisAuthStore(url=config.get('redis_url', 'redis://localhost:6379/0'))
+    return InMemoryAuthStore(max_entries=config.get('max_entries', 10000),
+                             sweep_interval=config.get('sweep_interval', 60))
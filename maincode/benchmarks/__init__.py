@@ -0,0 +1,10 @@
+"""Benchmark suite for the Gap Analysis dashboard.
+
+Generates synthetic zepto_automation / fill_rate_feedback data, loads it into
+a local SQLite stand-in for SQL Server and drives the API endpoints through
+the Flask test client.
+
+Usage (from the maincode directory):
+    python -m benchmarks.run --rows 100000
+    python -m benchmarks.run --rows 1000000 --compare benchmarks/results/<old>.json
+"""
@@ -0,0 +1,219 @@
+"""Synthetic zepto_automation / fill_rate_feedback data generator.
+
+Rows are produced in fixed-size chunks so that 10M row datasets can be
+streamed into the stand-in database without holding everything in memory.
+Every chunk is seeded from (seed, chunk number), so a given seed always
+yields the same dataset.
+"""
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 250000
+
+SENTINEL_DATE = '1900-01-01'
+
+# State -> plants, skewed the way the production data is (Telangana and
+# Andhra Pradesh carry most of the volume)
+PLANTS_BY_STATE = {
+    'Telangana': ['Uppal', 'Bachupally', 'Narketpally', 'Shamshabad', 'Warangal', 'Karimnagar', 'Nizamabad', 'Khammam'],
+    'Andhra Pradesh': ['Chittoor', 'Gokul', 'Vijayawada', 'Guntur', 'Nellore', 'Kakinada', 'Vizag', 'Anantapur', 'Kurnool'],
+    'Karnataka': ['Bengaluru', 'Hubli', 'Mysuru', 'Tumkur', 'Kolar', 'Mangaluru'],
+    'Tamil Nadu': ['Chennai', 'Coimbatore', 'Madurai', 'Trichy', 'Salem', 'Vellore'],
+    'Maharashtra': ['Pune', 'Mumbai', 'Nagpur', 'Nashik', 'Aurangabad'],
+    'Kerala': ['Kochi', 'Thrissur', 'Kozhikode'],
+    'Odisha': ['Bhubaneswar', 'Cuttack', 'Berhampur'],
+    'Delhi': ['Delhi NCR', 'Okhla'],
+    'Haryana': ['Gurugram', 'Faridabad', 'Sonipat'],
+    'Uttar Pradesh': ['Noida', 'Lucknow', 'Kanpur'],
+    'Rajasthan': ['Jaipur', 'Jodhpur'],
+    'West Bengal': ['Kolkata', 'Howrah'],
+}
+
+PRODUCTS = [
+    'Toned Milk', 'Double Toned Milk', 'Full Cream Milk', 'Standardised Milk',
+    'Cow Milk', 'Curd', 'Thick Curd', 'Buttermilk', 'Lassi', 'Paneer',
+    'Ghee', 'Butter', 'Flavoured Milk Badam', 'Flavoured Milk Rose',
+    'Ice Cream Vanilla', 'Ice Cream Chocolate', 'Cheese Slices', 'Dahi Cup',
+    'Milkshake Strawberry', 'Khoa',
+]
+PACK_SIZES = ['90ML', '180ML', '200ML', '250ML', '500ML', '1L', '5L', '200G', '400G']
+
+REASONS = [
+    "Product non Availability at Factory",
+    "Product non Availability at SO",
+    "Product non availability at CFA",
+    "Supply not made as per PO time lines",
+    "PO price issue",
+    "Appointment issues",
+    "Supply rejected by customer",
+    "Mutiple point Delivery",
+    "Due to Quality Issue",
+    "Due to Delayed Delivery"
+]
+
+CUST_GROUPS = ['Quick Commerce', 'Modern Trade', 'E-Commerce', 'Institutional', 'General Trade', 'HoReCa']
+
+ZEPTO_COLUMNS = [
+    'ID', 'PO_No', 'Material_Description', 'Material', 'PO_Date', 'Delivery_Date',
+    'UOM', 'PO_Quantity_Liters', 'Sales_Quantity_Matched', 'Fill_Rate_Percent',
+    'State', 'Plant_Name', 'Sales_District', 'Cust_Group', 'Processing_Date',
+]
+
+FEEDBACK_COLUMNS = [
+    'record_id', 'reason', 'comments', 'user_email', 'created_at',
+    'po_no', 'material_description', 'material', 'po_date', 'delivery_date',
+    'uom', 'po_quantity_liters', 'sales_quantity_matched', 'fill_rate_percent',
+    'state', 'plant_name', 'sales_district', 'cust_group', 'processing_date',
+]
+
+
+def _zipf_weights(n, skew=1.1):
+    """Normalised Zipf-like weights for n categories"""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def build_catalog(n_materials=180, n_users=40, n_districts=45):
+    """Fixed dimension values shared by every chunk of a dataset"""
+    plants = []
+    for state, names in PLANTS_BY_STATE.items():
+        for name in names:
+            plants.append((state, f"Heritage Dairy - {name}", f"{state[:3].upper()}-D{len(plants) % n_districts:02d}"))
+
+    materials = []
+    for i in range(n_materials):
+        product = PRODUCTS[i % len(PRODUCTS)]
+        pack = PACK_SIZES[(i // len(PRODUCTS)) % len(PACK_SIZES)]
+        materials.append((f"Heritage {product} {pack}", str(1000000 + i * 37), 'EA' if pack.endswith('G') else 'L'))
+
+    users = [f"plant.user{i:02d}@heritagefoods.in" for i in range(n_users)]
+
+    return {
+        'plants': plants,
+        'plant_weights': _zipf_weights(len(plants), 0.8),
+        'materials': materials,
+        'material_weights': _zipf_weights(len(materials)),
+        'users': users,
+    }
+
+
+def _date_strings(days, base):
+    """Convert day offsets to 'YYYY-MM-DD' strings"""
+    return np.datetime_as_string(np.datetime64(base, 'D') + days.astype('timedelta64[D]'), unit='D')
+
+
+def _timestamp_strings(days, seconds, base):
+    """Convert day offsets plus seconds to 'YYYY-MM-DD HH:MM:SS' strings"""
+    stamps = (np.datetime64(base, 's') + days.astype('timedelta64[D]').astype('timedelta64[s]')
+              + seconds.astype('timedelta64[s]'))
+    return np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ')
+
+
+def generate_chunk(chunk_no, n_rows, first_id, catalog, seed=42, start_date='2025-01-01',
+                   days=180, feedback_ratio=0.35):
+    """Generate one chunk of zepto_automation rows and matching feedback rows"""
+    rng = np.random.default_rng([seed, chunk_no])
+
+    plant_idx = rng.choice(len(catalog['plants']), size=n_rows, p=catalog['plant_weights'])
+    material_idx = rng.choice(len(catalog['materials']), size=n_rows, p=catalog['material_weights'])
+    plants = np.array(catalog['plants'], dtype=object)
+    materials = np.array(catalog['materials'], dtype=object)
+
+    state = plants[plant_idx, 0].copy()
+    plant_name = plants[plant_idx, 1].copy()
+    district = plants[plant_idx, 2]
+
+    # Sentinel and missing states/plants ('0', '' and NULL) like the upstream feed
+    roll = rng.random(n_rows)
+    state[roll < 0.02] = '0'
+    state[(roll >= 0.02) & (roll < 0.03)] = ''
+    state[(roll >= 0.03) & (roll < 0.035)] = None
+    roll = rng.random(n_rows)
+    plant_name[roll < 0.015] = '0'
+    plant_name[(roll >= 0.015) & (roll < 0.025)] = ''
+
+    # Fill rate: most POs are served in full, a long tail is short-shipped
+    roll = rng.random(n_rows)
+    fill_rate = np.where(roll < 0.6, 100.0,
+                         np.where(roll < 0.7, rng.uniform(95, 100, n_rows), rng.uniform(0, 95, n_rows)))
+    fill_rate = np.round(fill_rate, 2)
+    po_qty = np.round(rng.gamma(2.0, 60.0, n_rows) + 1, 2)
+    sales_qty = np.round(po_qty * fill_rate / 100.0, 2)
+
+    po_day = rng.integers(0, days, n_rows)
+    delivery_day = po_day + rng.integers(1, 5, n_rows)
+    processing_day = delivery_day + rng.integers(0, 3, n_rows)
+    processing_sec = rng.integers(0, 86400, n_rows)
+
+    po_date = _date_strings(po_day, start_date).astype(object)
+    delivery_date = _date_strings(delivery_day, start_date).astype(object)
+    processing_date = _timestamp_strings(processing_day, processing_sec, start_date).astype(object)
+    po_date[rng.random(n_rows) < 0.01] = SENTINEL_DATE
+    delivery_date[rng.random(n_rows) < 0.03] = SENTINEL_DATE
+
+    ids = np.arange(first_id, first_id + n_rows)
+    po_no = (4500000000 + first_id + rng.permutation(n_rows) // 4).astype(str).astype(object)
+
+    zepto = pd.DataFrame({
+        'ID': ids,
+        'PO_No': po_no,
+        'Material_Description': materials[material_idx, 0],
+        'Material': materials[material_idx, 1],
+        'PO_Date': po_date,
+        'Delivery_Date': delivery_date,
+        'UOM': materials[material_idx, 2],
+        'PO_Quantity_Liters': po_qty,
+        'Sales_Quantity_Matched': sales_qty,
+        'Fill_Rate_Percent': fill_rate,
+        'State': state,
+        'Plant_Name': plant_name,
+        'Sales_District': district,
+        'Cust_Group': rng.choice(CUST_GROUPS, n_rows),
+        'Processing_Date': processing_date,
+    }, columns=ZEPTO_COLUMNS)
+
+    # Feedback only exists for actionable rows (same predicate as the dashboard)
+    valid = ~pd.Series(state).fillna('').isin(['', '0']).to_numpy()
+    valid &= ~pd.Series(plant_name).fillna('').isin(['', '0']).to_numpy()
+    has_feedback = (fill_rate < 95) & valid & (rng.random(n_rows) < feedback_ratio)
+    fb = zepto.loc[has_feedback]
+    n_fb = len(fb)
+
+    created = _timestamp_strings(processing_day[has_feedback] + rng.integers(0, 6, n_fb),
+                                 rng.integers(0, 86400, n_fb), start_date)
+    users = np.array(catalog['users'], dtype=object)
+    feedback = pd.DataFrame({
+        'record_id': fb['ID'].to_numpy(),
+        'reason': rng.choice(REASONS, n_fb, p=_zipf_weights(len(REASONS), 0.7)),
+        'comments': np.where(rng.random(n_fb) < 0.4, 'Stock-out at plant', ''),
+        'user_email': users[rng.choice(len(users), n_fb, p=_zipf_weights(len(users), 0.9))],
+        'created_at': created.astype(object),
+        'po_no': fb['PO_No'].to_numpy(),
+        'material_description': fb['Material_Description'].to_numpy(),
+        'material': fb['Material'].to_numpy(),
+        'po_date': fb['PO_Date'].to_numpy(),
+        'delivery_date': fb['Delivery_Date'].to_numpy(),
+        'uom': fb['UOM'].to_numpy(),
+        'po_quantity_liters': fb['PO_Quantity_Liters'].to_numpy(),
+        'sales_quantity_matched': fb['Sales_Quantity_Matched'].to_numpy(),
+        'fill_rate_percent': fb['Fill_Rate_Percent'].to_numpy(),
+        'state': fb['State'].to_numpy(),
+        'plant_name': fb['Plant_Name'].to_numpy(),
+        'sales_district': fb['Sales_District'].to_numpy(),
+        'cust_group': fb['Cust_Group'].to_numpy(),
+        'processing_date': fb['Processing_Date'].to_numpy(),
+    }, columns=FEEDBACK_COLUMNS)
+
+    return zepto, feedback
+
+
+def generate(rows, seed=42, chunk_size=CHUNK_SIZE, **kwargs):
+    """Yield (zepto_chunk, feedback_chunk) DataFrames until `rows` rows are produced"""
+    catalog = build_catalog()
+    chunk_no = 0
+    produced = 0
+    while produced < rows:
+        n = min(chunk_size, rows - produced)
+        yield generate_chunk(chunk_no, n, produced + 1, catalog, seed=seed, **kwargs)
+        produced += n
+        chunk_no += 1
@@ -0,0 +1,373 @@
+"""Load test replaying real dashboard and reports user journeys.
+
+Starts the app in-process on a threaded local server backed by a copy of the
+stand-in database, stubs OTP delivery so virtual users can read their codes
+back, and drives concurrent journeys with a configurable user mix and ramp.
+Each stage reports throughput, error rate and tail latency per step.
+
+Usage (from the maincode directory):
+    python -m benchmarks.loadtest --rows 100000 --stages 10,25,50 --duration 60
+    python -m benchmarks.loadtest --mix dashboard=0.7,reports=0.3 --ramp 20
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import localdb
+from benchmarks.run import DATA_DIR, RESULTS_DIR, git_revision
+
+# Browsers open up to six connections per host, so page-load fan-out is
+# replayed with the same parallelism
+BROWSER_PARALLELISM = 6
+
+
+class OtpOutbox:
+    """Stand-in for send_otp_email() that keeps the last OTP per address"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+
+    def send(self, email, otp):
+        with self._lock:
+            self._codes[email] = otp
+        return True, None
+
+    def take(self, email):
+        with self._lock:
+            return self._codes.pop(email, None)
+
+
+class Recorder:
+    """Thread-safe per-step latency and status collection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.journeys = {}
+
+    def add(self, step, latency_ms, status):
+        with self._lock:
+            self.samples.setdefault(step, []).append((latency_ms, status))
+
+    def journey_done(self, name, ok):
+        with self._lock:
+            done, failed = self.journeys.get(name, (0, 0))
+            self.journeys[name] = (done + 1, failed + (0 if ok else 1))
+
+    def summary(self, elapsed):
+        steps = {}
+        for step, samples in self.samples.items():
+            lat = np.array([s[0] for s in samples])
+            statuses = {}
+            for _, status in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            errors = sum(1 for _, status in samples if not 200 <= status < 400)
+            steps[step] = {
+                'requests': len(samples),
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'errors': errors,
+                'error_rate': round(errors / len(samples), 4),
+                'status_codes': statuses,
+                'latency_ms': {
+                    'p50': round(float(np.percentile(lat, 50)), 2),
+                    'p90': round(float(np.percentile(lat, 90)), 2),
+                    'p95': round(float(np.percentile(lat, 95)), 2),
+                    'p99': round(float(np.percentile(lat, 99)), 2),
+                    'max': round(float(lat.max()), 2),
+                },
+            }
+        total = sum(s['requests'] for s in steps.values())
+        errors = sum(s['errors'] for s in steps.values())
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'journeys': {name: {'completed': done, 'failed': failed}
+                         for name, (done, failed) in self.journeys.items()},
+            'steps': steps,
+        }
+
+
+class VirtualUser:
+    """One browser session walking through journeys until the deadline"""
+
+    def __init__(self, user_no, base_url, outbox, recorder, mix, think_time, rng):
+        self.user_no = user_no
+        self.base_url = base_url
+        self.outbox = outbox
+        self.recorder = recorder
+        self.mix = mix
+        self.think_time = think_time
+        self.rng = rng
+        self.iteration = 0
+        self.opener = None
+
+    def request(self, step, path, payload=None, expect_json=True):
+        """Issue one request, record it and return (status, parsed body)"""
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+
+        t0 = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=300) as response:
+                status = response.status
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+            body = e.read()
+        except Exception:
+            status = 599
+            body = b''
+        self.recorder.add(step, (time.perf_counter() - t0) * 1000, status)
+
+        if expect_json and body:
+            try:
+                return status, json.loads(body)
+            except ValueError:
+                return status, None
+        return status, None
+
+    def fan_out(self, calls):
+        """Issue page-load requests concurrently, like the browser does"""
+        with ThreadPoolExecutor(max_workers=BROWSER_PARALLELISM) as pool:
+            futures = [pool.submit(self.request, step, path) for step, path in calls]
+            return [f.result() for f in futures]
+
+    @staticmethod
+    def bootstrap_parts(bootstrap):
+        """(parts, part statuses) of a bootstrap response, or None if it has no parts"""
+        if not isinstance(bootstrap, dict) or not isinstance(bootstrap.get('parts'), dict):
+            return None
+        return bootstrap['parts'], bootstrap.get('status') or {}
+
+    def think(self):
+        if self.think_time:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def login(self):
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        # A fresh address per iteration keeps the OTP rate limit out of the measurement
+        email = f"load.user{self.user_no}.{self.iteration}@heritagefoods.in"
+        status, _ = self.request('send-otp', '/api/send-otp', {'email': email})
+        if status != 200:
+            return False
+        otp = self.outbox.take(email)
+        status, _ = self.request('verify-otp', '/api/verify-otp', {'email': email, 'otp': otp or ''})
+        return status == 200
+
+    def dashboard_journey(self):
+        if not self.login():
+            return False
+        self.request('page-dashboard', '/dashboard', expect_json=False)
+        (status, bootstrap), _ = self.fan_out([
+            ('bootstrap-dashboard', '/api/bootstrap/dashboard'),
+            ('verify-session', '/api/verify-session'),
+        ])
+        found = self.bootstrap_parts(bootstrap)
+        # A 200 without parts is a failed journey, not an empty page
+        if status != 200 or found is None:
+            return False
+        parts, _ = found
+        options, low_fill = parts.get('filter_options'), parts.get('data')
+        self.think()
+
+        query = {}
+        plants_by_state = (options or {}).get('plants_by_state') or {}
+        if plants_by_state:
+            state = self.rng.choice(sorted(plants_by_state))
+            query['state'] = state
+            if plants_by_state[state] and self.rng.random() < 0.5:
+                query['plant'] = self.rng.choice(plants_by_state[state])['name']
+        status, _ = self.request('filtered-data', '/api/filtered-data?' + urllib.parse.urlencode(query))
+        self.think()
+
+        pending = [r['id'] for r in (low_fill or {}).get('data', []) if not r.get('has_feedback')]
+        if pending:
+            self.request('submit-feedback', '/api/submit-feedback', {
+                'record_id': self.rng.choice(pending),
+                'reason': 'Due to Delayed Delivery',
+                'comments': 'load test',
+            })
+            self.think()
+
+        self.request('download-data', '/api/download-data?' + urllib.parse.urlencode(query), expect_json=False)
+        return status == 200
+
+    def reports_journey(self):
+        if not self.login():
+            return False
+        self.request('page-reports', '/reports', expect_json=False)
+        status, bootstrap = self.request('bootstrap-reports', '/api/bootstrap/reports')
+        found = self.bootstrap_parts(bootstrap)
+        if status != 200 or found is None:
+            return False
+        parts, part_status = found
+        self.think()
+
+        options = parts.get('filter_options') or {}
+        query = {}
+        if options.get('states'):
+            query['state'] = self.rng.choice(options['states'])
+        self.request('feedback-reports-data-filtered', '/api/feedback-reports-data?' + urllib.parse.urlencode(query))
+        self.think()
+
+        self.request('download-feedback-reports', '/api/download-feedback-reports?' + urllib.parse.urlencode(query),
+                     expect_json=False)
+        self.request('download-plant-feedback-stats', '/api/download-plant-feedback-stats', expect_json=False)
+        return all(200 <= code < 400 for code in part_status.values())
+
+    def run(self, deadline):
+        names, weights = zip(*self.mix.items())
+        while time.time() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            journey = self.dashboard_journey if name == 'dashboard' else self.reports_journey
+            try:
+                ok = journey()
+            except Exception as e:
+                print(f"Virtual user {self.user_no} error: {e}")
+                ok = False
+            self.recorder.journey_done(name, ok)
+            self.iteration += 1
+            self.think()
+
+
+def start_server(db_path, outbox):
+    """Serve the app on a random local port with the stand-in database and stubbed OTP mail"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import auth
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    localdb.install(db_path)
+    auth.send_otp_email = outbox.send
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_stage(base_url, outbox, users, ramp, duration, mix, think_time, seed):
+    """Run `users` concurrent virtual users, started evenly over `ramp` seconds"""
+    recorder = Recorder()
+    started = time.time()
+    deadline = started + ramp + duration
+    threads = []
+    for i in range(users):
+        user = VirtualUser(i, base_url, outbox, recorder, mix, think_time, random.Random(seed * 100003 + i))
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        threads.append(thread)
+        delay = started + (ramp * i / users) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.time() - started)
+
+
+def parse_mix(text):
+    """Parse 'dashboard=0.8,reports=0.2' into a weight dict"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('dashboard', 'reports'):
+            raise ValueError(f"Unknown journey: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay concurrent dashboard/reports journeys against a local instance')
+    parser.add_argument('--rows', type=int, default=10000, help='stand-in dataset size')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='stand-in database to copy (default: benchmarks/.data/gap_<rows>_<seed>.sqlite)')
+    parser.add_argument('--stages', default='10', help='comma separated concurrent user counts, one stage each')
+    parser.add_argument('--ramp', type=float, default=10.0, help='seconds to start all users of a stage')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds at full concurrency per stage')
+    parser.add_argument('--mix', default='dashboard=0.8,reports=0.2', help='journey weights')
+    parser.add_argument('--think-time', type=float, default=1.0, help='mean pause between steps in seconds')
+    parser.add_argument('--out', default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    source_db = args.db or os.path.join(DATA_DIR, f"gap_{args.rows}_{args.seed}.sqlite")
+    if not os.path.exists(source_db):
+        print(f"Generating {args.rows} rows into {source_db}")
+        localdb.build_database(source_db, args.rows, seed=args.seed)
+
+    # Journeys submit feedback, so work on a throwaway copy of the dataset
+    work_dir = tempfile.mkdtemp(prefix='gap_loadtest_')
+    db_path = os.path.join(work_dir, 'loadtest.sqlite')
+    shutil.copyfile(source_db, db_path)
+    conn = localdb.LocalConnection(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+
+    outbox = OtpOutbox()
+    server, base_url = start_server(db_path, outbox)
+    print(f"Serving stand-in app at {base_url}")
+
+    stages = []
+    try:
+        for users in [int(u) for u in args.stages.split(',')]:
+            print(f"Stage: {users} users, ramp {args.ramp}s, duration {args.duration}s")
+            summary = run_stage(base_url, outbox, users, args.ramp, args.duration, mix, args.think_time, args.seed)
+            summary['users'] = users
+            stages.append(summary)
+            print(f"  {summary['requests']} requests, {summary['throughput_rps']} req/s, "
+                  f"error rate {summary['error_rate']:.2%}")
+            for step, s in sorted(summary['steps'].items()):
+                lat = s['latency_ms']
+                print(f"    {step:32} n={s['requests']:>6} err={s['error_rate']:>6.1%} "
+                      f"p50={lat['p50']:>9.1f} p95={lat['p95']:>9.1f} p99={lat['p99']:>9.1f}ms")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'rows': args.rows,
+            'seed': args.seed,
+            'mix': mix,
+            'ramp': args.ramp,
+            'duration': args.duration,
+            'think_time': args.think_time,
+        },
+        'stages': stages,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"loadtest_{args.rows}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {out_path}")
+    return output
+
+
+if __name__ == '__main__':
+    main()
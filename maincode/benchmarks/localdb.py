@@ -0,0 +1,249 @@
+"""SQLite stand-in for the SQL Server database.
+
+The connection wrapper rewrites the handful of T-SQL constructs the app uses
+(ISNULL, GETDATE, TOP n, CAST AS DATE, sysobjects existence checks, the ingest
+MERGE) and hands back datetime objects for date columns the way pyodbc does,
+so the route code runs unmodified against a local file.
+"""
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+from benchmarks import datagen
+
+ZEPTO_DDL = """
+CREATE TABLE IF NOT EXISTS zepto_automation (
+    ID INTEGER PRIMARY KEY,
+    PO_No NVARCHAR(50),
+    Material_Description NVARCHAR(255),
+    Material NVARCHAR(50),
+    PO_Date DATE,
+    Delivery_Date DATE,
+    UOM NVARCHAR(10),
+    PO_Quantity_Liters REAL,
+    Sales_Quantity_Matched REAL,
+    Fill_Rate_Percent REAL,
+    State NVARCHAR(100),
+    Plant_Name NVARCHAR(255),
+    Sales_District NVARCHAR(100),
+    Cust_Group NVARCHAR(100),
+    Processing_Date DATETIME,
+    Effective_Date DATE GENERATED ALWAYS AS (
+        CASE WHEN Delivery_Date IS NOT NULL AND Delivery_Date != '1900-01-01'
+             THEN DATE(Delivery_Date) ELSE DATE(Processing_Date) END) STORED
+)
+"""
+
+FEEDBACK_DDL = """
+CREATE TABLE IF NOT EXISTS fill_rate_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id INT NOT NULL,
+    reason NVARCHAR(255) NOT NULL,
+    comments NVARCHAR(1000),
+    user_email NVARCHAR(255),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    po_no NVARCHAR(50),
+    material_description NVARCHAR(255),
+    material NVARCHAR(50),
+    po_date DATE,
+    delivery_date DATE,
+    uom NVARCHAR(10),
+    po_quantity_liters REAL,
+    sales_quantity_matched REAL,
+    fill_rate_percent REAL,
+    state NVARCHAR(100),
+    plant_name NVARCHAR(255),
+    sales_district NVARCHAR(100),
+    cust_group NVARCHAR(100),
+    processing_date DATETIME
+)
+"""
+
+INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_feedback_record_id ON fill_rate_feedback (record_id)",
+    "CREATE INDEX IF NOT EXISTS ix_feedback_created_at ON fill_rate_feedback (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_zepto_fill_rate ON zepto_automation (Fill_Rate_Percent)",
+    "CREATE INDEX IF NOT EXISTS ix_zepto_effective_date ON zepto_automation (Effective_Date, State, Plant_Name)",
+]
+
+# T-SQL -> SQLite rewrites, applied in order
+_REWRITES = [
+    (re.compile(r"IF NOT EXISTS \(SELECT \* FROM sysobjects WHERE name='(\w+)' AND xtype='U'\)\s*CREATE TABLE \w+", re.I),
+     r"CREATE TABLE IF NOT EXISTS \1"),
+    (re.compile(r"(?:BIG)?INT IDENTITY\(1,\s*1\) PRIMARY KEY", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"GETDATE\(\)", re.I), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bISNULL\(", re.I), "IFNULL("),
+    (re.compile(r"CAST\(([\w.]+) AS DATE\)", re.I), r"DATE(\1)"),
+    (re.compile(r"AS DECIMAL\(\d+,\s*\d+\)", re.I), "AS REAL"),
+    (re.compile(r"INFORMATION_SCHEMA\.TABLES\s+WHERE TABLE_NAME", re.I), "sqlite_master WHERE type = 'table' AND name"),
+]
+# MERGE ... USING (last staged row per key of one batch) ... OUTPUT, as ingest.py issues it
+_MERGE = re.compile(
+    r"MERGE\s+(?P<target>\w+).*?ORDER BY s\.(?P<order>\w+) DESC.*?FROM\s+(?P<staging>\w+)\s+s\b"
+    r".*?\bON\s+(?P<on>.*?)\s+WHEN MATCHED THEN UPDATE SET\s+(?P<set>.*?)\s+WHEN NOT MATCHED BY TARGET THEN"
+    r"\s+INSERT\s*\((?P<columns>.*?)\)\s*VALUES\s*\((?P<values>.*)\)\s*OUTPUT", re.I | re.S)
+_TOP = re.compile(r"SELECT\s+TOP\s+(\d+)\s", re.I)
+_DATE_VALUE = re.compile(r"^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2}(\.\d+)?)?$")
+
+
+def translate(sql):
+    """Rewrite a T-SQL statement into the SQLite dialect"""
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    top = _TOP.search(sql)
+    if top:
+        sql = _TOP.sub('SELECT ', sql, count=1).rstrip().rstrip(';') + f" LIMIT {top.group(1)}"
+    return sql
+
+
+def _convert(value):
+    """Return date-looking strings as datetime, like pyodbc does for DATE/DATETIME"""
+    if isinstance(value, str) and _DATE_VALUE.match(value):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class LocalCursor:
+    """Minimal pyodbc-compatible cursor over sqlite3"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fast_executemany = False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        if params and not isinstance(params, (list, tuple)):
+            params = (params,)
+        merge = _MERGE.search(sql)
+        if merge:
+            return self._merge(merge, params[0])
+        self._cursor.execute(translate(sql), tuple(params))
+        return self
+
+    def _merge(self, merge, batch_id):
+        """Run ingest's MERGE as UPDATE ... FROM then INSERT ... WHERE NOT EXISTS; yields (inserted, updated)"""
+        target, staging, order = merge.group('target'), merge.group('staging'), merge.group('order')
+        keys = re.findall(r"t\.(\w+)\s*=\s*s\.\1\b", merge.group('on'))
+        join = ' AND '.join(f"t.{k} = s.{k}" for k in keys)
+        assignments = translate(re.sub(r"\bt\.(\w+)\s*=", r"\1 =", merge.group('set')))
+        cursor = self._cursor
+        cursor.execute("DROP TABLE IF EXISTS temp.merge_source")
+        cursor.execute(f"CREATE TEMP TABLE merge_source AS SELECT * FROM {staging} WHERE {order} IN "
+                       f"(SELECT MAX({order}) FROM {staging} WHERE Batch_ID = ? GROUP BY {', '.join(keys)})",
+                       (batch_id,))
+        cursor.execute(f"UPDATE {target} AS t SET {assignments} FROM temp.merge_source AS s WHERE {join}")
+        updated = cursor.rowcount
+        cursor.execute(f"INSERT INTO {target} ({merge.group('columns')}) "
+                       f"SELECT {translate(merge.group('values'))} FROM temp.merge_source AS s "
+                       f"WHERE NOT EXISTS (SELECT 1 FROM {target} t WHERE {join})")
+        inserted = cursor.rowcount
+        cursor.execute("DROP TABLE temp.merge_source")
+        cursor.execute("SELECT ?, ?", (inserted, updated))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate(sql), seq_of_params)
+        return self
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return tuple(_convert(v) for v in row) if row is not None else None
+
+    def fetchall(self):
+        return [tuple(_convert(v) for v in row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [tuple(_convert(v) for v in row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class LocalConnection:
+    """Minimal pyodbc-compatible connection over sqlite3"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+
+    def cursor(self):
+        return LocalCursor(self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def build_database(path, rows, seed=42, chunk_size=datagen.CHUNK_SIZE):
+    """Create a stand-in database at `path` with `rows` synthetic records"""
+    if os.path.exists(path):
+        os.unlink(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(ZEPTO_DDL)
+    conn.execute(FEEDBACK_DDL)
+
+    zepto_insert = f"INSERT INTO zepto_automation VALUES ({', '.join('?' * len(datagen.ZEPTO_COLUMNS))})"
+    feedback_insert = (f"INSERT INTO fill_rate_feedback ({', '.join(datagen.FEEDBACK_COLUMNS)}) "
+                       f"VALUES ({', '.join('?' * len(datagen.FEEDBACK_COLUMNS))})")
+
+    feedback_rows = 0
+    for zepto, feedback in datagen.generate(rows, seed=seed, chunk_size=chunk_size):
+        conn.executemany(zepto_insert, _records(zepto))
+        conn.executemany(feedback_insert, _records(feedback))
+        conn.commit()
+        feedback_rows += len(feedback)
+        print(f"Loaded {int(zepto['ID'].iloc[-1])}/{rows} rows")
+
+    for ddl in INDEX_DDL:
+        conn.execute(ddl)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    return {'zepto_rows': rows, 'feedback_rows': feedback_rows}
+
+
+def _records(df):
+    """Yield DataFrame rows as tuples of plain Python values"""
+    for row in df.itertuples(index=False, name=None):
+        yield tuple(v.item() if hasattr(v, 'item') else v for v in row)
+
+
+def install(path):
+    """Point every loaded get_db_connection() at the stand-in database"""
+    def get_db_connection():
+        """Create stand-in database connection"""
+        return LocalConnection(path)
+
+    patched = []
+    for name, module in list(sys.modules.items()):
+        if name == __name__ or module is None:
+            continue
+        try:
+            original = getattr(module, 'get_db_connection', None)
+        except Exception:
+            continue
+        if callable(original):
+            module.get_db_connection = get_db_connection
+            patched.append(name)
+    return patched
@@ -0,0 +1,266 @@
+"""Endpoint benchmark runner.
+
+Builds (or reuses) a stand-in database, drives every API endpoint through the
+Flask test client and writes latency percentiles, peak RSS and response size
+per endpoint to a JSON file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import localdb
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+BENCH_USER = 'benchmark.user@heritagefoods.in'
+
+# (name, path template, is_export)
+ENDPOINTS = [
+    ('dashboard-stats', '/api/dashboard-stats', False),
+    ('filter-options', '/api/filter-options', False),
+    ('low-fill-rate-data', '/api/low-fill-rate-data', False),
+    ('filtered-data-state-plant', '/api/filtered-data?state={state}&plant={plant}', False),
+    ('filtered-data-material-dates', '/api/filtered-data?material={material}&date_from={date_from}&date_to={date_to}', False),
+    ('reasons', '/api/reasons', False),
+    ('check-feedback', '/api/check-feedback/{record_id}', False),
+    ('feedback-history', '/api/feedback-history/{record_id}', False),
+    ('feedback-reports-data', '/api/feedback-reports-data', False),
+    ('feedback-reports-data-filtered', '/api/feedback-reports-data?state={state}&date_from={date_from}&date_to={date_to}', False),
+    ('feedback-summary-stats', '/api/feedback-summary-stats', False),
+    ('reports-filter-options', '/api/reports-filter-options', False),
+    ('plant-feedback-stats', '/api/plant-feedback-stats', False),
+    ('download-data', '/api/download-data?state={state}', True),
+    ('download-feedback-reports', '/api/download-feedback-reports?state={state}', True),
+    ('download-plant-feedback-stats', '/api/download-plant-feedback-stats', True),
+]
+
+
+class RssSampler:
+    """Track the peak resident set size of this process while active"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+def current_rss():
+    """Current resident set size in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        # No procfs (macOS/Windows): fall back to the process high-water mark
+        try:
+            import resource
+        except ImportError:
+            # Windows has no resource module either; peak RSS is reported as 0
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def sample_params(db_path):
+    """Pick realistic filter values from the generated data"""
+    conn = localdb.LocalConnection(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT State, Plant_Name, COUNT(*) FROM zepto_automation
+        WHERE Fill_Rate_Percent < 95 AND State NOT IN ('', '0') AND Plant_Name NOT IN ('', '0')
+        GROUP BY State, Plant_Name ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    state, plant, _ = cursor.fetchone()
+    cursor.execute("""
+        SELECT Material_Description FROM zepto_automation
+        WHERE Fill_Rate_Percent < 95 GROUP BY Material_Description ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    material = cursor.fetchone()[0]
+    cursor.execute("SELECT MIN(record_id) FROM fill_rate_feedback")
+    record_id = cursor.fetchone()[0] or 1
+    conn.close()
+    return {
+        'state': state,
+        'plant': plant,
+        'material': material,
+        'date_from': '2025-02-01',
+        'date_to': '2025-02-28',
+        'record_id': record_id,
+    }
+
+
+def create_client(db_path):
+    """Import the app against the stand-in database and return a logged-in test client"""
+    from app import app
+
+    localdb.install(db_path)
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_email'] = BENCH_USER
+        sess['login_time'] = time.time()
+    return client
+
+
+def bench_endpoint(client, path, repeat, warmup, max_seconds):
+    """Time repeated GETs of one endpoint"""
+    for _ in range(warmup):
+        client.get(path)
+
+    latencies = []
+    sizes = []
+    statuses = {}
+    started = time.perf_counter()
+    with RssSampler() as rss:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            response = client.get(path)
+            body = response.get_data()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            sizes.append(len(body))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if time.perf_counter() - started > max_seconds:
+                break
+
+    lat = np.array(latencies)
+    return {
+        'path': path,
+        'samples': len(latencies),
+        'status_codes': {str(k): v for k, v in statuses.items()},
+        'latency_ms': {
+            'min': round(float(lat.min()), 3),
+            'p50': round(float(np.percentile(lat, 50)), 3),
+            'p90': round(float(np.percentile(lat, 90)), 3),
+            'p95': round(float(np.percentile(lat, 95)), 3),
+            'p99': round(float(np.percentile(lat, 99)), 3),
+            'max': round(float(lat.max()), 3),
+            'mean': round(float(lat.mean()), 3),
+        },
+        'peak_rss_bytes': rss.peak,
+        'response_bytes': int(np.median(sizes)),
+    }
+
+
+def git_revision():
+    """Current commit hash, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    """Print p50/p95 deltas against an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\n{'endpoint':34} {'p50 ms':>10} {'base':>10} {'delta':>8} {'p95 ms':>10} {'base':>10} {'delta':>8}")
+    for name, result in current['endpoints'].items():
+        old = baseline['endpoints'].get(name)
+        if not old:
+            continue
+        row = [name]
+        for key in ('p50', 'p95'):
+            new_v = result['latency_ms'][key]
+            old_v = old['latency_ms'][key]
+            change = (new_v - old_v) / old_v * 100 if old_v else 0
+            row.extend([new_v, old_v, change])
+        print(f"{row[0]:34} {row[1]:>10.2f} {row[2]:>10.2f} {row[3]:>7.1f}% {row[4]:>10.2f} {row[5]:>10.2f} {row[6]:>7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Gap Analysis API against a local stand-in database')
+    parser.add_argument('--rows', type=int, default=10000, help='zepto_automation rows to generate (10k-10M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='stand-in database path (default: benchmarks/.data/gap_<rows>_<seed>.sqlite)')
+    parser.add_argument('--rebuild', action='store_true', help='regenerate the database even if it exists')
+    parser.add_argument('--repeat', type=int, default=20, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--max-seconds', type=float, default=60.0, help='time budget per endpoint')
+    parser.add_argument('--only', help='comma separated endpoint names to run')
+    parser.add_argument('--skip-exports', action='store_true', help='skip the Excel download endpoints')
+    parser.add_argument('--out', default=RESULTS_DIR, help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(DATA_DIR, f"gap_{args.rows}_{args.seed}.sqlite")
+    dataset = None
+    if args.rebuild or not os.path.exists(db_path):
+        print(f"Generating {args.rows} rows into {db_path}")
+        t0 = time.perf_counter()
+        dataset = localdb.build_database(db_path, args.rows, seed=args.seed)
+        dataset['build_seconds'] = round(time.perf_counter() - t0, 2)
+
+    params = sample_params(db_path)
+    client = create_client(db_path)
+
+    selected = set(args.only.split(',')) if args.only else None
+    results = {}
+    for name, template, is_export in ENDPOINTS:
+        if selected and name not in selected:
+            continue
+        if is_export and args.skip_exports:
+            continue
+        path = template.format(**params)
+        result = bench_endpoint(client, path, args.repeat, args.warmup, args.max_seconds)
+        results[name] = result
+        lat = result['latency_ms']
+        print(f"{name:34} p50={lat['p50']:>9.2f}ms p95={lat['p95']:>9.2f}ms "
+              f"rss={result['peak_rss_bytes'] / 2**20:>8.1f}MB bytes={result['response_bytes']}")
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'rows': args.rows,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'dataset': dataset,
+            'params': params,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'endpoints': results,
+    }
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"bench_{args.rows}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, 'w') as f:
+        json.dump(output, f, indent=2, default=str)
+    print(f"Results written to {out_path}")
+
+    if args.compare:
+        compare(output, args.compare)
+
+    return output
+
+
+if __name__ == '__main__':
+    main()
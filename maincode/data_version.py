@@ -0,0 +1,102 @@
+"""Data versions for read-side cache invalidation.
+
+Every write path that changes a table (bulk ingestion, recomputes) bumps its
+row in data_versions inside the same transaction. Caches key their entries
+on the current version and poll it cheaply, so they are invalidated exactly
+when the underlying data changes instead of on a timer.
+
+    from data_version import current_version
+    key = (current_version('zepto_automation'), filters...)
+"""
+import os
+import threading
+import time
+
+from routes import data_routes
+
+POLL_SECONDS = float(os.environ.get('DATA_VERSION_POLL_SECONDS', 5))
+
+VERSIONS_DDL = """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='data_versions' AND xtype='U')
+CREATE TABLE data_versions (
+    name NVARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL,
+    batch_id NVARCHAR(50),
+    updated_at DATETIME DEFAULT GETDATE()
+)
+"""
+
+
+def ensure_table(cursor):
+    cursor.execute(VERSIONS_DDL)
+
+
+def bump(cursor, name, batch_id=None):
+    """Increment a table's version (caller commits); returns the new version"""
+    ensure_table(cursor)
+    cursor.execute("UPDATE data_versions SET version = version + 1, batch_id = ?, updated_at = GETDATE() "
+                   "WHERE name = ?", (batch_id, name))
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO data_versions (name, version, batch_id) VALUES (?, 1, ?)", (name, batch_id))
+    cursor.execute("SELECT version FROM data_versions WHERE name = ?", (name,))
+    return int(cursor.fetchone()[0])
+
+
+def read_versions(conn):
+    cursor = conn.cursor()
+    ensure_table(cursor)
+    cursor.execute("SELECT name, version, batch_id, updated_at FROM data_versions")
+    return {
+        row[0]: {
+            'version': int(row[1]),
+            'batch_id': row[2],
+            'updated_at': data_routes.safe_date_format(row[3], '%Y-%m-%d %H:%M:%S'),
+        }
+        for row in cursor.fetchall()
+    }
+
+
+class VersionPoller:
+    """Process-wide view of data_versions, re-read at most every poll_seconds"""
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._checked_at = 0.0
+
+    def versions(self):
+        with self._lock:
+            if time.time() - self._checked_at < self.poll_seconds:
+                return self._versions
+        conn = data_routes.get_db_connection()
+        if not conn:
+            return self._versions
+        try:
+            versions = read_versions(conn)
+            conn.commit()
+        except Exception as e:
+            print(f"Data version poll error: {e}")
+            return self._versions
+        finally:
+            conn.close()
+        with self._lock:
+            self._versions = versions
+            self._checked_at = time.time()
+        return versions
+
+    def current(self, name):
+        entry = self.versions().get(name)
+        return entry['version'] if entry else 0
+
+    def invalidate(self):
+        """Force the next read to hit the database (after a local write)"""
+        with self._lock:
+            self._checked_at = 0.0
+
+
+poller = VersionPoller()
+
+
+def current_version(name='zepto_automation'):
+    return poller.current(name)
@@ -0,0 +1,267 @@
+"""Pending-feedback digest emails.
+
+Aggregates pending low fill rate records per State/Plant_Name in one grouped
+query, renders one summary email per recipient list and sends the whole batch
+over a single SMTP session.
+
+Run once (e.g. from Task Scheduler / cron):
+    python digest.py
+    python digest.py --dry-run --out digest_preview
+Or keep it running and send every N hours:
+    python digest.py --interval-hours 24
+"""
+import argparse
+import html
+import json
+import os
+import time
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import fill_rate
+from mail_config import EMAIL_CONFIG
+from mail_dispatcher import open_smtp_session
+from routes import data_routes
+
+DASHBOARD_URL = os.environ.get('DASHBOARD_URL', 'http://localhost:8000/dashboard')
+
+# {"plants": {"<Plant_Name>": [emails]}, "states": {"<State>": [emails]}, "default": [emails]}
+RECIPIENTS_FILE = os.environ.get('DIGEST_RECIPIENTS_FILE',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'digest_recipients.json'))
+
+PENDING_BY_PLANT_QUERY = """
+SELECT z.State, z.Plant_Name,
+       COUNT(*) AS total_records,
+       COUNT(f.record_id) AS feedback_provided,
+       COUNT(*) - COUNT(f.record_id) AS pending_feedback,
+       MIN(CASE WHEN f.record_id IS NULL AND z.Delivery_Date > '1900-01-01' THEN z.Delivery_Date END) AS oldest_pending
+FROM zepto_automation z
+LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
+WHERE z.Fill_Rate_Percent < ?
+AND z.State IS NOT NULL AND z.State != '' AND z.State != '0' AND z.State != 'Unknown State'
+AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0' AND z.Plant_Name != 'Unknown Plant'
+GROUP BY z.State, z.Plant_Name
+HAVING COUNT(*) - COUNT(f.record_id) > 0
+ORDER BY z.State, z.Plant_Name
+"""
+
+
+def load_recipients(path=RECIPIENTS_FILE):
+    """Load the plant/state -> recipients mapping"""
+    if not os.path.exists(path):
+        print(f"Recipients file not found: {path}")
+        return {'plants': {}, 'states': {}, 'default': []}
+    with open(path) as f:
+        config = json.load(f)
+    return {
+        'plants': config.get('plants', {}),
+        'states': config.get('states', {}),
+        'default': config.get('default', []),
+    }
+
+
+def fetch_pending_by_plant(conn, threshold=None):
+    """Pending feedback counts per State/Plant_Name from one grouped query"""
+    if threshold is None:
+        threshold = fill_rate.DEFAULT_THRESHOLD
+    cursor = conn.cursor()
+    cursor.execute(PENDING_BY_PLANT_QUERY, (threshold,))
+    rows = []
+    for row in cursor.fetchall():
+        rows.append({
+            'state': row[0],
+            'plant_name': row[1],
+            'total_records': row[2],
+            'feedback_provided': row[3],
+            'pending_feedback': row[4],
+            'oldest_pending': data_routes.safe_date_format(row[5]),
+        })
+    return rows
+
+
+def group_by_recipients(plant_rows, recipients):
+    """Bucket plant rows by the recipient list that should receive them"""
+    batches = {}
+    for row in plant_rows:
+        emails = (recipients['plants'].get(row['plant_name'])
+                  or recipients['states'].get(row['state'])
+                  or recipients['default'])
+        if not emails:
+            continue
+        key = tuple(sorted({e.lower().strip() for e in emails}))
+        batches.setdefault(key, []).append(row)
+    return batches
+
+
+def render_digest(plant_rows):
+    """Render the HTML and plain-text bodies of one digest email"""
+    total_pending = sum(r['pending_feedback'] for r in plant_rows)
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    table_rows = []
+    text_rows = []
+    for r in plant_rows:
+        completion = r['feedback_provided'] * 100.0 / r['total_records'] if r['total_records'] else 0
+        state, plant = html.escape(str(r['state'])), html.escape(str(r['plant_name']))
+        table_rows.append(f"""
+                <tr>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{state}</td>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{plant}</td>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right; color: #dc2626; font-weight: 600;">{r['pending_feedback']}</td>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{r['total_records']}</td>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{completion:.1f}%</td>
+                    <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{r['oldest_pending'] or '-'}</td>
+                </tr>""")
+        text_rows.append(f"{r['state']:<18} {r['plant_name']:<36} pending {r['pending_feedback']:>6} / {r['total_records']:<6} "
+                         f"oldest {r['oldest_pending'] or '-'}")
+
+    html_body = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Heritage Foods - Pending Fill Rate Feedback</title>
+    </head>
+    <body style="font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px; background-color: #f4f4f4;">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 25px; border-radius: 15px; margin-bottom: 20px;">
+            <h1 style="color: white; text-align: center; margin: 0; font-size: 24px;">Heritage Foods</h1>
+            <p style="color: white; text-align: center; margin: 8px 0 0 0; opacity: 0.9;">Pending Fill Rate Feedback</p>
+        </div>
+        <div style="background: white; padding: 30px; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.1);">
+            <p style="font-size: 16px;">
+                <strong>{total_pending}</strong> low fill rate records across <strong>{len(plant_rows)}</strong> plant(s)
+                are still waiting for a reason. Please update them on the dashboard.
+            </p>
+            <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
+                <tr style="background: #f8fafc;">
+                    <th style="padding: 8px; text-align: left;">State</th>
+                    <th style="padding: 8px; text-align: left;">Plant</th>
+                    <th style="padding: 8px; text-align: right;">Pending</th>
+                    <th style="padding: 8px; text-align: right;">Total</th>
+                    <th style="padding: 8px; text-align: right;">Completion</th>
+                    <th style="padding: 8px; text-align: left;">Oldest Pending</th>
+                </tr>{''.join(table_rows)}
+            </table>
+            <p style="text-align: center; margin-top: 25px;">
+                <a href="{DASHBOARD_URL}" style="background: #3b82f6; color: white; padding: 12px 24px; border-radius: 8px; text-decoration: none;">Open Dashboard</a>
+            </p>
+            <p style="font-size: 12px; color: #6b7280;">Generated: {generated} IST</p>
+        </div>
+        <div style="text-align: center; margin-top: 20px; color: #6b7280; font-size: 12px;">
+            <p>This is an automated email. Please do not reply.</p>
+        </div>
+    </body>
+    </html>
+    """
+
+    text = (f"Heritage Foods - Pending Fill Rate Feedback\n\n"
+            f"{total_pending} low fill rate records across {len(plant_rows)} plant(s) need a reason.\n\n"
+            + "\n".join(text_rows)
+            + f"\n\nDashboard: {DASHBOARD_URL}\nGenerated: {generated} IST\n")
+    return html_body, text
+
+
+def build_message(recipients, plant_rows):
+    """Build one digest message for a recipient list"""
+    html_body, text = render_digest(plant_rows)
+    total_pending = sum(r['pending_feedback'] for r in plant_rows)
+
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f"Heritage Foods - {total_pending} records pending fill rate feedback"
+    msg['From'] = EMAIL_CONFIG['email']
+    msg['To'] = ', '.join(recipients)
+    msg.attach(MIMEText(text, 'plain'))
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def send_batch(messages, config=EMAIL_CONFIG):
+    """Send all messages over one SMTP session, reconnecting once if it drops"""
+    sent = 0
+    failed = 0
+    session = open_smtp_session(config)
+    try:
+        for msg in messages:
+            try:
+                session.send_message(msg)
+                sent += 1
+            except Exception as e:
+                print(f"Digest send error for {msg['To']}: {e}, reconnecting")
+                try:
+                    session.quit()
+                except Exception:
+                    pass
+                try:
+                    session = open_smtp_session(config)
+                    session.send_message(msg)
+                    sent += 1
+                except Exception as retry_error:
+                    print(f"Digest send failed for {msg['To']}: {retry_error}")
+                    failed += 1
+    finally:
+        try:
+            session.quit()
+        except Exception:
+            pass
+    return sent, failed
+
+
+def run_digest(dry_run=False, out_dir=None, recipients_file=RECIPIENTS_FILE):
+    """Build and send one round of digest emails"""
+    started = time.time()
+    conn = data_routes.get_db_connection()
+    if not conn:
+        print("Digest aborted: database connection failed")
+        return None
+    try:
+        plant_rows = fetch_pending_by_plant(conn)
+    finally:
+        conn.close()
+
+    batches = group_by_recipients(plant_rows, load_recipients(recipients_file))
+    messages = [build_message(emails, rows) for emails, rows in batches.items()]
+
+    if dry_run:
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            for i, msg in enumerate(messages):
+                with open(os.path.join(out_dir, f"digest_{i:03d}.eml"), 'w') as f:
+                    f.write(msg.as_string())
+        sent, failed = 0, 0
+    else:
+        sent, failed = send_batch(messages) if messages else (0, 0)
+
+    summary = {
+        'plants': len(plant_rows),
+        'pending_records': sum(r['pending_feedback'] for r in plant_rows),
+        'emails': len(messages),
+        'sent': sent,
+        'failed': failed,
+        'dry_run': dry_run,
+        'seconds': round(time.time() - started, 2),
+    }
+    print(f"Digest run: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send pending fill rate feedback digests per plant')
+    parser.add_argument('--dry-run', action='store_true', help='build the emails without sending')
+    parser.add_argument('--out', help='with --dry-run, write the emails as .eml files here')
+    parser.add_argument('--recipients', default=RECIPIENTS_FILE, help='recipients mapping JSON file')
+    parser.add_argument('--interval-hours', type=float, help='keep running and send every N hours')
+    args = parser.parse_args()
+
+    while True:
+        try:
+            run_digest(dry_run=args.dry_run, out_dir=args.out, recipients_file=args.recipients)
+        except Exception as e:
+            print(f"Digest error: {e}")
+        if not args.interval_hours:
+            break
+        time.sleep(args.interval_hours * 3600)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Feedback summary statistics from one scan of fill_rate_feedback.
+
+/api/feedback-summary-stats reports the total, distinct users and counts by
+reason, by user and by state. Instead of one query each, a single grouped
+scan returns a count per (reason, user, normalized state) cell; there are
+only as many cells as distinct combinations, and every statistic is a
+rollup of them in Python. The result is cached until the feedback table's
+row count or max id changes, which one cheap probe query checks.
+
+    from feedback_summary import summary
+    stats = summary.get()   # same shape as the endpoint's JSON
+"""
+import threading
+from collections import Counter
+
+from routes import data_routes
+
+UNKNOWN_STATE = 'Unknown State'
+
+_STATE_SQL = f"""CASE WHEN state = '0' OR state = '' OR state IS NULL THEN '{UNKNOWN_STATE}' ELSE state END"""
+
+_CELLS_SQL = f"""
+SELECT reason, user_email, {_STATE_SQL} AS state, COUNT(*) AS count
+FROM fill_rate_feedback
+GROUP BY reason, user_email, {_STATE_SQL}
+"""
+
+_PROBE_SQL = "SELECT COUNT(*), MAX(id) FROM fill_rate_feedback"
+
+EMPTY = {'total_feedback': 0, 'unique_users': 0, 'reason_stats': [], 'user_stats': [], 'state_stats': []}
+
+
+def _ranked(counts, label):
+    """[{label: key, 'count': n}] by count descending (ties by key for a stable order)"""
+    items = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+    return [{label: key, 'count': count} for key, count in items]
+
+
+def summarize(cells):
+    """Endpoint payload from [(reason, user_email, state, count)] cells"""
+    reasons, users, states = Counter(), Counter(), Counter()
+    for reason, user_email, state, count in cells:
+        reasons[reason] += count
+        users[user_email] += count
+        states[state] += count
+    return {
+        'total_feedback': sum(users.values()),
+        'unique_users': sum(1 for user_email in users if user_email is not None),
+        'reason_stats': _ranked(reasons, 'reason'),
+        'user_stats': _ranked(users, 'user'),
+        'state_stats': _ranked(states, 'state'),
+    }
+
+
+class FeedbackSummary:
+    """Summary stats cached on the feedback table's (row count, max id)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._stats = None
+
+    def get(self):
+        """Current summary; raises ConnectionError if the database is unreachable"""
+        conn = data_routes.get_db_connection()
+        if not conn:
+            raise ConnectionError('Database connection failed')
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(_PROBE_SQL)
+                count, max_id = cursor.fetchone()
+            except Exception as table_error:
+                print(f"Feedback table doesn't exist yet: {table_error}")
+                return dict(EMPTY)
+
+            key = (int(count or 0), max_id)
+            with self._lock:
+                if key == self._key:
+                    return self._stats
+
+            cursor.execute(_CELLS_SQL)
+            stats = summarize((reason, user_email, state, int(n)) for reason, user_email, state, n in cursor.fetchall())
+            with self._lock:
+                self._key, self._stats = key, stats
+            return stats
+        finally:
+            conn.close()
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+
+
+summary = FeedbackSummary()
@@ -0,0 +1,281 @@
+"""Fill rate threshold and the per-bucket histogram behind the count endpoints.
+
+A record is actionable when its Fill_Rate_Percent is below the threshold.
+The threshold defaults to FILL_RATE_THRESHOLD (95) and any endpoint accepts
+?threshold= to override it for one request; queries bind it as a parameter.
+
+Counting endpoints (dashboard-stats, filter-options, plant stats) answer from
+FillRateHistogram instead of scanning zepto_automation. It keeps record
+counts per (state, plant, effective date, whole-percent bucket) and is
+rebuilt in one grouped scan when the zepto_automation data version changes
+(or, for loaders that don't bump the version, once it is older than
+HISTOGRAM_MAX_AGE_SECONDS);
+feedback rows are append-only, so new ones are folded in incrementally by id,
+at most every FEEDBACK_POLL_SECONDS unless a submission says there are some.
+Rebuilds run outside the lock and are swapped in, so readers keep counting
+from the previous cells meanwhile.
+A count for threshold T is then the sum of buckets below T. Thresholds that
+are not whole percentages fall back to the SQL queries.
+
+    from fill_rate import get_threshold, histogram
+    threshold = get_threshold()
+    counts = histogram.dashboard_counts(threshold)   # None -> use SQL
+"""
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from flask import abort, has_request_context, jsonify, request
+
+import data_version
+from routes import data_routes
+
+DEFAULT_THRESHOLD = float(os.environ.get('FILL_RATE_THRESHOLD', 95))
+# Rebuild even without a data version change after this long (catches writers that don't bump versions)
+HISTOGRAM_MAX_AGE_SECONDS = float(os.environ.get('FILL_RATE_HISTOGRAM_MAX_AGE_SECONDS', 600))
+# New feedback rows are folded in at most this often
+FEEDBACK_POLL_SECONDS = float(os.environ.get('FILL_RATE_FEEDBACK_POLL_SECONDS', 2))
+
+# Bucket -1 holds every negative fill rate, bucket 100 everything at or above 100%
+_BUCKET_SQL = """CASE WHEN {col} < 0 THEN -1 WHEN {col} >= 100 THEN 100
+                 ELSE CAST({col} AS INT) END"""
+
+_VALID = """{p}State IS NOT NULL AND {p}State != '' AND {p}State != '0'"""
+
+EFFECTIVE_DATE_SQL = """CASE WHEN z.Delivery_Date IS NOT NULL AND z.Delivery_Date != '1900-01-01'
+                 THEN CAST(z.Delivery_Date AS DATE)
+                 ELSE CAST(z.Processing_Date AS DATE) END"""
+
+_ZEPTO_CELLS_SQL = f"""
+SELECT z.State, z.Plant_Name, {EFFECTIVE_DATE_SQL} AS effective_date,
+       {_BUCKET_SQL.format(col='z.Fill_Rate_Percent')} AS bucket,
+       COUNT(*) AS records
+FROM zepto_automation z
+WHERE z.Fill_Rate_Percent IS NOT NULL
+AND {_VALID.format(p='z.')}
+GROUP BY z.State, z.Plant_Name, {EFFECTIVE_DATE_SQL},
+         {_BUCKET_SQL.format(col='z.Fill_Rate_Percent')}
+"""
+
+# Feedback rows newer than the watermark, with the cell of the record they answer
+# and the cell of the snapshot stored on the feedback row itself
+_NEW_FEEDBACK_SQL = f"""
+SELECT f.id, z.State, z.Plant_Name, {EFFECTIVE_DATE_SQL} AS effective_date,
+       {_BUCKET_SQL.format(col='z.Fill_Rate_Percent')} AS bucket,
+       f.state, f.plant_name, CAST(f.delivery_date AS DATE) AS feedback_date,
+       {_BUCKET_SQL.format(col='f.fill_rate_percent')} AS feedback_bucket
+FROM fill_rate_feedback f
+LEFT JOIN zepto_automation z ON z.ID = f.record_id
+WHERE f.id > ?
+ORDER BY f.id
+"""
+
+_UNKNOWN = ('Unknown Plant', 'Unknown State')
+
+
+def parse_threshold(value):
+    """Validate a threshold given as text; None/'' means the configured default"""
+    if value is None or str(value).strip() == '':
+        return DEFAULT_THRESHOLD
+    threshold = float(value)
+    if math.isnan(threshold) or not 0 <= threshold <= 100:
+        raise ValueError('threshold must be between 0 and 100')
+    return threshold
+
+
+def get_threshold():
+    """Threshold for the current request (?threshold=), else the configured default.
+
+    An invalid value ends the request with a JSON 400 like the other validation errors.
+    """
+    if not has_request_context():
+        return DEFAULT_THRESHOLD
+    try:
+        return parse_threshold(request.args.get('threshold'))
+    except ValueError:
+        response = jsonify({'error': 'threshold must be a number between 0 and 100'})
+        response.status_code = 400
+        abort(response)
+
+
+def _valid(value):
+    return value is not None and value != '' and value != '0'
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class FillRateHistogram:
+    """Record and feedback counts per (state, plant, date, bucket) for one data version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held by the one thread doing database I/O for a refresh
+        self._refresh_lock = threading.Lock()
+        self._version = None
+        self._built_at = 0.0
+        self._folded_at = 0.0
+        self._feedback_id = 0
+        # (state, plant or None, day) -> {bucket: [records, records_with_feedback]}
+        self._cells = {}
+        # (state, plant, day) -> {bucket: feedback rows}, keyed on the feedback row's own snapshot
+        self._feedback_cells = {}
+
+    @staticmethod
+    def usable(threshold):
+        return float(threshold).is_integer()
+
+    @staticmethod
+    def _build_cells(cursor):
+        cells = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+        cursor.execute(_ZEPTO_CELLS_SQL)
+        for state, plant, day, bucket, records in cursor.fetchall():
+            key = (state, plant if _valid(plant) else None, _day(day))
+            cells[key][int(bucket)][0] += int(records)
+        return cells
+
+    @staticmethod
+    def _fold_feedback(rows, cells, feedback_cells):
+        """Count feedback rows into the cells; returns the highest feedback id seen"""
+        last_id = 0
+        for (feedback_id, state, plant, day, bucket,
+             f_state, f_plant, f_day, f_bucket) in rows:
+            last_id = max(last_id, int(feedback_id))
+            if bucket is not None and _valid(state):
+                key = (state, plant if _valid(plant) else None, _day(day))
+                cells[key][int(bucket)][1] += 1
+            if (f_bucket is not None and _valid(f_state) and _valid(f_plant)
+                    and f_state not in _UNKNOWN and f_plant not in _UNKNOWN):
+                feedback_cells[(f_state, f_plant, _day(f_day))][int(f_bucket)] += 1
+        return last_id
+
+    def _stale(self, version):
+        return version != self._version or time.monotonic() - self._built_at > HISTOGRAM_MAX_AGE_SECONDS
+
+    def _current(self, version):
+        return not self._stale(version) and time.monotonic() - self._folded_at < FEEDBACK_POLL_SECONDS
+
+    def feedback_changed(self):
+        """Fold new feedback on the next read instead of waiting for the poll interval"""
+        with self._lock:
+            self._folded_at = 0.0
+
+    def refresh(self):
+        """Bring the histogram up to date; returns False if there is no histogram to serve (use SQL)"""
+        version = data_version.current_version('zepto_automation')
+        with self._lock:
+            if self._current(version):
+                return True
+            serving = self._version is not None
+        # Someone else is already refreshing: keep serving what we have
+        if not self._refresh_lock.acquire(blocking=False):
+            return serving
+        try:
+            return self._refresh(version)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, version):
+        """Database side of refresh(); only the swap and the incremental fold take the lock"""
+        with self._lock:
+            if self._current(version):
+                return True
+            rebuild = self._stale(version)
+        if not data_routes.ensure_feedback_table():
+            return False
+        conn = data_routes.get_db_connection()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            if rebuild:
+                built_at = time.monotonic()
+                cells = self._build_cells(cursor)
+                feedback_cells = defaultdict(lambda: defaultdict(int))
+                cursor.execute(_NEW_FEEDBACK_SQL, (0,))
+                feedback_id = self._fold_feedback(cursor.fetchall(), cells, feedback_cells)
+                with self._lock:
+                    self._cells, self._feedback_cells = cells, feedback_cells
+                    self._feedback_id = feedback_id
+                    self._version = version
+                    self._built_at = built_at
+                    self._folded_at = time.monotonic()
+            else:
+                # Only this thread advances _feedback_id, so it can be read without the lock
+                cursor.execute(_NEW_FEEDBACK_SQL, (self._feedback_id,))
+                rows = cursor.fetchall()
+                with self._lock:
+                    self._feedback_id = max(self._feedback_id,
+                                            self._fold_feedback(rows, self._cells, self._feedback_cells))
+                    self._folded_at = time.monotonic()
+            conn.commit()
+            return True
+        except Exception as e:
+            # Keep serving the histogram we have; the next read tries again
+            print(f"Fill rate histogram refresh error: {e}")
+            with self._lock:
+                return self._version is not None
+        finally:
+            conn.close()
+
+    def _below(self, threshold):
+        """Yield (key, records, with_feedback) for cells with records below threshold"""
+        limit = int(threshold)
+        for key, buckets in self._cells.items():
+            records = with_feedback = 0
+            for bucket, (count, answered) in buckets.items():
+                if bucket < limit:
+                    records += count
+                    with_feedback += answered
+            if records or with_feedback:
+                yield key, records, with_feedback
+
+    def dashboard_counts(self, threshold):
+        """(actionable records, with feedback) for valid state/plant, or None to use SQL"""
+        if not self.usable(threshold) or not self.refresh():
+            return None
+        low = answered = 0
+        with self._lock:
+            for (state, plant, _), records, with_feedback in self._below(threshold):
+                if plant is not None:
+                    low += records
+                    answered += with_feedback
+        return low, answered
+
+    def filter_counts(self, threshold):
+        """(states, {state: {plant: records}}) below threshold, or None to use SQL"""
+        if not self.usable(threshold) or not self.refresh():
+            return None
+        states = set()
+        plants = defaultdict(lambda: defaultdict(int))
+        with self._lock:
+            for (state, plant, _), records, _answered in self._below(threshold):
+                if records:
+                    states.add(state)
+                    if plant is not None:
+                        plants[state][plant] += records
+        return sorted(states), plants
+
+    def plant_date_counts(self, threshold):
+        """[(plant, state, date, total, feedback, pending)] excluding Unknown plant/state, or None to use SQL"""
+        if not self.usable(threshold) or not self.refresh():
+            return None
+        limit = int(threshold)
+        rows = []
+        with self._lock:
+            for (state, plant, day), records, _answered in self._below(threshold):
+                if plant is None or not records or state in _UNKNOWN or plant in _UNKNOWN:
+                    continue
+                feedback = sum(count for bucket, count in
+                               self._feedback_cells.get((state, plant, day), {}).items() if bucket < limit)
+                rows.append((plant, state, day, records, feedback, records - feedback))
+        rows.sort(key=lambda r: r[2] or date.min, reverse=True)
+        rows.sort(key=lambda r: (r[1], r[0]))
+        return rows
+
+
+histogram = FillRateHistogram()
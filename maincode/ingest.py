@@ -0,0 +1,267 @@
+"""Bulk ingestion of automation batches into zepto_automation.
+
+A batch file (CSV, Parquet or JSON lines) is read in chunks and streamed into
+zepto_automation_staging with fast_executemany, tagged with a batch id. One
+MERGE then upserts the batch into zepto_automation keyed on PO_No/Material
+(the last row wins when a batch repeats a key), the staging rows are removed
+and the zepto_automation data version is bumped in the same transaction, so
+caches polling data_versions see exactly one change per batch.
+
+    python ingest.py batch.csv
+    python ingest.py batch.parquet --source sap-export
+Or POST the file to /api/ingest/zepto-automation (see routes/ingest_routes.py).
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+import data_version
+from routes import data_routes
+
+STAGING_TABLE = 'zepto_automation_staging'
+CHUNK_ROWS = 50000
+INSERT_BATCH_ROWS = 10000
+
+# Columns accepted from a batch (matched case-insensitively); PO_No and Material are required
+INGEST_COLUMNS = [
+    'PO_No', 'Material_Description', 'Material', 'PO_Date', 'Delivery_Date', 'UOM',
+    'PO_Quantity_Liters', 'Sales_Quantity_Matched', 'Fill_Rate_Percent', 'State', 'Plant_Name',
+    'Sales_District', 'Cust_Group', 'Processing_Date',
+]
+KEY_COLUMNS = ['PO_No', 'Material']
+DATE_COLUMNS = ['PO_Date', 'Delivery_Date']
+NUMERIC_COLUMNS = ['PO_Quantity_Liters', 'Sales_Quantity_Matched', 'Fill_Rate_Percent']
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.jsonl': 'jsonl', '.ndjson': 'jsonl',
+           '.json': 'jsonl'}
+
+STAGING_DDL = f"""
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{STAGING_TABLE}' AND xtype='U')
+CREATE TABLE {STAGING_TABLE} (
+    Staging_ID BIGINT IDENTITY(1,1) PRIMARY KEY,
+    Batch_ID NVARCHAR(50) NOT NULL,
+    PO_No NVARCHAR(50),
+    Material_Description NVARCHAR(255),
+    Material NVARCHAR(50),
+    PO_Date DATE,
+    Delivery_Date DATE,
+    UOM NVARCHAR(10),
+    PO_Quantity_Liters DECIMAL(18,3),
+    Sales_Quantity_Matched DECIMAL(18,3),
+    Fill_Rate_Percent DECIMAL(9,2),
+    State NVARCHAR(100),
+    Plant_Name NVARCHAR(255),
+    Sales_District NVARCHAR(100),
+    Cust_Group NVARCHAR(100),
+    Processing_Date DATETIME
+)
+"""
+
+STAGING_INSERT = (f"INSERT INTO {STAGING_TABLE} (Batch_ID, {', '.join(INGEST_COLUMNS)}) "
+                  f"VALUES (?, {', '.join('?' for _ in INGEST_COLUMNS)})")
+
+_UPDATABLE = [c for c in INGEST_COLUMNS if c not in KEY_COLUMNS]
+
+MERGE_SQL = f"""
+SET NOCOUNT ON;
+DECLARE @actions TABLE (action NVARCHAR(10));
+MERGE zepto_automation WITH (HOLDLOCK) AS t
+USING (
+    SELECT * FROM (
+        SELECT s.*, ROW_NUMBER() OVER (PARTITION BY s.PO_No, s.Material ORDER BY s.Staging_ID DESC) AS rn
+        FROM {STAGING_TABLE} s
+        WHERE s.Batch_ID = ?
+    ) d
+    WHERE d.rn = 1
+) AS s
+ON t.PO_No = s.PO_No AND t.Material = s.Material
+WHEN MATCHED THEN UPDATE SET
+    {', '.join(f't.{c} = COALESCE(s.{c}, t.{c})' for c in _UPDATABLE if c != 'Processing_Date')},
+    t.Processing_Date = COALESCE(s.Processing_Date, GETDATE())
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT ({', '.join(INGEST_COLUMNS)})
+    VALUES ({', '.join(f's.{c}' for c in INGEST_COLUMNS if c != 'Processing_Date')}, COALESCE(s.Processing_Date, GETDATE()))
+OUTPUT $action INTO @actions;
+SELECT COALESCE(SUM(CASE WHEN action = 'INSERT' THEN 1 ELSE 0 END), 0),
+       COALESCE(SUM(CASE WHEN action = 'UPDATE' THEN 1 ELSE 0 END), 0)
+FROM @actions;
+"""
+
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in set(FORMATS.values()):
+            raise ValueError(f"Unsupported format '{fmt}' (use csv, parquet or jsonl)")
+        return fmt
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Cannot tell the format of '{filename}'; pass format=csv|parquet|jsonl")
+    return FORMATS[ext]
+
+
+def read_chunks(path, fmt, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows without loading the whole file"""
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[''])
+    elif fmt == 'jsonl':
+        yield from _read_jsonl(path, chunk_rows)
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            yield pd.read_parquet(path)
+            return
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def _read_jsonl(path, chunk_rows):
+    """JSON lines with numbers kept as their source text, like the CSV reader's dtype=str.
+
+    Parsing them first would turn PO_No 123 into 123.0 (and then '123.0') as soon
+    as a chunk has a missing value; NUMERIC_COLUMNS are converted in normalize().
+    """
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            records.append(json.loads(line, parse_int=str, parse_float=str))
+            if len(records) >= chunk_rows:
+                yield pd.DataFrame.from_records(records)
+                records = []
+    if records:
+        yield pd.DataFrame.from_records(records)
+
+
+def normalize(df):
+    """Map a chunk onto INGEST_COLUMNS and return staging parameter tuples"""
+    by_lower = {str(c).strip().lower(): c for c in df.columns}
+    missing = [c for c in KEY_COLUMNS if c.lower() not in by_lower]
+    if missing:
+        raise ValueError(f"Batch is missing required column(s): {', '.join(missing)}")
+
+    out = pd.DataFrame(index=df.index)
+    for column in INGEST_COLUMNS:
+        source = by_lower.get(column.lower())
+        out[column] = df[source] if source is not None else None
+
+    for column in KEY_COLUMNS:
+        out[column] = out[column].astype(str).str.strip()
+        out.loc[out[column].isin(['', 'nan', 'None']), column] = None
+    if out[KEY_COLUMNS].isna().any(axis=None):
+        raise ValueError("PO_No and Material must be present on every row")
+
+    for column in DATE_COLUMNS:
+        out[column] = pd.to_datetime(out[column], errors='coerce').dt.strftime('%Y-%m-%d')
+    out['Processing_Date'] = pd.to_datetime(out['Processing_Date'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+    for column in NUMERIC_COLUMNS:
+        out[column] = pd.to_numeric(out[column], errors='coerce')
+
+    out = out.astype(object).where(out.notna(), None)
+    return list(out.itertuples(index=False, name=None))
+
+
+_staging_ready = False
+
+
+def ensure_staging_table():
+    """Run the staging table DDL once per process; returns False if the database is unreachable"""
+    global _staging_ready
+    if _staging_ready:
+        return True
+    conn = data_routes.get_db_connection()
+    if not conn:
+        return False
+    try:
+        conn.cursor().execute(STAGING_DDL)
+        conn.commit()
+        _staging_ready = True
+        return True
+    finally:
+        conn.close()
+
+
+def _stage(conn, path, fmt, batch_id, chunk_rows):
+    ensure_staging_table()
+    cursor = conn.cursor()
+    cursor.fast_executemany = True
+    staged = 0
+    for chunk in read_chunks(path, fmt, chunk_rows):
+        rows = [(batch_id,) + row for row in normalize(chunk)]
+        for i in range(0, len(rows), INSERT_BATCH_ROWS):
+            cursor.executemany(STAGING_INSERT, rows[i:i + INSERT_BATCH_ROWS])
+        conn.commit()
+        staged += len(rows)
+    return staged
+
+
+def _discard(conn, batch_id):
+    try:
+        conn.rollback()
+        conn.cursor().execute(f"DELETE FROM {STAGING_TABLE} WHERE Batch_ID = ?", (batch_id,))
+        conn.commit()
+    except Exception as e:
+        print(f"Could not clear staging rows of batch {batch_id}: {e}")
+
+
+def ingest_file(conn, path, fmt=None, source=None, chunk_rows=CHUNK_ROWS):
+    """Stage, merge and version one batch file; returns the batch summary"""
+    fmt = detect_format(path, fmt)
+    batch_id = datetime.now().strftime('%Y%m%d%H%M%S-') + uuid.uuid4().hex[:8]
+    started = time.time()
+    try:
+        staged = _stage(conn, path, fmt, batch_id, chunk_rows)
+        stage_seconds = time.time() - started
+
+        cursor = conn.cursor()
+        cursor.execute(MERGE_SQL, (batch_id,))
+        inserted, updated = cursor.fetchone()
+        cursor.execute(f"DELETE FROM {STAGING_TABLE} WHERE Batch_ID = ?", (batch_id,))
+        version = data_version.bump(cursor, 'zepto_automation', batch_id)
+        conn.commit()
+    except Exception:
+        _discard(conn, batch_id)
+        raise
+
+    data_version.poller.invalidate()
+    summary = {
+        'batch_id': batch_id,
+        'source': source,
+        'format': fmt,
+        'rows_received': staged,
+        'inserted': int(inserted or 0),
+        'updated': int(updated or 0),
+        'data_version': version,
+        'stage_seconds': round(stage_seconds, 2),
+        'seconds': round(time.time() - started, 2),
+    }
+    print(f"Ingested batch: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk load a batch file into zepto_automation')
+    parser.add_argument('path', help='CSV, Parquet or JSON lines file')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'jsonl'], help='override the file extension')
+    parser.add_argument('--source', help='label recorded in the summary (e.g. the exporting system)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    conn = data_routes.get_db_connection()
+    if not conn:
+        print("Ingestion aborted: database connection failed")
+        return None
+    try:
+        return ingest_file(conn, args.path, args.format, args.source, args.chunk_rows)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Outgoing mail settings, shared by the OTP mails (auth.py) and the digest (digest.py).
+
+Kept free of side effects so scripts can import it without starting the
+app's mail dispatcher or auth store threads.
+"""
+import os
+
+EMAIL_CONFIG = {
+    'smtp_server': 'smtp.gmail.com',
+    'smtp_port': 587,
+    'email': 'saisridhar.k@heritagefoods.in',
+    'password': 'iyau hnuf ilav wses',  # App password
+    'use_tls': True,
+    'backend': os.environ.get('MAIL_BACKEND', 'smtp')  # 'local' keeps mail in memory for tests
+}
@@ -0,0 +1,206 @@
+"""Background mail dispatch over kept-alive SMTP sessions.
+
+submit() queues a message and returns immediately with a delivery id; worker
+threads send it over a small pool of authenticated SMTP sessions, reconnecting
+when the server drops them and retrying with exponential backoff. Delivery
+status for recent messages can be looked up by id.
+
+Setting config['backend'] = 'local' swaps SMTP for an in-memory mailbox, for
+tests and load runs that must not send real mail.
+"""
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+def open_smtp_session(config):
+    """Open an SMTP session (STARTTLS and login when configured)"""
+    if config.get('backend') == 'local':
+        return LocalMailbox.shared()
+    server = smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=config.get('timeout', 30))
+    if config.get('use_tls', True):
+        server.starttls()
+    if config.get('password'):
+        server.login(config['email'], config['password'])
+    return server
+
+
+class LocalMailbox:
+    """In-memory SMTP stand-in that records every message it is given"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = []
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def send_message(self, msg):
+        with self._lock:
+            self.messages.append(msg)
+        return {}
+
+    def noop(self):
+        return (250, b'OK')
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SMTPSessionPool:
+    """Pool of authenticated SMTP sessions reused across messages"""
+
+    def __init__(self, config, size=2, idle_check_seconds=30):
+        self.config = config
+        self.idle_check_seconds = idle_check_seconds
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Return a live session, reconnecting if an idle one has gone stale"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    session, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return open_smtp_session(self.config)
+                if time.time() - last_used < self.idle_check_seconds:
+                    return session
+                try:
+                    if session.noop()[0] == 250:
+                        return session
+                except Exception:
+                    pass
+                self._close(session)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, session, broken=False):
+        """Return a session to the pool, or drop it if the send failed"""
+        if broken:
+            self._close(session)
+        else:
+            self._idle.put((session, time.time()))
+        self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                session, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(session)
+
+    @staticmethod
+    def _close(session):
+        try:
+            session.quit()
+        except Exception:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+class MailDispatcher:
+    """Queue of outgoing messages drained by background workers"""
+
+    def __init__(self, config, workers=2, pool_size=2, max_retries=3, backoff_seconds=2.0,
+                 max_queue=1000, status_history=10000):
+        self.config = config
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.status_history = status_history
+        self.pool = SMTPSessionPool(config, size=pool_size)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"mail-dispatch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, msg):
+        """Queue a message; returns its delivery id, or None if the queue is full"""
+        self.start()
+        message_id = uuid.uuid4().hex
+        self._set_status(message_id, 'queued', attempts=0)
+        try:
+            self._queue.put_nowait((message_id, msg, 0))
+        except queue.Full:
+            self._set_status(message_id, 'failed', error='Mail queue is full')
+            return None
+        return message_id
+
+    def get_status(self, message_id):
+        with self._lock:
+            status = self._status.get(message_id)
+            return dict(status) if status else None
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _set_status(self, message_id, status, **fields):
+        with self._lock:
+            entry = self._status.pop(message_id, {})
+            entry.update(fields, status=status, updated_at=time.time())
+            self._status[message_id] = entry
+            while len(self._status) > self.status_history:
+                self._status.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            message_id, msg, attempt = self._queue.get()
+            try:
+                self._deliver(message_id, msg, attempt)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, message_id, msg, attempt):
+        self._set_status(message_id, 'sending', attempts=attempt + 1)
+        session = None
+        try:
+            session = self.pool.acquire()
+            session.send_message(msg)
+            self.pool.release(session)
+            self._set_status(message_id, 'sent', error=None)
+        except Exception as e:
+            if session is not None:
+                self.pool.release(session, broken=True)
+            print(f"Email sending error ({message_id}, attempt {attempt + 1}): {e}")
+            if attempt + 1 >= self.max_retries:
+                self._set_status(message_id, 'failed', error=str(e))
+                return
+            self._set_status(message_id, 'retrying', error=str(e))
+            delay = self.backoff_seconds * (2 ** attempt)
+            timer = threading.Timer(delay, self._requeue, args=(message_id, msg, attempt + 1))
+            timer.daemon = True
+            timer.start()
+
+    def _requeue(self, message_id, msg, attempt):
+        try:
+            self._queue.put_nowait((message_id, msg, attempt))
+        except queue.Full:
+            self._set_status(message_id, 'failed', error='Mail queue is full')
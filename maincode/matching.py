@@ -0,0 +1,284 @@
+"""PO-to-sales matching and fill rate computation.
+
+PO lines (zepto_automation) are matched to sales invoice lines on
+PO_No/Material. Sales count towards a PO when the invoice date falls between
+PO_Date - BEFORE_DAYS and Delivery_Date (or PO_Date when missing) +
+AFTER_DAYS. When a PO repeats a material on several lines, the matched
+quantity is allocated to them oldest first. Everything is done with pandas
+joins and grouped NumPy arithmetic, no per-row Python loops.
+
+Sales_Quantity_Matched is loaded upstream with the automation batches, so
+this module only owns the PO_No/Material groups that have lines in
+SALES_TABLE; every other row keeps its loaded values. Lines with neither a
+PO_Date nor a Delivery_Date have no window and are left alone too. Runs
+refuse to write while SALES_TABLE is empty.
+
+Incremental runs only recompute POs that received sales lines since the last
+watermark; results are written back in bulk and only for rows whose values
+changed, and the zepto_automation data version is bumped when any did.
+Nothing is written without --write.
+
+    python matching.py                 # incremental dry run, from the stored watermark
+    python matching.py --full --write  # recompute every PO line and write the changes
+    python matching.py --po 4500012345 4500012346 --write
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_version
+from routes import data_routes
+
+SALES_TABLE = os.environ.get('MATCH_SALES_TABLE', 'sales_invoice_lines')
+BEFORE_DAYS = int(os.environ.get('MATCH_BEFORE_DAYS', 1))
+AFTER_DAYS = int(os.environ.get('MATCH_AFTER_DAYS', 7))
+WRITE_BATCH_SIZE = 5000
+KEY_CHUNK_SIZE = 500
+SENTINEL_DATE = pd.Timestamp('1900-01-01')
+
+SALES_DDL = f"""
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{SALES_TABLE}' AND xtype='U')
+CREATE TABLE {SALES_TABLE} (
+    ID INT IDENTITY(1,1) PRIMARY KEY,
+    Invoice_No NVARCHAR(50),
+    Invoice_Date DATE,
+    PO_No NVARCHAR(50),
+    Material NVARCHAR(50),
+    Billed_Quantity_Liters DECIMAL(18,3),
+    Loaded_At DATETIME DEFAULT GETDATE()
+)
+"""
+
+WATERMARK_DDL = """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='fill_rate_match_state' AND xtype='U')
+CREATE TABLE fill_rate_match_state (
+    name NVARCHAR(50) PRIMARY KEY,
+    last_sales_id INT NOT NULL,
+    updated_at DATETIME DEFAULT GETDATE()
+)
+"""
+
+PO_COLUMNS = ['ID', 'PO_No', 'Material', 'PO_Date', 'Delivery_Date', 'PO_Quantity_Liters',
+              'Sales_Quantity_Matched', 'Fill_Rate_Percent']
+SALES_COLUMNS = ['PO_No', 'Material', 'Invoice_Date', 'Billed_Quantity_Liters']
+
+
+def _dates(series):
+    values = pd.to_datetime(series, errors='coerce')
+    return values.where(values > SENTINEL_DATE)
+
+
+def match(po_lines, sales_lines, before_days=BEFORE_DAYS, after_days=AFTER_DAYS):
+    """Matched quantity and fill rate per PO line.
+
+    po_lines needs PO_COLUMNS (the last two are only used to detect changes),
+    sales_lines needs SALES_COLUMNS. Returns po_lines with new_matched and
+    new_fill_rate columns, NaN for lines without a usable date window.
+    """
+    po = po_lines.copy()
+    po['PO_No'] = po['PO_No'].astype(str)
+    po['Material'] = po['Material'].astype(str)
+    po_date = _dates(po['PO_Date'])
+    due_date = _dates(po['Delivery_Date']).fillna(po_date)
+    po['window_start'] = po_date - pd.Timedelta(days=before_days)
+    po['window_end'] = due_date + pd.Timedelta(days=after_days)
+    usable = (po['window_start'].notna() & po['window_end'].notna()).to_numpy()
+    # Lines without a window take no share of their group's sales
+    po_qty = np.where(usable, pd.to_numeric(po['PO_Quantity_Liters'], errors='coerce').fillna(0).to_numpy(), 0.0)
+
+    # one window per PO_No/Material group covering all of its lines
+    keys = ['PO_No', 'Material']
+    groups = po.groupby(keys, sort=False).agg(window_start=('window_start', 'min'),
+                                              window_end=('window_end', 'max')).reset_index()
+
+    sales = sales_lines[SALES_COLUMNS].copy()
+    sales['PO_No'] = sales['PO_No'].astype(str)
+    sales['Material'] = sales['Material'].astype(str)
+    sales['Invoice_Date'] = _dates(sales['Invoice_Date'])
+    sales['Billed_Quantity_Liters'] = pd.to_numeric(sales['Billed_Quantity_Liters'], errors='coerce').fillna(0)
+
+    joined = groups.merge(sales, on=keys, how='inner')
+    in_window = ((joined['Invoice_Date'] >= joined['window_start'])
+                 & (joined['Invoice_Date'] <= joined['window_end']))
+    billed = joined[in_window].groupby(keys, sort=False)['Billed_Quantity_Liters'].sum()
+    billed.name = 'group_billed'
+
+    po = po.merge(billed, left_on=keys, right_index=True, how='left')
+    po['group_billed'] = po['group_billed'].fillna(0)
+    po['_order_date'] = po_date.fillna(pd.Timestamp.max)
+    po['_qty'] = po_qty
+    po['_usable'] = usable
+    po = po.sort_values(keys + ['_order_date', 'ID'], kind='stable')
+
+    # FIFO allocation: each line gets what is left after the earlier lines of its group
+    cum_qty = po.groupby(keys, sort=False)['_qty'].cumsum().to_numpy()
+    earlier = cum_qty - po['_qty'].to_numpy()
+    allocated = np.clip(po['group_billed'].to_numpy() - earlier, 0, po['_qty'].to_numpy())
+
+    po['new_matched'] = np.round(allocated, 3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fill_rate = np.where(po['_qty'].to_numpy() > 0, allocated / po['_qty'].to_numpy() * 100, 0.0)
+    po['new_fill_rate'] = np.round(fill_rate, 2)
+    po.loc[~po['_usable'], ['new_matched', 'new_fill_rate']] = np.nan
+    return po.drop(columns=['window_start', 'window_end', 'group_billed', '_order_date', '_qty',
+                            '_usable']).sort_index()
+
+
+def owned_rows(result, sales_lines):
+    """Rows whose PO_No/Material has lines in SALES_TABLE; the rest keep their upstream values"""
+    if not len(result) or not len(sales_lines):
+        return result.iloc[0:0]
+    keys = pd.MultiIndex.from_arrays([sales_lines['PO_No'].astype(str), sales_lines['Material'].astype(str)])
+    return result[pd.MultiIndex.from_arrays([result['PO_No'], result['Material']]).isin(keys)]
+
+
+def changed_rows(result):
+    """Rows whose stored matched quantity or fill rate differ from the new values (lines without a window never do)"""
+    old_matched = pd.to_numeric(result['Sales_Quantity_Matched'], errors='coerce').to_numpy()
+    old_rate = pd.to_numeric(result['Fill_Rate_Percent'], errors='coerce').to_numpy()
+    differs = ~(np.isclose(old_matched, result['new_matched'].to_numpy(), atol=0.0005)
+                & np.isclose(old_rate, result['new_fill_rate'].to_numpy(), atol=0.005))
+    return result[differs & result['new_matched'].notna().to_numpy()]
+
+
+def ensure_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute(SALES_DDL)
+    cursor.execute(WATERMARK_DDL)
+    conn.commit()
+
+
+def _read(conn, query, params, columns):
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return pd.DataFrame.from_records([tuple(r) for r in cursor.fetchall()], columns=columns)
+
+
+def _read_by_po(conn, table, columns, po_numbers):
+    """Rows of table for the given PO numbers, in IN-list chunks"""
+    frames = []
+    po_numbers = sorted(set(po_numbers))
+    for i in range(0, len(po_numbers), KEY_CHUNK_SIZE):
+        chunk = po_numbers[i:i + KEY_CHUNK_SIZE]
+        placeholders = ', '.join('?' for _ in chunk)
+        frames.append(_read(conn, f"SELECT {', '.join(columns)} FROM {table} WHERE PO_No IN ({placeholders})",
+                            chunk, columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_watermark(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT last_sales_id FROM fill_rate_match_state WHERE name = 'sales'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def save_watermark(conn, last_sales_id):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE fill_rate_match_state SET last_sales_id = ?, updated_at = GETDATE() WHERE name = 'sales'",
+                   (last_sales_id,))
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO fill_rate_match_state (name, last_sales_id) VALUES ('sales', ?)",
+                       (last_sales_id,))
+
+
+def write_back(conn, rows, batch_size=WRITE_BATCH_SIZE):
+    """Bulk UPDATE of matched quantity and fill rate by ID"""
+    params = list(zip(rows['new_matched'].astype(float), rows['new_fill_rate'].astype(float),
+                      rows['ID'].astype(int)))
+    cursor = conn.cursor()
+    cursor.fast_executemany = True
+    for i in range(0, len(params), batch_size):
+        cursor.executemany("UPDATE zepto_automation SET Sales_Quantity_Matched = ?, Fill_Rate_Percent = ? "
+                           "WHERE ID = ?", params[i:i + batch_size])
+    return len(params)
+
+
+def recompute(conn, full=False, po_numbers=None, write=False):
+    """Recompute fill rates for all, given, or newly invoiced POs; returns run stats.
+
+    Only writes when write=True and SALES_TABLE has rows.
+    """
+    started = time.time()
+    ensure_tables(conn)
+    last_sales_id = load_watermark(conn)
+    max_sales_id = _read(conn, f"SELECT MAX(ID) FROM {SALES_TABLE}", (), ['max_id'])['max_id'].iloc[0]
+    max_sales_id = int(max_sales_id) if max_sales_id is not None and not pd.isna(max_sales_id) else 0
+
+    if full:
+        po_lines = _read(conn, f"SELECT {', '.join(PO_COLUMNS)} FROM zepto_automation", (), PO_COLUMNS)
+        sales = _read(conn, f"SELECT {', '.join(SALES_COLUMNS)} FROM {SALES_TABLE}", (), SALES_COLUMNS)
+        mode = 'full'
+    else:
+        if po_numbers is None:
+            affected = _read(conn, f"SELECT DISTINCT PO_No FROM {SALES_TABLE} WHERE ID > ? AND ID <= ?",
+                             (last_sales_id, max_sales_id), ['PO_No'])
+            po_numbers = affected['PO_No'].dropna().astype(str).tolist()
+            mode = 'incremental'
+        else:
+            mode = 'po'
+        po_lines = _read_by_po(conn, 'zepto_automation', PO_COLUMNS, po_numbers)
+        sales = _read_by_po(conn, SALES_TABLE, SALES_COLUMNS, po_numbers)
+
+    read_seconds = time.time() - started
+    result = match(po_lines, sales) if len(po_lines) else po_lines.assign(new_matched=[], new_fill_rate=[])
+    changed = changed_rows(owned_rows(result, sales))
+    match_seconds = time.time() - started - read_seconds
+
+    written = 0
+    skipped = None
+    if write and not max_sales_id:
+        skipped = f'{SALES_TABLE} is empty'
+        print(f"Fill rate recompute: not writing, {skipped}")
+    elif write:
+        written = write_back(conn, changed)
+        if mode != 'po':
+            save_watermark(conn, max_sales_id)
+        if written:
+            data_version.bump(conn.cursor(), 'zepto_automation', f'match-{mode}')
+        conn.commit()
+        if written:
+            data_version.poller.invalidate()
+
+    return {
+        'mode': mode,
+        'po_numbers': len(set(po_lines['PO_No'])) if len(po_lines) else 0,
+        'po_lines': len(po_lines),
+        'sales_lines': len(sales),
+        'changed_lines': len(changed),
+        'written': written,
+        'sales_watermark': max_sales_id if mode != 'po' else last_sales_id,
+        'read_seconds': round(read_seconds, 2),
+        'match_seconds': round(match_seconds, 2),
+        'seconds': round(time.time() - started, 2),
+        'dry_run': not write or skipped is not None,
+        'skipped': skipped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match PO lines to sales and recompute fill rates')
+    parser.add_argument('--full', action='store_true', help='recompute every PO line')
+    parser.add_argument('--po', nargs='+', help='recompute only these PO numbers')
+    parser.add_argument('--write', action='store_true', help='write changed rows (default: report only)')
+    args = parser.parse_args()
+
+    conn = data_routes.get_db_connection()
+    if not conn:
+        print("Matching aborted: database connection failed")
+        return None
+    try:
+        stats = recompute(conn, full=args.full, po_numbers=args.po, write=args.write)
+    finally:
+        conn.close()
+    print(f"Fill rate recompute: {stats}")
+    return stats
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""Schema migrations, run explicitly rather than from a request or an ingest.
+
+Adds the persisted Effective_Date column and its index to zepto_automation
+(see query_filters.py). Both steps are idempotent, so re-running is safe.
+Until this has run, the listing and export queries compute the effective
+date inline.
+
+    python migrate.py
+"""
+import query_filters
+from routes import data_routes
+
+
+def main():
+    conn = data_routes.get_db_connection()
+    if not conn:
+        print("Migration aborted: database connection failed")
+        return False
+    try:
+        ok = query_filters.add_effective_date_column(conn)
+    finally:
+        conn.close()
+    print(f"Effective_Date column and index: {'ok' if ok else 'failed'}")
+    return ok
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""PO mail ingestion: incremental IMAP fetch of customer PO attachments."""
@@ -0,0 +1,268 @@
+"""IMAP FETCH response parsing, BODYSTRUCTURE walking and streaming decode.
+
+Used by the attachment-only fetch mode: the server is asked for BODYSTRUCTURE
+first, only the PDF parts are then fetched by section number, and their
+transfer encoding is decoded chunk by chunk straight into a file.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import quopri
+import re
+from email.utils import decode_rfc2231
+from urllib.parse import unquote
+
+_LITERAL_RE = re.compile(rb'\{(\d+)\}$')
+_DELIMS = b' ()'
+
+
+class Literal(bytes):
+    """Marks a value that arrived as an IMAP literal (or quoted string)"""
+
+
+def _tokenize(text, tokens):
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i:i + 1]
+        if c in (b' ', b'\r', b'\n'):
+            i += 1
+        elif c == b'(':
+            tokens.append('(')
+            i += 1
+        elif c == b')':
+            tokens.append(')')
+            i += 1
+        elif c == b'"':
+            i += 1
+            buf = bytearray()
+            while i < n and text[i:i + 1] != b'"':
+                if text[i:i + 1] == b'\\':
+                    i += 1
+                buf += text[i:i + 1]
+                i += 1
+            tokens.append(Literal(bytes(buf)))
+            i += 1
+        else:
+            start = i
+            depth = 0
+            # section specs like BODY[HEADER.FIELDS (SUBJECT)] contain spaces and parens
+            while i < n and (depth or text[i:i + 1] not in _DELIMS + b'\r\n'):
+                if text[i:i + 1] == b'[':
+                    depth += 1
+                elif text[i:i + 1] == b']':
+                    depth -= 1
+                i += 1
+            atom = text[start:i].decode('ascii', 'replace')
+            tokens.append(None if atom.upper() == 'NIL' else atom)
+
+
+def tokenize_response(data):
+    """Flatten imaplib FETCH data (bytes and (text, literal) tuples) into tokens"""
+    tokens = []
+    for item in data:
+        if isinstance(item, tuple):
+            text, literal = item
+            match = _LITERAL_RE.search(text)
+            _tokenize(text[:match.start()] if match else text, tokens)
+            tokens.append(Literal(literal))
+        elif item:
+            _tokenize(item, tokens)
+    return tokens
+
+
+def _build(tokens, pos):
+    items = []
+    while pos < len(tokens):
+        token = tokens[pos]
+        if token == '(':
+            value, pos = _build(tokens, pos + 1)
+            items.append(value)
+        elif token == ')':
+            return items, pos + 1
+        else:
+            items.append(token)
+            pos += 1
+    return items, pos
+
+
+def parse_fetch_response(data):
+    """Return {uid: {ITEM: value}} for a UID FETCH response"""
+    tree, _ = _build(tokenize_response(data), 0)
+    messages = {}
+    i = 0
+    while i < len(tree):
+        # each response is "<seq> (KEY value KEY value ...)"
+        if isinstance(tree[i], str) and i + 1 < len(tree) and isinstance(tree[i + 1], list):
+            pairs = tree[i + 1]
+            items = {}
+            for k in range(0, len(pairs) - 1, 2):
+                if isinstance(pairs[k], str):
+                    items[pairs[k].upper()] = pairs[k + 1]
+            if 'UID' in items:
+                messages.setdefault(int(items['UID']), {}).update(items)
+            i += 2
+        else:
+            i += 1
+    return messages
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def _params(value):
+    """BODYSTRUCTURE parameter list -> lowercase-keyed dict"""
+    params = {}
+    if isinstance(value, list):
+        for k in range(0, len(value) - 1, 2):
+            params[_text(value[k]).lower()] = _text(value[k + 1])
+    return params
+
+
+def _filename(params, disposition_params):
+    for source in (disposition_params, params):
+        if 'filename*' in source:
+            # charset'language'percent-encoded-value (RFC 2231)
+            charset, _, value = decode_rfc2231(source['filename*'])
+            try:
+                return unquote(value, encoding=charset or 'utf-8', errors='replace')
+            except LookupError:
+                return unquote(value, errors='replace')
+        for key in ('filename', 'name'):
+            if source.get(key):
+                return source[key]
+    return ''
+
+
+def iter_parts(structure, prefix=''):
+    """Yield leaf part descriptions with their IMAP section numbers"""
+    if not isinstance(structure, list) or not structure:
+        return
+    if isinstance(structure[0], list):
+        # child parts come first, then the subtype and the extension data
+        children = []
+        for item in structure:
+            if not isinstance(item, list):
+                break
+            children.append(item)
+        for index, child in enumerate(children, 1):
+            yield from iter_parts(child, f"{prefix}.{index}" if prefix else str(index))
+        return
+
+    section = prefix or '1'
+    maintype = _text(structure[0]).lower()
+    subtype = _text(structure[1]).lower()
+    params = _params(structure[2])
+    encoding = _text(structure[5]).lower() or '7bit'
+    size = int(structure[6]) if structure[6] is not None else 0
+
+    if maintype == 'message' and subtype == 'rfc822' and len(structure) > 8:
+        body = structure[8]
+        # the parts of a multipart body are <section>.1, .2, ...; a single-part body is <section>.1
+        multipart = isinstance(body, list) and bool(body) and isinstance(body[0], list)
+        yield from iter_parts(body, section if multipart else f"{section}.1")
+        return
+
+    # text/* carries a line count, message/rfc822 an envelope/body/lines, before the extension data
+    ext = 8 if maintype == 'text' else 7
+    disposition = structure[ext + 1] if len(structure) > ext + 1 else None
+    disposition_type = ''
+    disposition_params = {}
+    if isinstance(disposition, list) and disposition:
+        disposition_type = _text(disposition[0]).lower()
+        disposition_params = _params(disposition[1] if len(disposition) > 1 else None)
+
+    yield {
+        'section': section,
+        'content_type': f"{maintype}/{subtype}",
+        'encoding': encoding,
+        'size': size,
+        'filename': _filename(params, disposition_params),
+        'disposition': disposition_type,
+    }
+
+
+def pdf_parts(structure):
+    """Leaf parts that are PDFs by content type or filename"""
+    return [part for part in iter_parts(structure)
+            if part['content_type'] == 'application/pdf' or part['filename'].lower().endswith('.pdf')]
+
+
+class StreamDecoder:
+    """Decode a Content-Transfer-Encoding incrementally into a binary file"""
+
+    def __init__(self, fp, encoding):
+        self.fp = fp
+        self.encoding = (encoding or '7bit').lower()
+        self._pending = b''
+        self.written = 0
+
+    def _write(self, data):
+        if data:
+            self.fp.write(data)
+            self.written += len(data)
+
+    def feed(self, chunk):
+        if self.encoding == 'base64':
+            data = self._pending + re.sub(rb'[^A-Za-z0-9+/=]', b'', chunk)
+            usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            self._write(base64.b64decode(data[:usable]))
+        elif self.encoding == 'quoted-printable':
+            data = self._pending + chunk
+            # a soft line break or =XX escape may straddle the chunk boundary
+            cut = data.rfind(b'\n') + 1
+            self._pending = data[cut:]
+            self._write(quopri.decodestring(data[:cut]))
+        else:
+            self._write(chunk)
+
+    def close(self):
+        if self._pending:
+            if self.encoding == 'base64':
+                padded = self._pending + b'=' * (-len(self._pending) % 4)
+                try:
+                    self._write(base64.b64decode(padded))
+                except binascii.Error:
+                    pass
+            else:
+                self._write(quopri.decodestring(self._pending))
+            self._pending = b''
+        return self.written
+
+
+class HashingWriter:
+    """File wrapper that hashes everything written through it"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        return self.fp.write(data)
+
+
+def stream_to_file(chunks, encoding, path):
+    """Decode chunks into path; returns (decoded byte count, sha256 hex).
+
+    The file is removed again if the fetch or decode fails part way.
+    """
+    try:
+        with open(path, 'wb') as fp:
+            writer = HashingWriter(fp)
+            decoder = StreamDecoder(writer, encoding)
+            for chunk in chunks:
+                decoder.feed(chunk)
+            written = decoder.close()
+    except Exception:
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+    return written, writer.hash.hexdigest()
@@ -0,0 +1,42 @@
+"""Persistent IMAP UID checkpoints, one JSON file per source"""
+import json
+import os
+import tempfile
+
+
+def checkpoint_path(state_dir, source_name):
+    return os.path.join(state_dir, f"{source_name}.checkpoint.json")
+
+
+def load_checkpoint(state_dir, source_name):
+    """Return {'uidvalidity', 'last_uid', 'failed_uids'} or None if never run"""
+    path = checkpoint_path(state_dir, source_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return {
+            'uidvalidity': int(data['uidvalidity']),
+            'last_uid': int(data['last_uid']),
+            'failed_uids': [int(u) for u in data.get('failed_uids', [])],
+            'updated_at': data.get('updated_at'),
+        }
+    except (ValueError, KeyError) as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+
+def save_checkpoint(state_dir, source_name, checkpoint):
+    """Atomically write the checkpoint so a crash never leaves a torn file"""
+    os.makedirs(state_dir, exist_ok=True)
+    path = checkpoint_path(state_dir, source_name)
+    fd, tmp_path = tempfile.mkstemp(dir=state_dir, prefix=f".{source_name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,51 @@
+"""Mailbox sources for PO ingestion"""
+import json
+import os
+
+CHECKPOINT_DIR = os.environ.get('PO_INGEST_STATE_DIR', r"E:\POAutomation\State")
+
+# Extra customer sources, merged over SOURCES (see sources.example.json)
+SOURCES_FILE = os.environ.get('PO_INGEST_SOURCES_FILE',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json'))
+
+# Bounded IMAP connection pool used by the concurrent runner
+MAX_CONNECTIONS = int(os.environ.get('PO_INGEST_MAX_CONNECTIONS', 4))
+MAX_CONNECTIONS_PER_ACCOUNT = int(os.environ.get('PO_INGEST_MAX_CONNECTIONS_PER_ACCOUNT', 3))
+
+# Enable less secure apps on your Google account
+# https://myaccount.google.com/lesssecureapps
+SOURCES = {
+    'spar': {
+        'host': "imap.gmail.com",
+        'username': "hflemt@heritagefoods.in",
+        'password': 'bidy dcgu tkmz axiq',
+        'mailbox': "INBOX",
+        'sender': "spar.po@landmarkgroup.co.in",
+        'subject_keyword': "PO",
+        'subject_pattern': r"PO_(\d+)",
+        'download_folder': r"E:\POAutomation\Input_PO\Spar",
+        'mark_seen': True,
+        # 'attachments': BODYSTRUCTURE first, then only the PDF parts; 'full': whole messages
+        'fetch_mode': "attachments",
+        'chunk_size': 1024 * 1024,
+        'initial_days': 2,
+        'batch_size': 50
+    }
+}
+
+
+def load_sources(path=SOURCES_FILE):
+    """Built-in SOURCES merged with the per-customer sources file, if present"""
+    sources = {name: dict(source) for name, source in SOURCES.items()}
+    if not os.path.exists(path):
+        return sources
+    with open(path) as f:
+        extra = json.load(f)
+    for name, source in extra.items():
+        merged = dict(sources.get(name, {}))
+        merged.update(source)
+        # keep credentials out of the file: "password_env": "SOME_ENV_VAR"
+        if merged.get('password_env'):
+            merged['password'] = os.environ.get(merged['password_env'], merged.get('password', ''))
+        sources[name] = merged
+    return sources
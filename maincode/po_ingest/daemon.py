@@ -0,0 +1,164 @@
+"""Long-running PO ingestion over IMAP IDLE.
+
+For each source a watcher thread holds an IDLE connection and only signals
+that new mail arrived; a worker thread drains those signals from a queue and
+runs the incremental fetch (BODYSTRUCTURE, attachment store, UID checkpoint)
+on its own kept-alive connection, so downloading attachments never blocks
+the IDLE loop. Bursts of notifications collapse into one sync, and every
+IDLE timeout also queues one in case a notification was missed. Both
+connections reconnect with exponential backoff.
+
+    python -m po_ingest.daemon                 # every configured source
+    python -m po_ingest.daemon --sources spar
+"""
+import argparse
+import queue
+import threading
+import time
+import traceback
+
+from po_ingest import imap_client
+from po_ingest.config import CHECKPOINT_DIR, load_sources
+from po_ingest.fetcher import run_incremental
+
+# Re-issue IDLE before servers drop it (RFC 2177 allows 29 minutes, Gmail less)
+IDLE_SECONDS = 600
+MIN_BACKOFF_SECONDS = 1
+MAX_BACKOFF_SECONDS = 300
+
+
+class Backoff:
+    """Exponential reconnect delay, reset after a successful connect"""
+
+    def __init__(self, minimum=MIN_BACKOFF_SECONDS, maximum=MAX_BACKOFF_SECONDS):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.delay = minimum
+
+    def next(self):
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.maximum)
+        return delay
+
+    def reset(self):
+        self.delay = self.minimum
+
+
+class SourceDaemon:
+    """IDLE watcher plus sync worker for one mailbox source"""
+
+    def __init__(self, name, source, state_dir=CHECKPOINT_DIR, idle_seconds=None, stop_event=None):
+        self.name = name
+        self.source = source
+        self.state_dir = state_dir
+        self.idle_seconds = idle_seconds or source.get('idle_seconds', IDLE_SECONDS)
+        self.stop_event = stop_event or threading.Event()
+        self.events = queue.Queue()
+        self.threads = []
+        self.stats = {'notifications': 0, 'syncs': 0, 'reconnects': 0, 'attachments_saved': 0,
+                      'last_sync': None, 'last_error': None}
+
+    def start(self):
+        for target, role in ((self._watch, 'idle'), (self._work, 'sync')):
+            thread = threading.Thread(target=target, name=f"po-{role}-{self.name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _sleep(self, backoff, error):
+        self.stats['reconnects'] += 1
+        self.stats['last_error'] = str(error)
+        delay = backoff.next()
+        print(f"{self.name}: {error}; reconnecting in {delay}s")
+        self.stop_event.wait(delay)
+
+    def _watch(self):
+        backoff = Backoff()
+        while not self.stop_event.is_set():
+            conn = None
+            try:
+                conn = imap_client.connect(self.source)
+                backoff.reset()
+                # catch up on anything that arrived while disconnected
+                self.events.put('connected')
+                print(f"{self.name}: IDLE connected")
+                while not self.stop_event.is_set():
+                    if imap_client.idle_wait(conn, self.idle_seconds):
+                        self.stats['notifications'] += 1
+                        self.events.put('exists')
+                    else:
+                        # safety net: a quiet IDLE period still syncs, in case a notification was missed
+                        self.events.put('timeout')
+            except Exception as e:
+                self._sleep(backoff, e)
+            finally:
+                if conn is not None:
+                    imap_client.logout(conn)
+
+    def _drain(self):
+        """Wait for a signal, then swallow any that queued up behind it"""
+        try:
+            self.events.get(timeout=1)
+        except queue.Empty:
+            return False
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return True
+
+    def _work(self):
+        backoff = Backoff()
+        conn = None
+        while not self.stop_event.is_set():
+            if not self._drain():
+                continue
+            try:
+                if conn is None:
+                    conn = imap_client.connect(self.source)
+                else:
+                    conn.noop()
+                stats = run_incremental(self.name, source=self.source, state_dir=self.state_dir, conn=conn)
+                backoff.reset()
+                self.stats['syncs'] += 1
+                self.stats['attachments_saved'] += stats['attachments_saved']
+                self.stats['last_sync'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            except Exception as e:
+                traceback.print_exc()
+                if conn is not None:
+                    imap_client.logout(conn)
+                    conn = None
+                self._sleep(backoff, e)
+                self.events.put('retry')
+        if conn is not None:
+            imap_client.logout(conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest PO attachments as they arrive using IMAP IDLE')
+    parser.add_argument('--sources', nargs='+', help='source names (default: all configured)')
+    parser.add_argument('--idle-seconds', type=int, help=f're-issue IDLE after this long (default {IDLE_SECONDS})')
+    parser.add_argument('--state-dir', default=CHECKPOINT_DIR)
+    args = parser.parse_args(argv)
+
+    sources = load_sources()
+    names = args.sources or sorted(sources)
+    stop_event = threading.Event()
+    daemons = [SourceDaemon(name, sources[name], args.state_dir, args.idle_seconds, stop_event) for name in names]
+    for daemon in daemons:
+        daemon.start()
+
+    try:
+        while True:
+            time.sleep(3600)
+            for daemon in daemons:
+                print(f"{daemon.name}: {daemon.stats}")
+    except KeyboardInterrupt:
+        print("Stopping PO ingestion daemon")
+        stop_event.set()
+        for daemon in daemons:
+            for thread in daemon.threads:
+                thread.join(timeout=5)
+
+
+if __name__ == '__main__':
+    main()
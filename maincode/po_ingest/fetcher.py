@@ -0,0 +1,305 @@
+"""Incremental, UID-checkpointed PO attachment fetcher.
+
+Incremental runs fetch only UIDs above the last checkpoint (or the last
+`initial_days` days on the first run / after a UIDVALIDITY reset), so a missed
+run is caught up on the next one and a re-run does no repeated work. Backfill
+runs fetch an arbitrary date range without touching the checkpoint.
+
+With fetch_mode 'attachments' only BODYSTRUCTURE and the Subject header are
+fetched per message, then each PDF part is pulled by section number in chunks
+and decoded straight to disk; 'full' downloads and parses whole messages.
+Either way attachments land in the content-addressed store (po_ingest.store).
+
+    python -m po_ingest.fetcher --source spar
+    python -m po_ingest.fetcher --source spar --since 2025-01-01 --until 2025-01-31
+"""
+import argparse
+import email
+import hashlib
+import os
+import re
+import time
+import traceback
+from datetime import datetime, timedelta
+from email.header import decode_header, make_header
+
+from po_ingest import imap_client
+from po_ingest.bodystructure import pdf_parts, stream_to_file
+from po_ingest.checkpoint import load_checkpoint, save_checkpoint
+from po_ingest.config import CHECKPOINT_DIR, load_sources
+from po_ingest.store import open_store
+
+
+def extract_po_number(subject, pattern=r'PO_(\d+)'):
+    match = re.search(pattern, subject)
+    if match:
+        return match.group(1)
+    return None
+
+
+def decode_subject(value):
+    """Decode an RFC 2047 encoded header to text"""
+    if not value:
+        return ''
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+def new_stats():
+    return {
+        'messages_scanned': 0,
+        'messages_matched': 0,
+        'attachments_saved': 0,
+        'duplicates_skipped': 0,
+        'bytes_saved': 0,
+        'failed_uids': [],
+    }
+
+
+def _received_at(internaldate):
+    return time.strftime('%Y-%m-%d %H:%M:%S', internaldate) if internaldate else None
+
+
+def _matches(job, subject):
+    """Count the message and return its PO number, or False if the subject does not match"""
+    source = job['source']
+    job['stats']['messages_scanned'] += 1
+    if source.get('subject_keyword') and source['subject_keyword'] not in subject:
+        return False
+    job['stats']['messages_matched'] += 1
+    return extract_po_number(subject, source.get('subject_pattern', r'PO_(\d+)'))
+
+
+def _meta(job, uid, internaldate, section, filename, po_number):
+    return {
+        'message_uid': uid,
+        'uidvalidity': job['uidvalidity'],
+        'part': section,
+        'filename': filename,
+        'po_number': po_number,
+        'received_at': _received_at(internaldate),
+    }
+
+
+def _count(job, is_new, size):
+    if is_new:
+        job['stats']['attachments_saved'] += 1
+        job['stats']['bytes_saved'] += size
+    else:
+        job['stats']['duplicates_skipped'] += 1
+
+
+def iter_leaf_parts(message, prefix=''):
+    """Yield (IMAP section number, part) for the leaf parts of a parsed message"""
+    if message.is_multipart():
+        for index, child in enumerate(message.get_payload(), 1):
+            section = f"{prefix}.{index}" if prefix else str(index)
+            if child.get_content_type() == 'message/rfc822' and child.get_payload():
+                yield from iter_leaf_parts(child.get_payload(0), section)
+            else:
+                yield from iter_leaf_parts(child, section)
+    else:
+        yield prefix or '1', message
+
+
+def process_message(job, uid, internaldate, raw):
+    """Full mode: store the PDF attachments of one downloaded message"""
+    message = email.message_from_bytes(raw)
+    subject = decode_subject(message.get('Subject'))
+    po_number = _matches(job, subject)
+    if po_number is False:
+        return False
+
+    print(f"Processing email UID {uid}: {subject} (PO {po_number})")
+    store = job['store']
+    for section, part in iter_leaf_parts(message):
+        filename = decode_subject(part.get_filename())
+        if part.get_content_type() != 'application/pdf' and not filename.lower().endswith('.pdf'):
+            continue
+        content = part.get_payload(decode=True)
+        if not content:
+            continue
+        sha256 = hashlib.sha256(content).hexdigest()
+        is_new = store.put_bytes(job['name'], job['source']['download_folder'], content, sha256,
+                                 _meta(job, uid, internaldate, section, filename, po_number))
+        print(f"{'Stored' if is_new else 'Duplicate'}: {filename or section} ({len(content)} bytes, {sha256[:12]})")
+        _count(job, is_new, len(content))
+    return True
+
+
+def process_structure(conn, job, uid, internaldate, structure, header):
+    """Attachment-only mode: stream just the PDF parts named in BODYSTRUCTURE to disk"""
+    subject = decode_subject(email.message_from_bytes(header or b'').get('Subject'))
+    po_number = _matches(job, subject)
+    if po_number is False:
+        return False
+
+    print(f"Processing email UID {uid}: {subject} (PO {po_number})")
+    source = job['source']
+    store = job['store']
+    for part in pdf_parts(structure):
+        if store.seen(job['name'], job['uidvalidity'], uid, part['section']):
+            # already stored or known duplicate: skip without downloading
+            job['stats']['duplicates_skipped'] += 1
+            continue
+        tmp_path = os.path.join(source['download_folder'], f".uid{uid}_{part['section']}.part")
+        chunks = imap_client.fetch_section_chunks(conn, uid, part['section'], part['size'],
+                                                  source.get('chunk_size', 1024 * 1024))
+        written, sha256 = stream_to_file(chunks, part['encoding'], tmp_path)
+        filename = decode_subject(part['filename'])
+        is_new = store.adopt_file(job['name'], source['download_folder'], tmp_path, sha256, written,
+                                  _meta(job, uid, internaldate, part['section'], filename, po_number))
+        print(f"{'Stored' if is_new else 'Duplicate'}: {filename or part['section']} ({written} bytes, {sha256[:12]})")
+        _count(job, is_new, written)
+    return True
+
+
+def _iter_batch(conn, job, batch):
+    """Yield (uid, handler) pairs for one batch in the source's fetch mode"""
+    if job['source'].get('fetch_mode', 'full') == 'attachments':
+        for uid, internaldate, structure, header in imap_client.fetch_structures(conn, batch, len(batch)):
+            yield uid, lambda uid=uid, d=internaldate, s=structure, h=header: \
+                process_structure(conn, job, uid, d, s, h)
+    else:
+        for uid, internaldate, raw in imap_client.fetch_messages(conn, batch, len(batch)):
+            yield uid, lambda uid=uid, d=internaldate, raw=raw: process_message(job, uid, d, raw)
+
+
+def _process_uids(conn, job, uids, on_batch_done=None):
+    """Fetch and process UIDs in batches, recording failures per message"""
+    source = job['source']
+    batch_size = source.get('batch_size', 50)
+    for i in range(0, len(uids), batch_size):
+        batch = uids[i:i + batch_size]
+        matched = []
+        for uid, handle in _iter_batch(conn, job, batch):
+            try:
+                if handle():
+                    matched.append(uid)
+            except Exception as e:
+                print(f"Failed to process UID {uid}: {e}")
+                traceback.print_exc()
+                job['stats']['failed_uids'].append(uid)
+        # UIDs that vanished between SEARCH and FETCH (expunged) are simply skipped
+        if source.get('mark_seen'):
+            imap_client.mark_seen(conn, matched)
+        if on_batch_done:
+            on_batch_done(batch)
+
+
+def _new_job(source_name, source, state_dir, uidvalidity):
+    return {
+        'name': source_name,
+        'source': source,
+        'uidvalidity': uidvalidity,
+        'store': open_store(state_dir),
+        'stats': new_stats(),
+    }
+
+
+def run_incremental(source_name, source=None, state_dir=CHECKPOINT_DIR, conn=None):
+    """Fetch everything newer than the stored UID checkpoint.
+
+    A connection passed in (e.g. from a pool) must have the source mailbox
+    selected and is left open for the caller.
+    """
+    source = source or load_sources()[source_name]
+    os.makedirs(source['download_folder'], exist_ok=True)
+    started = time.time()
+    checkpoint = load_checkpoint(state_dir, source_name)
+
+    owned = conn is None
+    conn = conn or imap_client.connect(source)
+    try:
+        uidvalidity = imap_client.get_uidvalidity(conn)
+        job = _new_job(source_name, source, state_dir, uidvalidity)
+        stats = job['stats']
+        sender = f'"{source["sender"]}"'
+
+        if checkpoint and checkpoint['uidvalidity'] == uidvalidity:
+            last_uid = checkpoint['last_uid']
+            # "n:*" always matches the highest UID, even when it is below n
+            uids = [u for u in imap_client.search_uids(conn, 'UID', f"{last_uid + 1}:*", 'FROM', sender)
+                    if u > last_uid]
+            retry = [u for u in checkpoint['failed_uids'] if u not in uids]
+        else:
+            if checkpoint:
+                print(f"UIDVALIDITY changed for {source_name}, rescanning the last {source.get('initial_days', 2)} days")
+            last_uid = 0
+            since = datetime.today().date() - timedelta(days=source.get('initial_days', 2))
+            uids = imap_client.search_uids(conn, 'SINCE', imap_client.imap_date(since), 'FROM', sender)
+            retry = []
+
+        print(f"{source_name}: {len(uids)} new message(s), {len(retry)} retried")
+        state = {'last_uid': last_uid}
+
+        def advance(batch):
+            new_uids = [u for u in batch if u not in retry]
+            if new_uids:
+                state['last_uid'] = max(state['last_uid'], max(new_uids))
+            save_checkpoint(state_dir, source_name, {
+                'uidvalidity': uidvalidity,
+                'last_uid': state['last_uid'],
+                'failed_uids': sorted(set(stats['failed_uids'])),
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+            })
+
+        _process_uids(conn, job, retry + uids, on_batch_done=advance)
+        if not uids and not retry:
+            advance([])
+    finally:
+        if owned:
+            imap_client.logout(conn)
+
+    stats['seconds'] = round(time.time() - started, 2)
+    print(f"{source_name} incremental run: {stats}")
+    return stats
+
+
+def run_backfill(source_name, since, until, source=None, state_dir=CHECKPOINT_DIR, conn=None):
+    """Fetch an inclusive date range regardless of the checkpoint"""
+    source = source or load_sources()[source_name]
+    os.makedirs(source['download_folder'], exist_ok=True)
+    started = time.time()
+
+    owned = conn is None
+    conn = conn or imap_client.connect(source)
+    try:
+        job = _new_job(source_name, source, state_dir, imap_client.get_uidvalidity(conn))
+        stats = job['stats']
+        uids = imap_client.search_uids(conn,
+                                       'SINCE', imap_client.imap_date(since),
+                                       'BEFORE', imap_client.imap_date(until + timedelta(days=1)),
+                                       'FROM', f'"{source["sender"]}"')
+        print(f"{source_name}: {len(uids)} message(s) between {since} and {until}")
+        _process_uids(conn, job, uids)
+    finally:
+        if owned:
+            imap_client.logout(conn)
+
+    stats['seconds'] = round(time.time() - started, 2)
+    print(f"{source_name} backfill run: {stats}")
+    return stats
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fetch PO attachments from a customer mailbox')
+    parser.add_argument('--source', default='spar', choices=sorted(load_sources()))
+    parser.add_argument('--since', type=_parse_date, help='backfill start date (YYYY-MM-DD)')
+    parser.add_argument('--until', type=_parse_date, help='backfill end date, inclusive (default: --since)')
+    parser.add_argument('--state-dir', default=CHECKPOINT_DIR)
+    args = parser.parse_args(argv)
+
+    if args.since:
+        return run_backfill(args.source, args.since, args.until or args.since, state_dir=args.state_dir)
+    return run_incremental(args.source, state_dir=args.state_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Thin imaplib helpers: connect, UID search and batched UID FETCH"""
+import imaplib
+import itertools
+import re
+import select
+import ssl
+import time
+
+from po_ingest.bodystructure import parse_fetch_response
+
+_UID_RE = re.compile(rb'UID (\d+)')
+_INTERNALDATE_RE = re.compile(rb'INTERNALDATE "([^"]+)"')
+_NEW_MAIL_RE = re.compile(rb'^\* \d+ (EXISTS|RECENT)')
+_idle_tags = itertools.count(1)
+
+
+def connect(source):
+    """Open an authenticated IMAP connection with the source mailbox selected"""
+    conn = imaplib.IMAP4_SSL(source['host'], source.get('port', 993))
+    conn.login(source['username'], source['password'])
+    select_mailbox(conn, source.get('mailbox', 'INBOX'))
+    return conn
+
+
+def select_mailbox(conn, mailbox):
+    typ, _ = conn.select(mailbox)
+    if typ != 'OK':
+        raise imaplib.IMAP4.error(f"Cannot select mailbox {mailbox}")
+
+
+def get_uidvalidity(conn):
+    """UIDVALIDITY of the selected mailbox"""
+    _, data = conn.response('UIDVALIDITY')
+    if data and data[0]:
+        return int(data[0])
+    raise imaplib.IMAP4.error('Server did not report UIDVALIDITY')
+
+
+def imap_date(value):
+    """Format a date for SINCE/BEFORE search keys (e.g. 01-Jan-2025)"""
+    return value.strftime('%d-%b-%Y')
+
+
+def search_uids(conn, *criteria):
+    """UID SEARCH, returning sorted integer UIDs"""
+    typ, data = conn.uid('SEARCH', None, *criteria)
+    if typ != 'OK':
+        raise imaplib.IMAP4.error(f"UID SEARCH failed: {data}")
+    if not data or not data[0]:
+        return []
+    return sorted(int(u) for u in data[0].split())
+
+
+def uid_set(uids):
+    """Compact a UID list into an IMAP sequence set (1:5,9,12:14)"""
+    uids = sorted(set(uids))
+    ranges = []
+    start = prev = None
+    for uid in uids:
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ','.join(ranges)
+
+
+def fetch_messages(conn, uids, batch_size=50):
+    """Yield (uid, internaldate, raw message bytes) with one UID FETCH per batch"""
+    for i in range(0, len(uids), batch_size):
+        batch = uids[i:i + batch_size]
+        typ, data = conn.uid('FETCH', uid_set(batch), '(UID INTERNALDATE BODY.PEEK[])')
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID FETCH failed: {data}")
+        for item in data:
+            if not isinstance(item, tuple):
+                continue
+            header, raw = item
+            uid_match = _UID_RE.search(header)
+            if not uid_match:
+                continue
+            date_match = _INTERNALDATE_RE.search(header)
+            internaldate = imaplib.Internaldate2tuple(b'INTERNALDATE "' + date_match.group(1) + b'"') if date_match else None
+            yield int(uid_match.group(1)), internaldate, raw
+
+
+def fetch_structures(conn, uids, batch_size=50):
+    """Yield (uid, internaldate, bodystructure, raw Subject header) without downloading bodies"""
+    for i in range(0, len(uids), batch_size):
+        batch = uids[i:i + batch_size]
+        typ, data = conn.uid('FETCH', uid_set(batch),
+                             '(UID INTERNALDATE BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT)])')
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID FETCH failed: {data}")
+        for uid, items in sorted(parse_fetch_response(data).items()):
+            header = b''
+            for key, value in items.items():
+                if key.startswith('BODY[HEADER') and isinstance(value, bytes):
+                    header = value
+            internaldate = None
+            if isinstance(items.get('INTERNALDATE'), bytes):
+                internaldate = imaplib.Internaldate2tuple(b'INTERNALDATE "' + items['INTERNALDATE'] + b'"')
+            yield uid, internaldate, items.get('BODYSTRUCTURE'), header
+
+
+def fetch_section_chunks(conn, uid, section, size, chunk_size=1024 * 1024):
+    """Yield the still-encoded bytes of one MIME part, chunk_size octets per round trip"""
+    offset = 0
+    while True:
+        typ, data = conn.uid('FETCH', str(uid), f"(BODY.PEEK[{section}]<{offset}.{chunk_size}>)")
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID FETCH {uid} BODY[{section}] failed: {data}")
+        chunk = b''
+        for items in parse_fetch_response(data).values():
+            for key, value in items.items():
+                if key.startswith('BODY[') and isinstance(value, bytes):
+                    chunk = value
+        if not chunk:
+            return
+        yield chunk
+        offset += len(chunk)
+        # the BODYSTRUCTURE size is the encoded size; stop without an extra empty round trip
+        if len(chunk) < chunk_size or (size and offset >= size):
+            return
+
+
+def _buffered(conn):
+    """Whether response data is already read off the socket, where select() cannot see it"""
+    if hasattr(conn.sock, 'pending') and conn.sock.pending():
+        return True
+    # imaplib's file may hold lines that arrived with the last one; peek without blocking
+    timeout = conn.sock.gettimeout()
+    conn.sock.settimeout(0)
+    try:
+        return bool(conn.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        conn.sock.settimeout(timeout)
+
+
+def idle_wait(conn, timeout):
+    """Hold one IMAP IDLE (RFC 2177) for up to timeout seconds.
+
+    Returns True as soon as the server reports new mail, False when the
+    timeout lapses; either way IDLE is ended with DONE so the connection can
+    be reused. Raises imaplib.IMAP4.abort if the server drops the connection.
+    """
+    tag = f"IDLE{next(_idle_tags)}".encode()
+    conn.send(tag + b' IDLE\r\n')
+    changed = False
+    line = conn.readline()
+    while line.startswith(b'* '):
+        # the server may report new mail before it answers the IDLE
+        changed = changed or bool(_NEW_MAIL_RE.match(line))
+        line = conn.readline()
+    if not line.startswith(b'+'):
+        raise imaplib.IMAP4.error(f"IDLE not accepted: {line!r}")
+
+    deadline = time.time() + timeout
+    while not changed:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        if not _buffered(conn) and not select.select([conn.sock], [], [], remaining)[0]:
+            break
+        line = conn.readline()
+        if not line or line.startswith(b'* BYE'):
+            raise imaplib.IMAP4.abort(f"Connection closed during IDLE: {line!r}")
+        changed = bool(_NEW_MAIL_RE.match(line))
+
+    conn.send(b'DONE\r\n')
+    while True:
+        line = conn.readline()
+        if not line:
+            raise imaplib.IMAP4.abort('Connection closed while ending IDLE')
+        if line.startswith(tag):
+            if not line[len(tag):].strip().upper().startswith(b'OK'):
+                raise imaplib.IMAP4.error(f"IDLE failed: {line!r}")
+            return changed
+        if _NEW_MAIL_RE.match(line):
+            changed = True
+
+
+def mark_seen(conn, uids):
+    if uids:
+        conn.uid('STORE', uid_set(uids), '+FLAGS', '(\\Seen)')
+
+
+def logout(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+    try:
+        conn.logout()
+    except Exception:
+        pass
@@ -0,0 +1,275 @@
+"""Parse stored PO PDFs into line items and bulk-load them into a staging table.
+
+Attachments that have not reached staging yet are taken from the store
+index; PDFs are parsed in a process pool, and each result (rows or error) is
+cached in the index by content hash, so a file is parsed once no matter how
+often it is re-sent or how many runs it takes to load. One bad PDF only marks
+that file failed. Rows go to po_staging with fast_executemany in large
+batches, tagged with a batch id; if a load fails partway, the batches it
+already committed are deleted again so the next run does not stage them twice.
+
+    python -m po_ingest.pipeline
+    python -m po_ingest.pipeline --source spar --workers 8 --batch-size 10000
+    python -m po_ingest.pipeline --dry-run          # parse and report, no database
+
+Text extraction needs the pypdf package (pip install pypdf).
+"""
+import argparse
+import os
+import re
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from po_ingest.config import CHECKPOINT_DIR, load_sources
+from po_ingest.store import open_store
+
+# Bump when the parsing rules change so cached results are re-parsed
+PARSER_VERSION = 1
+
+DEFAULT_PARSER = {
+    'po_number_pattern': r'PO\s*(?:No\.?|Number|#)\s*[:#-]?\s*(\d+)',
+    'po_date_pattern': r'PO\s*Date\s*[:-]?\s*([0-9A-Za-z./-]+)',
+    'delivery_date_pattern': r'Delivery\s*Date\s*[:-]?\s*([0-9A-Za-z./-]+)',
+    # <line no> <article code> <description> <quantity> <uom> [numeric columns: price, amount ...]
+    'line_item_pattern': (r'^\s*\d+\s+(?P<material>\d{6,})\s+(?P<description>.+?)\s+'
+                          r'(?P<quantity>\d[\d,]*(?:\.\d+)?)\s+(?P<uom>EA|EACH|PC|PCS|NOS|CS|CASE|KG|L|LTR)'
+                          r'(?:\s+[\d,]+(?:\.\d+)?)*[ \t]*$'),
+    'date_formats': ['%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%d-%b-%Y', '%Y-%m-%d', '%d.%m.%y', '%d/%m/%y'],
+}
+
+# Pack size in the description -> liters per unit (g/kg counted like ml/l)
+PACK_SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(ML|LTR|LTRS|L|KG|GMS|GM|G)\b', re.IGNORECASE)
+PACK_LITERS = {'ML': 0.001, 'G': 0.001, 'GM': 0.001, 'GMS': 0.001, 'L': 1.0, 'LTR': 1.0, 'LTRS': 1.0, 'KG': 1.0}
+
+STAGING_DDL = """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='po_staging' AND xtype='U')
+CREATE TABLE po_staging (
+    ID INT IDENTITY(1,1) PRIMARY KEY,
+    Batch_ID NVARCHAR(50) NOT NULL,
+    Source NVARCHAR(50),
+    Attachment_SHA256 CHAR(64),
+    PO_No NVARCHAR(50),
+    Material NVARCHAR(50),
+    Material_Description NVARCHAR(255),
+    PO_Date DATE,
+    Delivery_Date DATE,
+    UOM NVARCHAR(10),
+    PO_Quantity DECIMAL(18,3),
+    PO_Quantity_Liters DECIMAL(18,3),
+    Received_At DATETIME,
+    Loaded_At DATETIME DEFAULT GETDATE()
+)
+"""
+
+STAGING_INSERT = """
+INSERT INTO po_staging (Batch_ID, Source, Attachment_SHA256, PO_No, Material, Material_Description,
+                        PO_Date, Delivery_Date, UOM, PO_Quantity, PO_Quantity_Liters, Received_At)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def extract_pages(path):
+    """Text of each PDF page"""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [page.extract_text() or '' for page in reader.pages]
+
+
+def parse_date(value, formats):
+    if not value:
+        return None
+    for fmt in formats:
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def pack_liters(description):
+    match = PACK_SIZE_RE.search(description or '')
+    if not match:
+        return None
+    return float(match.group(1)) * PACK_LITERS[match.group(2).upper()]
+
+
+def parse_po_text(text, parser):
+    """Header fields and line items from the text of one PO"""
+    def header(key):
+        match = re.search(parser[key], text, re.IGNORECASE)
+        return match.group(1) if match else None
+
+    po_no = header('po_number_pattern')
+    po_date = parse_date(header('po_date_pattern'), parser['date_formats'])
+    delivery_date = parse_date(header('delivery_date_pattern'), parser['date_formats'])
+
+    rows = []
+    line_re = re.compile(parser['line_item_pattern'], re.IGNORECASE | re.MULTILINE)
+    for match in line_re.finditer(text):
+        quantity = float(match.group('quantity').replace(',', ''))
+        liters = pack_liters(match.group('description'))
+        rows.append({
+            'PO_No': po_no,
+            'Material': match.group('material'),
+            'Material_Description': match.group('description').strip(),
+            'PO_Date': po_date,
+            'Delivery_Date': delivery_date,
+            'UOM': match.group('uom').upper(),
+            'PO_Quantity': quantity,
+            'PO_Quantity_Liters': round(quantity * liters, 3) if liters else None,
+        })
+    return rows
+
+
+def parse_file(sha256, path, parser):
+    """Process-pool task: never raises, errors are returned per file"""
+    started = time.time()
+    result = {'sha256': sha256, 'status': 'ok', 'rows': [], 'pages': 0, 'error': None,
+              'bytes': os.path.getsize(path) if os.path.exists(path) else 0}
+    try:
+        pages = extract_pages(path)
+        result['pages'] = len(pages)
+        result['rows'] = parse_po_text('\n'.join(pages), parser)
+        if not result['rows']:
+            result.update(status='empty', error='No line items recognised')
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.time() - started
+    return result
+
+
+def load_staging(conn, rows, batch_id, batch_size=5000):
+    """Bulk insert staging rows, committing per batch; a failed load removes the batch again"""
+    cursor = conn.cursor()
+    cursor.execute(STAGING_DDL)
+    conn.commit()
+    cursor.fast_executemany = True
+    try:
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(STAGING_INSERT, rows[i:i + batch_size])
+            conn.commit()
+    except Exception:
+        _discard(conn, batch_id)
+        raise
+
+
+def _discard(conn, batch_id):
+    try:
+        conn.rollback()
+        conn.cursor().execute("DELETE FROM po_staging WHERE Batch_ID = ?", (batch_id,))
+        conn.commit()
+    except Exception as e:
+        print(f"Could not clear staging rows of batch {batch_id}: {e}")
+
+
+def run_pipeline(source=None, workers=None, batch_size=5000, retry_failed=False, dry_run=False,
+                 state_dir=CHECKPOINT_DIR):
+    """Parse pending attachments and load them; returns throughput metrics"""
+    started = time.time()
+    store = open_store(state_dir)
+    sources = load_sources()
+    # sha256 -> every unloaded copy; identical bytes from several sources parse once
+    pending = {}
+    for attachment in store.unloaded(PARSER_VERSION, source, retry_failed):
+        pending.setdefault(attachment['sha256'], []).append(attachment)
+
+    metrics = {'files': sum(len(copies) for copies in pending.values()), 'unique_files': len(pending),
+               'cache_hits': 0, 'parsed': 0, 'failed': 0, 'empty': 0,
+               'pages': 0, 'rows': 0, 'bytes_parsed': 0, 'parse_seconds': 0.0, 'load_seconds': 0.0}
+    results = {}
+    to_parse = []
+    for sha256, copies in pending.items():
+        attachment = copies[0]
+        cached = store.get_parsed(sha256)
+        if cached and cached['status'] == 'ok' and cached['parser_version'] >= PARSER_VERSION:
+            results[sha256] = cached
+            metrics['cache_hits'] += 1
+        else:
+            parser = dict(DEFAULT_PARSER, **sources.get(attachment['source'], {}).get('parser', {}))
+            to_parse.append((sha256, attachment['stored_path'], parser))
+
+    parse_started = time.time()
+    if to_parse:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(parse_file, *task): task[0] for task in to_parse}
+            for future in as_completed(futures):
+                sha256 = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # e.g. a worker process died on a pathological file
+                    result = {'sha256': sha256, 'status': 'error', 'rows': [], 'pages': 0, 'bytes': 0,
+                              'error': f"{type(e).__name__}: {e}"}
+                store.put_parsed(sha256, PARSER_VERSION, result['status'], result['rows'],
+                                 result['pages'], result['error'])
+                metrics['parsed'] += 1
+                metrics['pages'] += result['pages']
+                metrics['bytes_parsed'] += result['bytes']
+                if result['status'] == 'ok':
+                    results[sha256] = result
+                else:
+                    metrics['failed' if result['status'] == 'error' else 'empty'] += 1
+                    print(f"Parse {result['status']}: {pending[sha256][0]['stored_path']}: {result['error']}")
+    metrics['parse_seconds'] = round(time.time() - parse_started, 2)
+
+    batch_id = datetime.now().strftime('%Y%m%d%H%M%S-') + uuid.uuid4().hex[:8]
+    staging_rows = []
+    loaded_ids = []
+    for sha256, result in results.items():
+        for attachment in pending[sha256]:
+            loaded_ids.append(attachment['id'])
+            for row in result['rows']:
+                staging_rows.append((batch_id, attachment['source'], sha256, row['PO_No'] or attachment['po_number'],
+                                     row['Material'], row['Material_Description'], row['PO_Date'],
+                                     row['Delivery_Date'], row['UOM'], row['PO_Quantity'],
+                                     row['PO_Quantity_Liters'], attachment['received_at']))
+    metrics['rows'] = len(staging_rows)
+
+    if not dry_run and staging_rows:
+        from routes import data_routes
+        load_started = time.time()
+        conn = data_routes.get_db_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        try:
+            load_staging(conn, staging_rows, batch_id, batch_size)
+        finally:
+            conn.close()
+        store.mark_loaded(loaded_ids, batch_id)
+        metrics['load_seconds'] = round(time.time() - load_started, 2)
+        metrics['batch_id'] = batch_id
+
+    elapsed = time.time() - started
+    metrics['seconds'] = round(elapsed, 2)
+    metrics['files_per_second'] = round(metrics['parsed'] / metrics['parse_seconds'], 1) if metrics['parse_seconds'] else None
+    metrics['rows_per_second'] = round(metrics['rows'] / metrics['load_seconds'], 1) if metrics['load_seconds'] else None
+    metrics['dry_run'] = dry_run
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse stored PO PDFs and bulk-load po_staging')
+    parser.add_argument('--source', help='only attachments from this source')
+    parser.add_argument('--workers', type=int, help='parser processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per executemany batch')
+    parser.add_argument('--retry-failed', action='store_true', help='re-parse files that failed before')
+    parser.add_argument('--dry-run', action='store_true', help='parse and cache only, do not load')
+    parser.add_argument('--state-dir', default=CHECKPOINT_DIR)
+    args = parser.parse_args(argv)
+
+    try:
+        metrics = run_pipeline(args.source, args.workers, args.batch_size, args.retry_failed,
+                               args.dry_run, args.state_dir)
+    except Exception as e:
+        print(f"PO pipeline failed: {e}")
+        traceback.print_exc()
+        return None
+    print(f"PO pipeline run: {metrics}")
+    return metrics
+
+
+if __name__ == '__main__':
+    main()
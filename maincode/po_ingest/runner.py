@@ -0,0 +1,194 @@
+"""Run several PO mailbox sources concurrently.
+
+Each source (sender, subject pattern, target folder, date window) is fetched
+on its own worker thread; IMAP connections come from a bounded pool shared by
+all workers, capped both overall and per mail account, and are reused when
+several sources live in the same mailbox.
+
+    python -m po_ingest.runner                      # every configured source, incremental
+    python -m po_ingest.runner --sources spar zepto --workers 2
+    python -m po_ingest.runner --days 7             # rescan the last 7 days, checkpoints untouched
+"""
+import argparse
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from po_ingest import imap_client
+from po_ingest.config import CHECKPOINT_DIR, MAX_CONNECTIONS, MAX_CONNECTIONS_PER_ACCOUNT, load_sources
+from po_ingest.fetcher import new_stats, run_backfill, run_incremental
+
+
+class IMAPConnectionPool:
+    """Bounded pool of logged-in IMAP connections keyed by account"""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_account=MAX_CONNECTIONS_PER_ACCOUNT,
+                 idle_check_seconds=60):
+        self.idle_check_seconds = idle_check_seconds
+        self.max_per_account = max_per_account
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._account_slots = {}
+        self._idle = {}
+        self.opened = 0
+        self.reused = 0
+
+    @staticmethod
+    def _account(source):
+        return (source['host'], source.get('port', 993), source['username'])
+
+    def _account_semaphore(self, account):
+        with self._lock:
+            if account not in self._account_slots:
+                self._account_slots[account] = threading.BoundedSemaphore(self.max_per_account)
+            return self._account_slots[account]
+
+    def _take_idle(self, account):
+        with self._lock:
+            idle = self._idle.get(account)
+            return idle.pop() if idle else None
+
+    def acquire(self, source):
+        """Return a connection with the source mailbox selected"""
+        account = self._account(source)
+        account_slots = self._account_semaphore(account)
+        self._slots.acquire()
+        account_slots.acquire()
+        try:
+            while True:
+                entry = self._take_idle(account)
+                if entry is None:
+                    conn = imap_client.connect(source)
+                    with self._lock:
+                        self.opened += 1
+                    return conn
+                conn, last_used = entry
+                try:
+                    if time.time() - last_used >= self.idle_check_seconds:
+                        conn.noop()
+                    imap_client.select_mailbox(conn, source.get('mailbox', 'INBOX'))
+                    with self._lock:
+                        self.reused += 1
+                    return conn
+                except Exception:
+                    imap_client.logout(conn)
+        except Exception:
+            account_slots.release()
+            self._slots.release()
+            raise
+
+    def release(self, source, conn, broken=False):
+        account = self._account(source)
+        if broken:
+            imap_client.logout(conn)
+        else:
+            with self._lock:
+                self._idle.setdefault(account, []).append((conn, time.time()))
+        self._account_semaphore(account).release()
+        self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle = [conn for entries in self._idle.values() for conn, _ in entries]
+            self._idle.clear()
+        for conn in idle:
+            imap_client.logout(conn)
+
+
+def run_source(pool, name, source, days=None, state_dir=CHECKPOINT_DIR):
+    """Fetch one source on a pooled connection; never raises"""
+    started = time.time()
+    conn = None
+    broken = False
+    try:
+        conn = pool.acquire(source)
+        if days:
+            today = datetime.today().date()
+            stats = run_backfill(name, today - timedelta(days=days), today, source=source,
+                                 state_dir=state_dir, conn=conn)
+        else:
+            stats = run_incremental(name, source=source, state_dir=state_dir, conn=conn)
+        stats['status'] = 'ok'
+    except Exception as e:
+        print(f"{name}: run failed: {e}")
+        traceback.print_exc()
+        broken = True
+        stats = new_stats()
+        stats.update(status='error', error=str(e))
+    finally:
+        if conn is not None:
+            pool.release(source, conn, broken=broken)
+    stats['seconds'] = round(time.time() - started, 2)
+    return stats
+
+
+def run_all(source_names=None, workers=None, days=None, state_dir=CHECKPOINT_DIR, sources=None, pool=None):
+    """Fetch the given (default: all) sources concurrently and return a run summary"""
+    sources = sources or load_sources()
+    names = source_names or sorted(sources)
+    unknown = [n for n in names if n not in sources]
+    if unknown:
+        raise KeyError(f"Unknown source(s): {', '.join(unknown)}")
+
+    own_pool = pool is None
+    pool = pool or IMAPConnectionPool()
+    started = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=workers or len(names) or 1, thread_name_prefix='po-ingest') as executor:
+            futures = {name: executor.submit(run_source, pool, name, sources[name], days, state_dir)
+                       for name in names}
+            results = {name: future.result() for name, future in futures.items()}
+    finally:
+        if own_pool:
+            pool.close_all()
+
+    totals = {key: sum(r[key] for r in results.values())
+              for key in ('messages_scanned', 'messages_matched', 'attachments_saved', 'duplicates_skipped',
+                          'bytes_saved')}
+    summary = {
+        'started_at': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+        'seconds': round(time.time() - started, 2),
+        'mode': f"last {days} days" if days else 'incremental',
+        'sources': results,
+        'totals': totals,
+        'failed_sources': [n for n, r in results.items() if r['status'] != 'ok'],
+        'connections_opened': pool.opened,
+        'connections_reused': pool.reused,
+    }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\nPO ingestion run ({summary['mode']}) finished in {summary['seconds']}s")
+    print(f"{'source':<16} {'status':<7} {'scanned':>8} {'matched':>8} {'saved':>6} {'dups':>6} {'bytes':>12} {'secs':>7}")
+    for name, r in summary['sources'].items():
+        print(f"{name:<16} {r['status']:<7} {r['messages_scanned']:>8} {r['messages_matched']:>8} "
+              f"{r['attachments_saved']:>6} {r['duplicates_skipped']:>6} {r['bytes_saved']:>12} {r['seconds']:>7}")
+    t = summary['totals']
+    print(f"{'total':<16} {'':<7} {t['messages_scanned']:>8} {t['messages_matched']:>8} "
+          f"{t['attachments_saved']:>6} {t['duplicates_skipped']:>6} {t['bytes_saved']:>12} {summary['seconds']:>7}")
+    print(f"IMAP connections opened: {summary['connections_opened']}, reused: {summary['connections_reused']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fetch PO attachments for all customer sources in parallel')
+    parser.add_argument('--sources', nargs='+', help='source names (default: all configured)')
+    parser.add_argument('--workers', type=int, help='parallel sources (default: one per source)')
+    parser.add_argument('--days', type=int, help='rescan this many days instead of the incremental checkpoint')
+    parser.add_argument('--state-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--summary', help='also write the run summary as JSON to this file')
+    args = parser.parse_args(argv)
+
+    summary = run_all(args.sources, workers=args.workers, days=args.days, state_dir=args.state_dir)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""Content-addressed PO attachment store with a SQLite metadata index.
+
+Attachments are written once per source as <download_folder>/<sha256>.pdf, so
+a re-sent PO with identical bytes is never stored twice and a different PO
+with the same file name can no longer overwrite an earlier one. The index
+records PO number, message UID, received time and hash for every stored file,
+plus every (message, part) sighting so re-runs can skip parts already seen
+without downloading them, and caches the parsed line items of each file
+(po_ingest.pipeline) by the same hash.
+
+Downstream loaders ask the index instead of scanning the folder:
+    python -m po_ingest.store --since "2025-01-01 00:00:00" [--source spar]
+    python -m po_ingest.store --after-id 1234
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from po_ingest.config import CHECKPOINT_DIR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attachments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    po_number TEXT,
+    message_uid INTEGER,
+    uidvalidity INTEGER,
+    part TEXT,
+    filename TEXT,
+    received_at TEXT,
+    stored_path TEXT NOT NULL,
+    stored_at TEXT NOT NULL,
+    loaded_batch TEXT,
+    loaded_at TEXT,
+    UNIQUE (source, sha256)
+);
+CREATE INDEX IF NOT EXISTS ix_attachments_stored_at ON attachments (stored_at);
+CREATE INDEX IF NOT EXISTS ix_attachments_po_number ON attachments (po_number);
+CREATE TABLE IF NOT EXISTS sightings (
+    source TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    message_uid INTEGER NOT NULL,
+    part TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    po_number TEXT,
+    received_at TEXT,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (source, uidvalidity, message_uid, part)
+);
+CREATE TABLE IF NOT EXISTS parsed (
+    sha256 TEXT PRIMARY KEY,
+    parser_version INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    pages INTEGER,
+    rows_json TEXT,
+    parsed_at TEXT NOT NULL
+);
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def index_path(state_dir=CHECKPOINT_DIR):
+    return os.path.join(state_dir, 'attachments.sqlite')
+
+
+def open_store(state_dir=CHECKPOINT_DIR):
+    """Shared AttachmentStore for a state directory (one per process)"""
+    path = index_path(state_dir)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = AttachmentStore(path)
+        return _stores[path]
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class AttachmentStore:
+    """Hash-named attachment files plus their SQLite index"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def object_path(folder, sha256):
+        return os.path.join(folder, f"{sha256}.pdf")
+
+    def seen(self, source, uidvalidity, message_uid, part):
+        """True if this message part was already stored or found to be a duplicate"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sightings WHERE source = ? AND uidvalidity = ? AND message_uid = ? AND part = ?",
+                (source, uidvalidity, message_uid, str(part))).fetchone()
+        return row is not None
+
+    def lookup(self, source, sha256):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM attachments WHERE source = ? AND sha256 = ?",
+                                     (source, sha256)).fetchone()
+        return dict(row) if row else None
+
+    def record(self, source, sha256, size, stored_path, meta):
+        """Index one sighting; returns True if the content was not stored before"""
+        now = _now()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO attachments (source, sha256, size, po_number, message_uid, uidvalidity, part, "
+                "filename, received_at, stored_path, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, sha256, size, meta.get('po_number'), meta.get('message_uid'), meta.get('uidvalidity'),
+                 str(meta.get('part')), meta.get('filename'), meta.get('received_at'), stored_path, now))
+            is_new = cur.rowcount == 1
+            self._conn.execute(
+                "INSERT OR IGNORE INTO sightings (source, uidvalidity, message_uid, part, sha256, po_number, "
+                "received_at, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, meta.get('uidvalidity') or 0, meta.get('message_uid') or 0, str(meta.get('part')),
+                 sha256, meta.get('po_number'), meta.get('received_at'), now))
+            self._conn.commit()
+        return is_new
+
+    def put_bytes(self, source, folder, content, sha256, meta):
+        """Store in-memory content unless its hash is already indexed; returns True if written"""
+        if self.lookup(source, sha256):
+            self.record(source, sha256, len(content), self.object_path(folder, sha256), meta)
+            return False
+        path = self.object_path(folder, sha256)
+        tmp_path = path + '.part'
+        with open(tmp_path, 'wb') as fp:
+            fp.write(content)
+        os.replace(tmp_path, path)
+        return self.record(source, sha256, len(content), path, meta)
+
+    def adopt_file(self, source, folder, tmp_path, sha256, size, meta):
+        """Move a streamed temp file into place, or drop it if the hash is known"""
+        path = self.object_path(folder, sha256)
+        if self.lookup(source, sha256):
+            os.unlink(tmp_path)
+            self.record(source, sha256, size, path, meta)
+            return False
+        os.replace(tmp_path, path)
+        return self.record(source, sha256, size, path, meta)
+
+    def new_since(self, since=None, after_id=None, source=None, po_number=None, limit=None):
+        """Attachments stored after a timestamp and/or index id, oldest first"""
+        clauses = []
+        params = []
+        if since:
+            clauses.append("stored_at > ?")
+            params.append(since)
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if po_number:
+            clauses.append("po_number = ?")
+            params.append(po_number)
+        query = "SELECT * FROM attachments"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def get_parsed(self, sha256):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM parsed WHERE sha256 = ?", (sha256,)).fetchone()
+        if not row:
+            return None
+        result = dict(row)
+        result['rows'] = json.loads(result.pop('rows_json') or '[]')
+        return result
+
+    def put_parsed(self, sha256, parser_version, status, rows, pages=None, error=None):
+        """Cache the parse result of one attachment (keyed by content hash)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed (sha256, parser_version, status, error, pages, rows_json, parsed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha256, parser_version, status, error, pages, json.dumps(rows), _now()))
+            self._conn.commit()
+
+    def unloaded(self, parser_version, source=None, retry_failed=False):
+        """Attachments whose rows have not reached the staging table yet.
+
+        Load state is per (source, sha256): the same file received from two
+        sources is parsed once but staged once for each source.
+        """
+        query = ("SELECT a.*, p.parser_version, p.status AS parse_status FROM attachments a "
+                 "LEFT JOIN parsed p ON p.sha256 = a.sha256 "
+                 "WHERE a.loaded_batch IS NULL "
+                 "AND (p.sha256 IS NULL OR p.status = 'ok' OR p.parser_version < ? OR ?)")
+        params = [parser_version, 1 if retry_failed else 0]
+        if source:
+            query += " AND a.source = ?"
+            params.append(source)
+        query += " ORDER BY a.id"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def mark_loaded(self, attachment_ids, batch_id):
+        now = _now()
+        with self._lock:
+            self._conn.executemany("UPDATE attachments SET loaded_batch = ?, loaded_at = ? WHERE id = ?",
+                                   [(batch_id, now, attachment_id) for attachment_id in attachment_ids])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List PO attachments stored after a point in time')
+    parser.add_argument('--since', help='stored after this time (YYYY-MM-DD[ HH:MM:SS])')
+    parser.add_argument('--after-id', type=int, help='index id cursor from a previous call')
+    parser.add_argument('--source')
+    parser.add_argument('--po-number')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--state-dir', default=CHECKPOINT_DIR)
+    args = parser.parse_args(argv)
+
+    store = open_store(args.state_dir)
+    for row in store.new_since(args.since, args.after_id, args.source, args.po_number, args.limit):
+        print(json.dumps(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Filter-to-SQL compiler for the listing and export endpoints.
+
+Every endpoint that filters zepto_automation or fill_rate_feedback builds its
+query here, so one filter always becomes the same predicate and one
+combination of filters always becomes the same SQL text (fixed predicate
+order and formatting, every value bound as a parameter). SQL Server then
+keeps one cached plan per combination instead of one per hand-written
+variant.
+
+Predicates are written to be index friendly:
+- date ranges are half-open (col >= from AND col < day after to) on a bare
+  column, with the dates bound as date values rather than strings;
+- the plant statistics, which group by the effective date (delivery date,
+  else processing date), filter on the persisted Effective_Date column
+  instead of an OR over Delivery_Date/Processing_Date;
+- the user filter is a prefix match (LIKE 'name%'), not '%name%'.
+
+Effective_Date is a persisted computed column with its own index, added by
+the one-time migration in migrate.py (add_effective_date_column()). Until it
+exists the same expression is computed inline, which returns the same rows
+without the index.
+
+    query = query_filters.listing(threshold, query_filters.record_filters(request.args))
+    cursor.execute(query.sql, query.params)
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import fill_rate
+from routes import data_routes
+
+CompiledQuery = namedtuple('CompiledQuery', 'sql params')
+
+RECORD_FILTERS = ['state', 'plant', 'material', 'date_from', 'date_to']
+FEEDBACK_FILTERS = ['user', 'reason', 'state', 'plant', 'date_from', 'date_to']
+
+UNKNOWN_STATE = 'Unknown State'
+UNKNOWN_PLANT = 'Unknown Plant'
+
+EFFECTIVE_DATE_COLUMN = 'z.Effective_Date'
+EFFECTIVE_DATE_INDEX = 'IX_zepto_automation_Effective_Date'
+
+# CONVERT with a style keeps the expression deterministic, which PERSISTED requires
+EFFECTIVE_DATE_DDL = [
+    """
+IF COL_LENGTH('zepto_automation', 'Effective_Date') IS NULL
+ALTER TABLE zepto_automation ADD Effective_Date AS (
+    CASE WHEN Delivery_Date IS NOT NULL AND Delivery_Date != CONVERT(DATE, '19000101', 112)
+         THEN CAST(Delivery_Date AS DATE)
+         ELSE CAST(Processing_Date AS DATE) END) PERSISTED
+""",
+    f"""
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = '{EFFECTIVE_DATE_INDEX}')
+CREATE INDEX {EFFECTIVE_DATE_INDEX} ON zepto_automation (Effective_Date, State, Plant_Name)
+INCLUDE (Fill_Rate_Percent)
+""",
+]
+
+_PROBE_SQL = "SELECT TOP 1 Effective_Date FROM zepto_automation"
+PROBE_RETRY_SECONDS = 300
+
+_VALID_RECORD = [
+    "z.State IS NOT NULL AND z.State != '' AND z.State != '0'",
+    "z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'",
+]
+
+_STATE_LABEL = f"CASE WHEN state = '0' OR state = '' OR state IS NULL THEN '{UNKNOWN_STATE}' ELSE state END"
+_PLANT_LABEL = f"CASE WHEN plant_name = '0' OR plant_name = '' OR plant_name IS NULL THEN '{UNKNOWN_PLANT}' ELSE plant_name END"
+
+_LISTING_SELECT = """
+SELECT z.ID, z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date,
+       z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent,
+       z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
+       f.reason, f.comments, f.created_at
+FROM zepto_automation z
+LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id"""
+
+_EXPORT_SELECT = """
+SELECT z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date,
+       z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent,
+       z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
+       CASE WHEN f.reason IS NOT NULL THEN f.reason ELSE 'Pending Feedback' END as Feedback_Status,
+       ISNULL(f.comments, '') as Feedback_Comments,
+       f.created_at as Feedback_Date
+FROM zepto_automation z
+LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id"""
+
+_LISTING_ORDER = "ORDER BY z.Delivery_Date DESC, z.Processing_Date DESC"
+
+_FEEDBACK_REPORT_SELECT = f"""
+SELECT id, record_id, reason, comments, user_email, created_at,
+       po_no, material_description, po_date, delivery_date,
+       po_quantity_liters, sales_quantity_matched, fill_rate_percent,
+       {_STATE_LABEL} as state,
+       {_PLANT_LABEL} as plant_name,
+       sales_district, cust_group
+FROM fill_rate_feedback"""
+
+_FEEDBACK_EXPORT_SELECT = f"""
+SELECT user_email, reason, comments, created_at,
+       po_no, material_description, po_date, delivery_date,
+       po_quantity_liters, sales_quantity_matched, fill_rate_percent,
+       {_STATE_LABEL} as state,
+       {_PLANT_LABEL} as plant_name,
+       sales_district, cust_group
+FROM fill_rate_feedback"""
+
+_FEEDBACK_ORDER = "ORDER BY created_at DESC"
+
+_PLANT_STATS_SELECT = """
+SELECT
+    z.Plant_Name as 'Plant Name',
+    z.State as 'State',
+    {date} as 'Date',
+    COUNT(z.ID) as 'Total Records',
+    SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) as 'Feedback Provided',
+    COUNT(z.ID) - SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) as 'Pending Feedback',
+    CASE
+        WHEN COUNT(z.ID) > 0
+        THEN CAST((SUM(CASE WHEN f.record_id IS NOT NULL THEN 1 ELSE 0 END) * 100.0 / COUNT(z.ID)) AS DECIMAL(5,2))
+        ELSE 0.00
+    END as 'Completion %'
+FROM zepto_automation z
+LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id"""
+
+_PLANT_COUNTS_SELECT = """
+SELECT
+    z.Plant_Name as 'Plant Name',
+    z.State as 'State',
+    {date} as 'Date',
+    COUNT(*) as 'Total Records'
+FROM zepto_automation z"""
+
+_PLANT_STATS_TAIL = """GROUP BY z.Plant_Name, z.State, {date}
+HAVING COUNT(z.ID) > 0
+ORDER BY z.State, z.Plant_Name, {date} DESC"""
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_date(value):
+    """YYYY-MM-DD (a time part is ignored) -> date; raises ValueError otherwise"""
+    try:
+        return datetime.strptime(str(value).strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD") from None
+
+
+def _filters(args, names):
+    filters = {name: _text(args.get(name)) for name in names}
+    for name in ('date_from', 'date_to'):
+        if filters[name]:
+            parse_date(filters[name])
+    return filters
+
+
+def record_filters(args):
+    """{state, plant, material, date_from, date_to} from request args; blanks become None.
+
+    Raises ValueError for a malformed date, so routes can answer 400 before querying.
+    """
+    return _filters(args, RECORD_FILTERS)
+
+
+def feedback_filters(args):
+    """{user, reason, state, plant, date_from, date_to} from request args; blanks become None.
+
+    Raises ValueError for a malformed date, like record_filters().
+    """
+    return _filters(args, FEEDBACK_FILTERS)
+
+
+def _like_prefix(value):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
+    return escaped + '%'
+
+
+class _Where:
+    """Predicates and their parameters, in the order they are added"""
+
+    def __init__(self, predicates=(), params=()):
+        self.predicates = list(predicates)
+        self.params = list(params)
+
+    def add(self, predicate, *params):
+        self.predicates.append(predicate)
+        self.params.extend(params)
+
+    def date_range(self, column, date_from, date_to):
+        if date_from:
+            self.add(f"{column} >= ?", parse_date(date_from))
+        if date_to:
+            self.add(f"{column} < ?", parse_date(date_to) + timedelta(days=1))
+
+    def compile(self, select, tail=''):
+        sql = select.strip() + "\nWHERE " + "\nAND ".join(self.predicates or ['1=1'])
+        if tail:
+            sql += "\n" + tail.strip()
+        return CompiledQuery(sql, tuple(self.params))
+
+
+def _record_where(threshold, filters, date_column):
+    where = _Where(["z.Fill_Rate_Percent < ?"] + _VALID_RECORD, [threshold])
+    if filters.get('state'):
+        where.add("z.State = ?", filters['state'])
+    if filters.get('plant'):
+        where.add("z.Plant_Name = ?", filters['plant'])
+    if filters.get('material'):
+        where.add("z.Material_Description = ?", filters['material'])
+    where.date_range(date_column, filters.get('date_from'), filters.get('date_to'))
+    return where
+
+
+def _feedback_where(filters):
+    where = _Where()
+    if filters.get('user'):
+        where.add("user_email LIKE ? ESCAPE '\\'", _like_prefix(filters['user']))
+    if filters.get('reason'):
+        where.add("reason = ?", filters['reason'])
+    where.date_range("created_at", filters.get('date_from'), filters.get('date_to'))
+    state, plant = filters.get('state'), filters.get('plant')
+    if state == UNKNOWN_STATE:
+        where.add("(state = '0' OR state = '' OR state IS NULL)")
+    elif state:
+        where.add("state = ?", state)
+    if plant == UNKNOWN_PLANT:
+        where.add("(plant_name = '0' OR plant_name = '' OR plant_name IS NULL)")
+    elif plant:
+        where.add("plant_name = ?", plant)
+    return where
+
+
+def listing(threshold, filters=None):
+    """Actionable records with their feedback, for /api/low-fill-rate-data and /api/filtered-data"""
+    return _record_where(threshold, filters or {}, "z.Delivery_Date").compile(_LISTING_SELECT, _LISTING_ORDER)
+
+
+def listing_export(threshold, filters=None):
+    """Actionable records with feedback status, for /api/download-data"""
+    return _record_where(threshold, filters or {}, "z.Delivery_Date").compile(_EXPORT_SELECT, _LISTING_ORDER)
+
+
+def feedback_reports(filters=None):
+    """Feedback rows for /api/feedback-reports-data"""
+    return _feedback_where(filters or {}).compile(_FEEDBACK_REPORT_SELECT, _FEEDBACK_ORDER)
+
+
+def feedback_reports_export(filters=None):
+    """Feedback rows for /api/download-feedback-reports"""
+    return _feedback_where(filters or {}).compile(_FEEDBACK_EXPORT_SELECT, _FEEDBACK_ORDER)
+
+
+def plant_stats_export(threshold, filters=None, with_feedback=True):
+    """Per plant/state/effective date counts for /api/download-plant-feedback-stats.
+
+    with_feedback=False leaves out the feedback join (used when the feedback
+    table is missing).
+    """
+    date = effective_date.expression()
+    select = (_PLANT_STATS_SELECT if with_feedback else _PLANT_COUNTS_SELECT).format(date=date)
+    where = _record_where(threshold, filters or {}, date)
+    return where.compile(select, _PLANT_STATS_TAIL.format(date=date))
+
+
+class EffectiveDate:
+    """Whether zepto_automation has the persisted Effective_Date column (probed once, re-probed while missing)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._available = None
+        self._probed_at = 0
+
+    def available(self):
+        with self._lock:
+            if self._available or (self._available is False
+                                   and time.time() - self._probed_at < PROBE_RETRY_SECONDS):
+                return self._available
+        conn = data_routes.get_db_connection()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(_PROBE_SQL)
+            cursor.fetchall()
+            available = True
+        except Exception:
+            available = False
+        finally:
+            conn.close()
+        with self._lock:
+            self._available, self._probed_at = available, time.time()
+        return available
+
+    def expression(self):
+        return EFFECTIVE_DATE_COLUMN if self.available() else fill_rate.EFFECTIVE_DATE_SQL
+
+    def reset(self):
+        with self._lock:
+            self._available = None
+
+
+effective_date = EffectiveDate()
+
+
+def add_effective_date_column(conn):
+    """Add the persisted Effective_Date column and its index if missing; returns False if that failed"""
+    try:
+        cursor = conn.cursor()
+        for statement in EFFECTIVE_DATE_DDL:
+            cursor.execute(statement)
+        conn.commit()
+    except Exception as e:
+        print(f"Could not add the Effective_Date column: {e}")
+        conn.rollback()
+        return False
+    effective_date.reset()
+    return True
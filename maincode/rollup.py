@@ -0,0 +1,273 @@
+"""Pre-aggregated rollup cube over zepto_automation.
+
+The finest grain is one cell per (state, plant, district, customer group,
+material, effective date) holding record count, PO liters, matched liters,
+actionable records (fill rate below the configured threshold) and actionable
+records with feedback. Cells are rebuilt with one grouped scan when the
+zepto_automation data version changes or they are older than
+CUBE_MAX_AGE_SECONDS; feedback rows are append-only and are added to their
+cell incrementally by id, at most every FEEDBACK_POLL_SECONDS (fill_rate.py)
+unless a submission says there are some. Rebuilds run outside the lock and are
+swapped in, so queries keep rolling up the previous cells meanwhile. Any
+combination of dimensions is then answered by rolling the cells up in memory.
+
+The actionable measures depend on the threshold, so each threshold gets its
+own cube; the most recently used CUBE_THRESHOLDS are kept.
+
+    from rollup import cube_for
+    rows = cube_for(90).query(['district', 'month'], ['po_liters', 'fill_rate'])
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import data_version
+import fill_rate
+from routes import data_routes
+
+# Rebuild even without a data version change after this long (catches writers that don't bump versions)
+CUBE_MAX_AGE_SECONDS = float(os.environ.get('CUBE_MAX_AGE_SECONDS', 600))
+# Cubes kept for non-default thresholds, least recently used dropped first
+CUBE_THRESHOLDS = int(os.environ.get('CUBE_THRESHOLDS', 4))
+
+# API name -> cell column; 'month' rolls the effective date up to calendar months
+DIMENSIONS = {
+    'state': 'state',
+    'plant': 'plant',
+    'district': 'district',
+    'cust_group': 'cust_group',
+    'material': 'material',
+    'date': 'day',
+    'month': 'month',
+}
+KEY_COLUMNS = ['state', 'plant', 'district', 'cust_group', 'material', 'date']
+SUM_COLUMNS = ['records', 'po_liters', 'matched_liters', 'actionable', 'with_feedback']
+MEASURES = ['records', 'po_liters', 'matched_liters', 'fill_rate', 'actionable', 'with_feedback',
+            'feedback_coverage']
+DEFAULT_MEASURES = ['records', 'po_liters', 'matched_liters', 'fill_rate', 'feedback_coverage']
+
+_DIMENSION_SQL = """z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Material_Description,
+       {date}""".format(date=fill_rate.EFFECTIVE_DATE_SQL)
+
+_VALID_SQL = """z.State IS NOT NULL AND z.State != '' AND z.State != '0'
+AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'"""
+
+_CELLS_SQL = f"""
+SELECT {_DIMENSION_SQL},
+       COUNT(*),
+       SUM(ISNULL(z.PO_Quantity_Liters, 0)),
+       SUM(ISNULL(z.Sales_Quantity_Matched, 0)),
+       SUM(CASE WHEN z.Fill_Rate_Percent < ? THEN 1 ELSE 0 END)
+FROM zepto_automation z
+WHERE {_VALID_SQL}
+GROUP BY {_DIMENSION_SQL}
+"""
+
+_NEW_FEEDBACK_SQL = f"""
+SELECT f.id, {_DIMENSION_SQL}
+FROM fill_rate_feedback f
+INNER JOIN zepto_automation z ON z.ID = f.record_id
+WHERE f.id > ?
+AND z.Fill_Rate_Percent < ?
+AND {_VALID_SQL}
+ORDER BY f.id
+"""
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class RollupCube:
+    """Finest-grain cells for one data version, rolled up on demand"""
+
+    def __init__(self, threshold=None):
+        self.threshold = fill_rate.DEFAULT_THRESHOLD if threshold is None else threshold
+        self._lock = threading.Lock()
+        # Held by the one thread doing database I/O for a refresh
+        self._refresh_lock = threading.Lock()
+        self._version = None
+        self._built_at = 0.0
+        self._folded_at = 0.0
+        self._feedback_id = 0
+        self._cells = pd.DataFrame(columns=KEY_COLUMNS + SUM_COLUMNS)
+        self._positions = {}
+
+    def _build_cells(self, cursor):
+        """(cells, cell key -> row position) from one grouped scan"""
+        cursor.execute(_CELLS_SQL, (self.threshold,))
+        rows = [tuple(row[:5]) + (_day(row[5]),) + tuple(row[6:]) for row in cursor.fetchall()]
+        cells = pd.DataFrame(rows, columns=KEY_COLUMNS + SUM_COLUMNS[:-1])
+        cells['with_feedback'] = 0
+        for column in ['records', 'actionable', 'with_feedback']:
+            cells[column] = cells[column].astype(np.int64)
+        for column in ['po_liters', 'matched_liters']:
+            cells[column] = cells[column].astype(float)
+        cells['date'] = pd.to_datetime(cells['date'])
+        cells['day'] = cells['date'].dt.strftime('%Y-%m-%d')
+        cells['month'] = cells['date'].dt.strftime('%Y-%m')
+        for column in ['state', 'plant', 'district', 'cust_group', 'material', 'day', 'month']:
+            cells[column] = cells[column].astype('category')
+        return cells, {row[:6]: i for i, row in enumerate(rows)}
+
+    def _fold_feedback(self, cursor, cells, positions, feedback_id):
+        """Cells with feedback after feedback_id counted in (a new frame), and the highest id seen"""
+        cursor.execute(_NEW_FEEDBACK_SQL, (feedback_id, self.threshold))
+        hits = []
+        for row in cursor.fetchall():
+            feedback_id = max(feedback_id, int(row[0]))
+            position = positions.get(tuple(row[1:6]) + (_day(row[6]),))
+            if position is not None:
+                hits.append(position)
+        if hits:
+            counts = cells['with_feedback'].to_numpy(copy=True)
+            np.add.at(counts, hits, 1)
+            cells = cells.assign(with_feedback=counts)
+        return cells, feedback_id
+
+    def _stale(self, version):
+        return version != self._version or time.monotonic() - self._built_at > CUBE_MAX_AGE_SECONDS
+
+    def _current(self, version):
+        return not self._stale(version) and time.monotonic() - self._folded_at < fill_rate.FEEDBACK_POLL_SECONDS
+
+    def feedback_changed(self):
+        """Fold new feedback on the next read instead of waiting for the poll interval"""
+        with self._lock:
+            self._folded_at = 0.0
+
+    def refresh(self):
+        """Bring the cells up to date; returns False if there are no cells to serve"""
+        version = data_version.current_version('zepto_automation')
+        with self._lock:
+            if self._current(version):
+                return True
+            serving = self._version is not None
+        # Someone else is already refreshing: keep serving what we have, or wait for the first build
+        if not self._refresh_lock.acquire(blocking=not serving):
+            return True
+        try:
+            return self._refresh(version)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, version):
+        """Database side of refresh(); cells are built outside the lock and swapped in"""
+        with self._lock:
+            if self._current(version):
+                return True
+            rebuild = self._stale(version)
+        if not data_routes.ensure_feedback_table():
+            return self._version is not None
+        conn = data_routes.get_db_connection()
+        if not conn:
+            return self._version is not None
+        try:
+            cursor = conn.cursor()
+            # Only this thread replaces the cells, so they can be read without the lock
+            if rebuild:
+                built_at = time.monotonic()
+                cells, positions = self._build_cells(cursor)
+                cells, feedback_id = self._fold_feedback(cursor, cells, positions, 0)
+            else:
+                built_at, positions = self._built_at, self._positions
+                cells, feedback_id = self._fold_feedback(cursor, self._cells, positions, self._feedback_id)
+            conn.commit()
+            with self._lock:
+                self._cells, self._positions = cells, positions
+                if rebuild:
+                    self._version = version
+                self._feedback_id = feedback_id
+                self._built_at = built_at
+                self._folded_at = time.monotonic()
+            return True
+        except Exception as e:
+            # Keep serving the cells we have; the next read tries again
+            print(f"Rollup cube refresh error: {e}")
+            with self._lock:
+                return self._version is not None
+        finally:
+            conn.close()
+
+    def query(self, dims, measures=None, filters=None, date_from=None, date_to=None):
+        """Roll the cells up to `dims`; filters maps a dimension to allowed values"""
+        measures = measures or DEFAULT_MEASURES
+        unknown = [d for d in dims if d not in DIMENSIONS] + [m for m in measures if m not in MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown dimension or measure: {', '.join(unknown)}")
+        if 'date' in dims and 'month' in dims:
+            raise ValueError("Group by either date or month, not both")
+        if not self.refresh():
+            raise RuntimeError('Database connection failed')
+
+        with self._lock:
+            cells = self._cells
+        mask = np.ones(len(cells), dtype=bool)
+        for dim, values in (filters or {}).items():
+            if values and dim in DIMENSIONS and dim not in ('date', 'month'):
+                mask &= cells[DIMENSIONS[dim]].isin(values).to_numpy()
+        if date_from:
+            mask &= (cells['date'] >= pd.Timestamp(date_from)).to_numpy()
+        if date_to:
+            mask &= (cells['date'] <= pd.Timestamp(date_to)).to_numpy()
+        cells = cells[mask]
+
+        if dims:
+            keys = [cells[DIMENSIONS[d]].rename(d) for d in dims]
+            totals = cells.groupby(keys, dropna=False, sort=True, observed=True)[SUM_COLUMNS].sum().reset_index()
+        else:
+            totals = pd.DataFrame({column: [cells[column].sum()] for column in SUM_COLUMNS})
+
+        po = totals['po_liters'].to_numpy(dtype=float)
+        actionable = totals['actionable'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            totals['fill_rate'] = np.where(po > 0, totals['matched_liters'].to_numpy(dtype=float) * 100 / po, 0)
+            totals['feedback_coverage'] = np.where(
+                actionable > 0, totals['with_feedback'].to_numpy(dtype=float) * 100 / actionable, 0)
+
+        out = totals[list(dims) + list(measures)].astype(object)
+        for column in measures:
+            if totals[column].dtype.kind == 'f':
+                out[column] = totals[column].round(2).astype(object)
+            else:
+                out[column] = totals[column].astype(int).astype(object)
+        out = out.where(pd.notna(out), None)
+        return out.to_dict('records')
+
+    def info(self):
+        with self._lock:
+            return {'cells': len(self._cells), 'data_version': self._version,
+                    'feedback_id': self._feedback_id, 'threshold': self.threshold}
+
+
+cube = RollupCube()
+
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+
+def cube_for(threshold):
+    """The cube for a threshold: the shared default cube, or a cached one per threshold"""
+    if threshold == cube.threshold:
+        return cube
+    with _cubes_lock:
+        if threshold in _cubes:
+            _cubes.move_to_end(threshold)
+        else:
+            _cubes[threshold] = RollupCube(threshold)
+            while len(_cubes) > CUBE_THRESHOLDS:
+                _cubes.popitem(last=False)
+        return _cubes[threshold]
+
+
+def feedback_changed():
+    """Tell every cube that feedback was submitted"""
+    with _cubes_lock:
+        cubes = [cube] + list(_cubes.values())
+    for c in cubes:
+        c.feedback_changed()
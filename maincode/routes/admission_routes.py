@@ -0,0 +1,48 @@
+"""Apply admission.py to incoming requests and expose its queue metrics.
+
+Heavy requests from a signed-in user take a slot before the view runs and
+give it back on teardown, which runs even if the view raised. Requests that
+are not admitted get a 429 with a Retry-After header. Unauthenticated
+requests pass through, so the view's require_auth answers them with a 401.
+
+    GET /api/admission-stats
+    -> {"running": 2, "queue_depth": 3, "by_user": {...}, "totals": {...}, ...}
+"""
+from flask import Blueprint, g, jsonify, request, session
+
+import admission
+from auth import require_auth
+
+admission_bp = Blueprint('admission', __name__)
+
+
+@admission_bp.before_app_request
+def admit_heavy_requests():
+    if not admission.is_heavy(request.path) or 'user_email' not in session:
+        return None
+    try:
+        g.admission_ticket = admission.controller.acquire(session['user_email'])
+    except admission.Rejected as rejected:
+        if rejected.reason == 'user_limit':
+            message = 'You already have an export running. Please wait for it to finish.'
+        else:
+            message = 'The server is busy with other exports. Please try again shortly.'
+        response = jsonify({'error': message, 'reason': rejected.reason, 'retry_after': rejected.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(rejected.retry_after)
+        return response
+    return None
+
+
+@admission_bp.teardown_app_request
+def release_heavy_slot(error=None):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        admission.controller.release(ticket)
+
+
+@admission_bp.route('/api/admission-stats')
+@require_auth()
+def get_admission_stats():
+    """Heavy request concurrency, queue depth and admit/reject totals"""
+    return jsonify(admission.controller.stats())
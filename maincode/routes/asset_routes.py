@@ -0,0 +1,44 @@
+"""Serve the fingerprinted bundles built by assets.py.
+
+A hashed filename never changes content, so responses are cacheable for a
+year and marked immutable: browsers reuse them without even revalidating.
+When the client accepts it and a variant was built, the precompressed .br or
+.gz file is sent as-is with the matching Content-Encoding.
+
+    GET /assets/js/dashboard.1c9e2f04ab37.js   (Accept-Encoding: gzip, br)
+    -> 200, Content-Encoding: br, Cache-Control: public, max-age=31536000, immutable
+"""
+import mimetypes
+
+from flask import Blueprint, abort, current_app, request, send_from_directory
+
+import assets
+
+assets_bp = Blueprint('assets', __name__)
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+@assets_bp.app_context_processor
+def inject_asset_url():
+    if current_app.debug:
+        assets.assets.refresh()
+    return {'asset_url': assets.asset_url}
+
+
+@assets_bp.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    entry = assets.assets.lookup(filename)
+    if entry is None:
+        abort(404)
+
+    encoding = next((e for e in entry['encodings'] if request.accept_encodings[e]), None)
+    suffix = assets.ENCODINGS[encoding] if encoding else ''
+    response = send_from_directory(assets.assets.dist_dir, filename + suffix,
+                                   mimetype=mimetypes.guess_type(filename)[0], max_age=ONE_YEAR)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
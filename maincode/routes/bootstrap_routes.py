@@ -0,0 +1,90 @@
+"""Page bootstrap endpoints: everything a page needs on load in one round trip.
+
+Each page fires several API calls on load. /api/bootstrap/<page> calls the
+view functions behind those same endpoints concurrently on a shared thread
+pool and returns their JSON bodies side by side, so time-to-first-render is
+the slowest single query instead of the sum of the round trips. Every part
+runs in its own request context built from the caller's (same session cookie
+and query string, e.g. ?threshold=) with the app's before_request hooks
+(admission) run first and its teardown hooks run after, so it goes through
+the endpoint's normal auth, admission, caching and connection handling;
+pyodbc pools the connections they open.
+
+    GET /api/bootstrap/dashboard
+    -> {"parts": {"filter_options": {...}, "data": {...}},
+        "status": {"filter_options": 200, ...}, "timings_ms": {...}, "elapsed_ms": 412}
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+from werkzeug.exceptions import HTTPException
+
+from auth import require_auth
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+# page -> {part name: view endpoint}
+PAGES = {
+    'dashboard': {
+        'filter_options': 'data.get_filter_options',
+        'data': 'data.get_low_fill_rate_data',
+    },
+    'reports': {
+        'filter_options': 'data.get_reports_filter_options',
+        'summary_stats': 'data.get_feedback_summary_stats',
+        'plant_stats': 'get_plant_feedback_stats',
+        'reports_data': 'data.get_feedback_reports_data',
+    },
+}
+
+_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('BOOTSTRAP_WORKERS', 8)),
+                           thread_name_prefix='bootstrap')
+
+
+def _run_part(app, environ, endpoint, path):
+    """(status, body, milliseconds) of one view called in its own request context.
+
+    The view function is called directly rather than through dispatch_request(),
+    which would skip the before_request hooks; leaving the context runs teardown.
+    """
+    started = time.time()
+    with app.request_context(dict(environ, PATH_INFO=path, REQUEST_METHOD='GET')):
+        try:
+            response = app.preprocess_request()
+            if response is None:
+                response = app.view_functions[endpoint]()
+            response = app.make_response(response)
+            status, body = response.status_code, response.get_json(silent=True)
+        except HTTPException as e:
+            # abort() with a JSON response (e.g. a bad ?threshold=) carries its own body
+            response = e.get_response()
+            status, body = response.status_code, response.get_json(silent=True) or {'error': e.description}
+        except Exception as e:
+            print(f"Bootstrap part {endpoint} error: {e}")
+            status, body = 500, {'error': str(e)}
+    return status, body, round((time.time() - started) * 1000)
+
+
+@bootstrap_bp.route('/api/bootstrap/<page>')
+@require_auth()
+def get_bootstrap(page):
+    """Initial data for the dashboard or reports page, fetched in parallel"""
+    parts = PAGES.get(page)
+    if parts is None:
+        return jsonify({'error': f"Unknown page '{page}'", 'pages': sorted(PAGES)}), 404
+
+    started = time.time()
+    app = current_app._get_current_object()
+    futures = {name: _pool.submit(_run_part, app, request.environ, endpoint, url_for(endpoint))
+               for name, endpoint in parts.items()}
+
+    payload = {'page': page, 'parts': {}, 'status': {}, 'timings_ms': {}}
+    for name, future in futures.items():
+        status, body, elapsed = future.result()
+        payload['parts'][name] = body
+        payload['status'][name] = status
+        payload['timings_ms'][name] = elapsed
+    payload['elapsed_ms'] = round((time.time() - started) * 1000)
+    return jsonify(payload)
@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify, request
+
+import fill_rate
+from auth import require_auth
+from rollup import DIMENSIONS, cube_for
+
+cube_bp = Blueprint('cube', __name__)
+
+
+def _list_arg(name):
+    """Comma separated list argument, e.g. ?dims=state,month"""
+    value = request.args.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+@cube_bp.route('/api/cube')
+@require_auth()
+def get_cube():
+    """Roll fill rate measures up to any combination of dimensions.
+
+    ?dims=state,plant,district,cust_group,material,date|month
+    ?measures=records,po_liters,matched_liters,fill_rate,actionable,with_feedback,feedback_coverage
+    Filters: repeat ?state=, ?plant=, ?district=, ?cust_group=, ?material= for several values;
+    ?date_from= / ?date_to= bound the effective (delivery) date.
+    ?threshold= sets the fill rate below which records count as actionable.
+    """
+    cube = cube_for(fill_rate.get_threshold())
+    dims = _list_arg('dims')
+    measures = _list_arg('measures') or None
+    filters = {dim: request.args.getlist(dim) for dim in DIMENSIONS if dim not in ('date', 'month')}
+    try:
+        rows = cube.query(dims, measures, filters,
+                          request.args.get('date_from') or None, request.args.get('date_to') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Cube error: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'dims': dims, 'rows': rows, 'count': len(rows), **cube.info()})
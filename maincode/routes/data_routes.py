@@ -6,6 +6,11 @@ from datetime import datetime
 import tempfile
 import os
 from functools import wraps
+import actionable
+import feedback_summary
+import fill_rate
+import query_filters
+import singleflight
 
 data_bp = Blueprint('data', __name__)
 
@@ -85,41 +90,42 @@ def create_feedback_table_if_not_exists(cursor):
     """
     cursor.execute(create_table_query)
 
+_feedback_table_ready = False
+
+def ensure_feedback_table():
+    """Run the feedback table DDL once per process; returns False if the database is unreachable"""
+    global _feedback_table_ready
+    if _feedback_table_ready:
+        return True
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        create_feedback_table_if_not_exists(conn.cursor())
+        conn.commit()
+        _feedback_table_ready = True
+        return True
+    finally:
+        conn.close()
+
 # EXISTING ENDPOINTS (Enhanced)
 
 @data_bp.route('/api/low-fill-rate-data')
 @require_auth()
 def get_low_fill_rate_data():
-    """Get records with fill rate < 95% and valid state/plant, including feedback status"""
+    """Get records below the fill rate threshold with valid state/plant, including feedback status"""
+    threshold = fill_rate.get_threshold()
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
+        data = actionable.snapshot.listing(threshold)
+        if data is not None:
+            return jsonify({'data': data, 'count': len(data)})
         
         # Create feedback table if it doesn't exist
-        create_feedback_table_if_not_exists(cursor)
+        if not ensure_feedback_table():
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        query = """
-        SELECT z.ID, z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date, 
-               z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent, 
-               z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
-               f.reason, f.comments, f.created_at
-        FROM zepto_automation z
-        LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
-        WHERE z.Fill_Rate_Percent < 95 
-        AND z.State IS NOT NULL 
-        AND z.State != '' 
-        AND z.State != '0'
-        AND z.Plant_Name IS NOT NULL 
-        AND z.Plant_Name != '' 
-        AND z.Plant_Name != '0'
-        ORDER BY z.Delivery_Date DESC, z.Processing_Date DESC
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        query = query_filters.listing(threshold)
+        rows = singleflight.fetchall(query.sql, query.params)
         
         # Convert rows to list of dictionaries
         data = []
@@ -146,7 +152,6 @@ def get_low_fill_rate_data():
                 'feedback_date': safe_date_format(row[17], '%Y-%m-%d %H:%M')
             })
         
-        conn.close()
         return jsonify({'data': data, 'count': len(data)})
         
     except Exception as e:
@@ -156,13 +161,16 @@ def get_low_fill_rate_data():
 @data_bp.route('/api/filtered-data')
 @require_auth()
 def get_filtered_data():
-    """Get filtered records with fill rate < 95%"""
+    """Get filtered records below the fill rate threshold"""
+    threshold = fill_rate.get_threshold()
     try:
-        state = request.args.get('state')
-        plant = request.args.get('plant')
-        material = request.args.get('material')
-        date_from = request.args.get('date_from')
-        date_to = request.args.get('date_to')
+        filters = query_filters.record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        data = actionable.snapshot.listing(threshold, **filters)
+        if data is not None:
+            return jsonify({'data': data, 'count': len(data)})
         
         conn = get_db_connection()
         if not conn:
@@ -170,48 +178,8 @@ def get_filtered_data():
             
         cursor = conn.cursor()
         
-        # Build dynamic query
-        base_query = """
-        SELECT z.ID, z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date, 
-               z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent, 
-               z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
-               f.reason, f.comments, f.created_at
-        FROM zepto_automation z
-        LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
-        WHERE z.Fill_Rate_Percent < 95 
-        AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
-        AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
-        """
-        
-        conditions = []
-        params = []
-        
-        if state:
-            conditions.append("z.State = ?")
-            params.append(state)
-            
-        if plant:
-            conditions.append("z.Plant_Name = ?")
-            params.append(plant)
-            
-        if material:
-            conditions.append("z.Material_Description = ?")
-            params.append(material)
-            
-        if date_from:
-            conditions.append("z.Delivery_Date >= ?")
-            params.append(date_from)
-            
-        if date_to:
-            conditions.append("z.Delivery_Date <= ?")
-            params.append(date_to)
-        
-        if conditions:
-            base_query += " AND " + " AND ".join(conditions)
-            
-        base_query += " ORDER BY z.Delivery_Date DESC, z.Processing_Date DESC"
-        
-        cursor.execute(base_query, params)
+        query = query_filters.listing(threshold, filters)
+        cursor.execute(query.sql, query.params)
         rows = cursor.fetchall()
         
         # Convert rows to list of dictionaries
@@ -250,34 +218,36 @@ def get_filtered_data():
 @require_auth()
 def get_filter_options():
     """Get filter options with record counts"""
+    threshold = fill_rate.get_threshold()
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        
-        # Get states
-        cursor.execute("""
-            SELECT DISTINCT State 
-            FROM zepto_automation 
-            WHERE Fill_Rate_Percent < 95 
-            AND State IS NOT NULL AND State != '' AND State != '0'
-            ORDER BY State
-        """)
-        states = [row[0] for row in cursor.fetchall()]
-        
-        # Get plants grouped by state with counts
-        cursor.execute("""
-            SELECT State, Plant_Name, COUNT(*) as record_count
-            FROM zepto_automation 
-            WHERE Fill_Rate_Percent < 95 
-            AND State IS NOT NULL AND State != '' AND State != '0'
-            AND Plant_Name IS NOT NULL AND Plant_Name != '' AND Plant_Name != '0'
-            GROUP BY State, Plant_Name
-            ORDER BY State, Plant_Name
-        """)
-        plant_rows = cursor.fetchall()
+        # Identical concurrent requests share one execution of each query (singleflight)
+        # States and per-plant counts come from the histogram when the threshold allows it
+        counts = fill_rate.histogram.filter_counts(threshold)
+        if counts:
+            states, plant_counts = counts
+            plant_rows = [(state, plant, plant_counts[state][plant])
+                          for state in states for plant in sorted(plant_counts.get(state, {}))]
+        else:
+            # Get states
+            state_rows = singleflight.fetchall("""
+                SELECT DISTINCT State 
+                FROM zepto_automation 
+                WHERE Fill_Rate_Percent < ?
+                AND State IS NOT NULL AND State != '' AND State != '0'
+                ORDER BY State
+            """, (threshold,))
+            states = [row[0] for row in state_rows]
+            
+            # Get plants grouped by state with counts
+            plant_rows = singleflight.fetchall("""
+                SELECT State, Plant_Name, COUNT(*) as record_count
+                FROM zepto_automation 
+                WHERE Fill_Rate_Percent < ?
+                AND State IS NOT NULL AND State != '' AND State != '0'
+                AND Plant_Name IS NOT NULL AND Plant_Name != '' AND Plant_Name != '0'
+                GROUP BY State, Plant_Name
+                ORDER BY State, Plant_Name
+            """, (threshold,))
         
         plants_by_state = {}
         for row in plant_rows:
@@ -290,79 +260,96 @@ def get_filter_options():
             })
         
         # Get materials
-        cursor.execute("""
+        material_rows = singleflight.fetchall("""
             SELECT DISTINCT Material_Description 
             FROM zepto_automation 
-            WHERE Fill_Rate_Percent < 95 
+            WHERE Fill_Rate_Percent < ?
             AND Material_Description IS NOT NULL AND Material_Description != ''
             ORDER BY Material_Description
-        """)
-        materials = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
+        """, (threshold,))
+        materials = [row[0] for row in material_rows]
         
         return jsonify({
             'states': states,
             'plants_by_state': plants_by_state,
-            'materials': materials
+            'materials': materials,
+            'threshold': threshold
         })
         
     except Exception as e:
         print(f"Filter options error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@data_bp.route('/api/faceted-counts')
+@require_auth()
+def get_faceted_counts():
+    """Record counts for every state, plant, material, delivery month and feedback status
+    under the current selection (?state=&plant=&material=&month=YYYY-MM&feedback=pending|provided
+    &date_from=&date_to=); each facet ignores its own selection"""
+    threshold = fill_rate.get_threshold()
+    try:
+        selected = {facet: request.args.get(facet) for facet in actionable.FACETS}
+        counts = actionable.snapshot.facet_counts(threshold, selected,
+                                                  request.args.get('date_from'), request.args.get('date_to'))
+        if counts is None:
+            if threshold != actionable.snapshot.threshold:
+                return jsonify({'error': 'Faceted counts are only kept for the configured fill rate threshold'}), 400
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        return jsonify({**counts, 'threshold': threshold})
+        
+    except Exception as e:
+        print(f"Faceted counts error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @data_bp.route('/api/dashboard-stats')
 @require_auth()
 def get_dashboard_stats():
     """Get dashboard statistics"""
+    threshold = fill_rate.get_threshold()
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        
+        # Identical concurrent requests share one execution of each query (singleflight)
         # Total records
-        cursor.execute("SELECT COUNT(*) FROM zepto_automation")
-        total_records = cursor.fetchone()[0]
-        
-        # Low fill rate records
-        cursor.execute("""
-            SELECT COUNT(*) FROM zepto_automation 
-            WHERE Fill_Rate_Percent < 95 
-            AND State IS NOT NULL AND State != '' AND State != '0'
-            AND Plant_Name IS NOT NULL AND Plant_Name != '' AND Plant_Name != '0'
-        """)
-        low_fill_rate = cursor.fetchone()[0]
+        total_records = singleflight.fetchall("SELECT COUNT(*) FROM zepto_automation")[0][0]
         
         # Average fill rate
-        cursor.execute("SELECT AVG(Fill_Rate_Percent) FROM zepto_automation WHERE Fill_Rate_Percent > 0")
-        avg_fill_rate = cursor.fetchone()[0] or 0
-        
-        # Records with feedback (safe check if table exists)
-        try:
-            cursor.execute("""
-                SELECT COUNT(*) FROM zepto_automation z
-                INNER JOIN fill_rate_feedback f ON z.ID = f.record_id
-                WHERE z.Fill_Rate_Percent < 95 
-                AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
-                AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
-            """)
-            with_feedback = cursor.fetchone()[0]
-        except:
-            with_feedback = 0
+        avg_fill_rate = singleflight.fetchall(
+            "SELECT AVG(Fill_Rate_Percent) FROM zepto_automation WHERE Fill_Rate_Percent > 0")[0][0] or 0
+        
+        counts = fill_rate.histogram.dashboard_counts(threshold)
+        if counts:
+            low_fill_rate, with_feedback = counts
+        else:
+            # Low fill rate records
+            low_fill_rate = singleflight.fetchall("""
+                SELECT COUNT(*) FROM zepto_automation 
+                WHERE Fill_Rate_Percent < ?
+                AND State IS NOT NULL AND State != '' AND State != '0'
+                AND Plant_Name IS NOT NULL AND Plant_Name != '' AND Plant_Name != '0'
+            """, (threshold,))[0][0]
+            
+            # Records with feedback (safe check if table exists)
+            try:
+                with_feedback = singleflight.fetchall("""
+                    SELECT COUNT(*) FROM zepto_automation z
+                    INNER JOIN fill_rate_feedback f ON z.ID = f.record_id
+                    WHERE z.Fill_Rate_Percent < ?
+                    AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
+                    AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
+                """, (threshold,))[0][0]
+            except:
+                with_feedback = 0
         
         # Records needing feedback
         needs_feedback = low_fill_rate - with_feedback
         
-        conn.close()
-        
         return jsonify({
             'total_records': total_records,
             'low_fill_rate_count': low_fill_rate,
             'average_fill_rate': round(avg_fill_rate, 2),
             'needs_feedback': needs_feedback,
             'with_feedback': with_feedback,
+            'threshold': threshold,
             'user_email': session.get('user_email', '')
         })
         
@@ -370,6 +357,12 @@ def get_dashboard_stats():
         print(f"Stats error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@data_bp.route('/api/query-coalescing-stats')
+@require_auth()
+def get_query_coalescing_stats():
+    """How many duplicate concurrent query executions single-flight absorbed"""
+    return jsonify(singleflight.flight.stats())
+
 # FEEDBACK ENDPOINTS
 
 @data_bp.route('/api/reasons')
@@ -458,6 +451,11 @@ def submit_feedback():
         
         conn.commit()
         conn.close()
+        actionable.snapshot.feedback_changed()
+        fill_rate.histogram.feedback_changed()
+        # Imported here: rollup imports fill_rate, which imports this module
+        import rollup
+        rollup.feedback_changed()
         
         return jsonify({'message': 'Feedback submitted successfully'}), 200
         
@@ -508,14 +506,10 @@ def check_feedback(record_id):
 def get_feedback_reports_data():
     """Get feedback reports data with filters - no JOINs needed"""
     try:
-        # Get filter parameters
-        user_filter = request.args.get('user', '')
-        reason_filter = request.args.get('reason', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
-        state_filter = request.args.get('state', '')
-        plant_filter = request.args.get('plant', '')
-        
+        filters = query_filters.feedback_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
@@ -523,53 +517,8 @@ def get_feedback_reports_data():
         cursor = conn.cursor()
         
         try:
-            # Simple query - all data is in one table!
-            query = """
-            SELECT id, record_id, reason, comments, user_email, created_at,
-                   po_no, material_description, po_date, delivery_date, 
-                   po_quantity_liters, sales_quantity_matched, fill_rate_percent,
-                   CASE WHEN state = '0' OR state = '' OR state IS NULL THEN 'Unknown State' ELSE state END as state,
-                   CASE WHEN plant_name = '0' OR plant_name = '' OR plant_name IS NULL THEN 'Unknown Plant' ELSE plant_name END as plant_name,
-                   sales_district, cust_group
-            FROM fill_rate_feedback
-            WHERE 1=1
-            """
-            
-            params = []
-            
-            if user_filter:
-                query += " AND user_email LIKE ?"
-                params.append(f'%{user_filter}%')
-                
-            if reason_filter:
-                query += " AND reason = ?"
-                params.append(reason_filter)
-                
-            if date_from:
-                query += " AND created_at >= ?"
-                params.append(date_from)
-                
-            if date_to:
-                query += " AND created_at <= ?"
-                params.append(date_to + ' 23:59:59')
-                
-            if state_filter:
-                if state_filter == 'Unknown State':
-                    query += " AND (state = '0' OR state = '' OR state IS NULL)"
-                else:
-                    query += " AND state = ?"
-                    params.append(state_filter)
-                
-            if plant_filter:
-                if plant_filter == 'Unknown Plant':
-                    query += " AND (plant_name = '0' OR plant_name = '' OR plant_name IS NULL)"
-                else:
-                    query += " AND plant_name = ?"
-                    params.append(plant_filter)
-                
-            query += " ORDER BY created_at DESC"
-            
-            cursor.execute(query, params)
+            query = query_filters.feedback_reports(filters)
+            cursor.execute(query.sql, query.params)
             rows = cursor.fetchall()
             
             # Convert rows to list of dictionaries
@@ -609,69 +558,9 @@ def get_feedback_reports_data():
 @data_bp.route('/api/feedback-summary-stats')
 @require_auth()
 def get_feedback_summary_stats():
-    """Get feedback summary statistics from feedback table"""
+    """Get feedback summary statistics from feedback table (one grouped scan, cached on max id)"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        
-        try:
-            # Total feedback count
-            cursor.execute("SELECT COUNT(*) FROM fill_rate_feedback")
-            total_feedback = cursor.fetchone()[0]
-            
-            # Unique users who provided feedback
-            cursor.execute("SELECT COUNT(DISTINCT user_email) FROM fill_rate_feedback")
-            unique_users = cursor.fetchone()[0]
-            
-            # Feedback by reason
-            cursor.execute("""
-                SELECT reason, COUNT(*) as count 
-                FROM fill_rate_feedback 
-                GROUP BY reason 
-                ORDER BY count DESC
-            """)
-            reason_stats = [{'reason': row[0], 'count': row[1]} for row in cursor.fetchall()]
-            
-            # Feedback by user (top 10)
-            cursor.execute("""
-                SELECT user_email, COUNT(*) as count 
-                FROM fill_rate_feedback 
-                GROUP BY user_email 
-                ORDER BY count DESC
-            """)
-            user_stats = [{'user': row[0], 'count': row[1]} for row in cursor.fetchall()]
-            
-            # Feedback by state
-            cursor.execute("""
-                SELECT 
-                    CASE WHEN state = '0' OR state = '' OR state IS NULL THEN 'Unknown State' ELSE state END as state,
-                    COUNT(*) as count
-                FROM fill_rate_feedback
-                GROUP BY CASE WHEN state = '0' OR state = '' OR state IS NULL THEN 'Unknown State' ELSE state END
-                ORDER BY count DESC
-            """)
-            state_stats = [{'state': row[0], 'count': row[1]} for row in cursor.fetchall()]
-            
-        except Exception as table_error:
-            print(f"Feedback table doesn't exist yet: {table_error}")
-            total_feedback = 0
-            unique_users = 0
-            reason_stats = []
-            user_stats = []
-            state_stats = []
-        
-        conn.close()
-        
-        return jsonify({
-            'total_feedback': total_feedback,
-            'unique_users': unique_users,
-            'reason_stats': reason_stats,
-            'user_stats': user_stats,
-            'state_stats': state_stats
-        })
+        return jsonify(feedback_summary.summary.get())
         
     except Exception as e:
         print(f"Feedback summary stats error: {e}")
@@ -740,96 +629,57 @@ def get_reports_filter_options():
 @require_auth()
 def download_data():
     """Download gap analysis data as Excel file"""
+    threshold = fill_rate.get_threshold()
     try:
-        # Get filter parameters
-        state = request.args.get('state')
-        plant = request.args.get('plant')
-        material = request.args.get('material')
-        date_from = request.args.get('date_from')
-        date_to = request.args.get('date_to')
-        
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        
-        # Build dynamic query for download
-        base_query = """
-        SELECT z.PO_No, z.Material_Description, z.Material, z.PO_Date, z.Delivery_Date, 
-               z.UOM, z.PO_Quantity_Liters, z.Sales_Quantity_Matched, z.Fill_Rate_Percent, 
-               z.State, z.Plant_Name, z.Sales_District, z.Cust_Group, z.Processing_Date,
-               CASE WHEN f.reason IS NOT NULL THEN f.reason ELSE 'Pending Feedback' END as Feedback_Status,
-               ISNULL(f.comments, '') as Feedback_Comments,
-               f.created_at as Feedback_Date
-        FROM zepto_automation z
-        LEFT JOIN fill_rate_feedback f ON z.ID = f.record_id
-        WHERE z.Fill_Rate_Percent < 95 
-        AND z.State IS NOT NULL AND z.State != '' AND z.State != '0'
-        AND z.Plant_Name IS NOT NULL AND z.Plant_Name != '' AND z.Plant_Name != '0'
-        """
-        
-        conditions = []
-        params = []
-        
-        if state:
-            conditions.append("z.State = ?")
-            params.append(state)
-            
-        if plant:
-            conditions.append("z.Plant_Name = ?")
-            params.append(plant)
-            
-        if material:
-            conditions.append("z.Material_Description = ?")
-            params.append(material)
-            
-        if date_from:
-            conditions.append("z.Delivery_Date >= ?")
-            params.append(date_from)
-            
-        if date_to:
-            conditions.append("z.Delivery_Date <= ?")
-            params.append(date_to)
+        filters = query_filters.record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        df = actionable.snapshot.export(threshold, **filters)
+        if df is not None and df.empty:
+            return jsonify({'error': 'No data found for the selected filters'}), 404
         
-        if conditions:
-            base_query += " AND " + " AND ".join(conditions)
+        if df is None:
+            conn = get_db_connection()
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
             
-        base_query += " ORDER BY z.Delivery_Date DESC, z.Processing_Date DESC"
+            cursor = conn.cursor()
         
-        cursor.execute(base_query, params)
-        rows = cursor.fetchall()
+            query = query_filters.listing_export(threshold, filters)
+            cursor.execute(query.sql, query.params)
+            rows = cursor.fetchall()
         
-        # Convert to list of dictionaries for DataFrame
-        data_list = []
-        for row in rows:
-            data_list.append({
-                'PO Number': row[0],
-                'Material Description': row[1],
-                'Material': row[2],
-                'PO Date': safe_date_format(row[3]),
-                'Delivery Date': safe_date_format(row[4]),
-                'UOM': row[5],
-                'PO Quantity (L)': float(row[6]) if row[6] else 0,
-                'Sales Quantity': float(row[7]) if row[7] else 0,
-                'Fill Rate %': float(row[8]) if row[8] else 0,
-                'State': row[9],
-                'Plant Name': row[10],
-                'Sales District': row[11],
-                'Customer Group': row[12],
-                'Processing Date': safe_date_format(row[13], '%Y-%m-%d %H:%M'),
-                'Feedback Status': row[14],
-                'Feedback Comments': row[15],
-                'Feedback Date': safe_date_format(row[16], '%Y-%m-%d %H:%M')
-            })
+            # Convert to list of dictionaries for DataFrame
+            data_list = []
+            for row in rows:
+                data_list.append({
+                    'PO Number': row[0],
+                    'Material Description': row[1],
+                    'Material': row[2],
+                    'PO Date': safe_date_format(row[3]),
+                    'Delivery Date': safe_date_format(row[4]),
+                    'UOM': row[5],
+                    'PO Quantity (L)': float(row[6]) if row[6] else 0,
+                    'Sales Quantity': float(row[7]) if row[7] else 0,
+                    'Fill Rate %': float(row[8]) if row[8] else 0,
+                    'State': row[9],
+                    'Plant Name': row[10],
+                    'Sales District': row[11],
+                    'Customer Group': row[12],
+                    'Processing Date': safe_date_format(row[13], '%Y-%m-%d %H:%M'),
+                    'Feedback Status': row[14],
+                    'Feedback Comments': row[15],
+                    'Feedback Date': safe_date_format(row[16], '%Y-%m-%d %H:%M')
+                })
         
-        conn.close()
+            conn.close()
         
-        if not data_list:
-            return jsonify({'error': 'No data found for the selected filters'}), 404
+            if not data_list:
+                return jsonify({'error': 'No data found for the selected filters'}), 404
         
-        # Create DataFrame
-        df = pd.DataFrame(data_list)
+            # Create DataFrame
+            df = pd.DataFrame(data_list)
         
         # Create a temporary file
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
@@ -897,14 +747,10 @@ def download_data():
 def download_feedback_reports():
     """Download feedback reports as Excel file"""
     try:
-        # Get filter parameters
-        user_filter = request.args.get('user', '')
-        reason_filter = request.args.get('reason', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
-        state_filter = request.args.get('state', '')
-        plant_filter = request.args.get('plant', '')
-        
+        filters = query_filters.feedback_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
@@ -912,53 +758,8 @@ def download_feedback_reports():
         cursor = conn.cursor()
         
         try:
-            # Build query from feedback table
-            query = """
-            SELECT user_email, reason, comments, created_at,
-                   po_no, material_description, po_date, delivery_date, 
-                   po_quantity_liters, sales_quantity_matched, fill_rate_percent,
-                   CASE WHEN state = '0' OR state = '' OR state IS NULL THEN 'Unknown State' ELSE state END as state,
-                   CASE WHEN plant_name = '0' OR plant_name = '' OR plant_name IS NULL THEN 'Unknown Plant' ELSE plant_name END as plant_name,
-                   sales_district, cust_group
-            FROM fill_rate_feedback
-            WHERE 1=1
-            """
-            
-            params = []
-            
-            if user_filter:
-                query += " AND user_email LIKE ?"
-                params.append(f'%{user_filter}%')
-                
-            if reason_filter:
-                query += " AND reason = ?"
-                params.append(reason_filter)
-                
-            if date_from:
-                query += " AND created_at >= ?"
-                params.append(date_from)
-                
-            if date_to:
-                query += " AND created_at <= ?"
-                params.append(date_to + ' 23:59:59')
-                
-            if state_filter:
-                if state_filter == 'Unknown State':
-                    query += " AND (state = '0' OR state = '' OR state IS NULL)"
-                else:
-                    query += " AND state = ?"
-                    params.append(state_filter)
-                
-            if plant_filter:
-                if plant_filter == 'Unknown Plant':
-                    query += " AND (plant_name = '0' OR plant_name = '' OR plant_name IS NULL)"
-                else:
-                    query += " AND plant_name = ?"
-                    params.append(plant_filter)
-                
-            query += " ORDER BY created_at DESC"
-            
-            cursor.execute(query, params)
+            query = query_filters.feedback_reports_export(filters)
+            cursor.execute(query.sql, query.params)
             rows = cursor.fetchall()
             
             # Convert to list of dictionaries for DataFrame
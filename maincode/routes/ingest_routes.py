@@ -0,0 +1,76 @@
+from flask import Blueprint, jsonify, request
+import hmac
+import os
+import tempfile
+
+import data_version
+import ingest
+from auth import require_auth
+from routes.data_routes import get_db_connection
+
+ingest_bp = Blueprint('ingest', __name__)
+
+# Automation clients authenticate with this token (X-Ingest-Token header); unset disables the endpoint
+INGEST_API_TOKEN = os.environ.get('INGEST_API_TOKEN', '')
+
+
+def _token_ok():
+    supplied = request.headers.get('X-Ingest-Token', '')
+    return bool(INGEST_API_TOKEN) and hmac.compare_digest(supplied, INGEST_API_TOKEN)
+
+
+@ingest_bp.route('/api/ingest/zepto-automation', methods=['POST'])
+def ingest_zepto_automation():
+    """Upsert a CSV/Parquet/JSON lines batch into zepto_automation.
+
+    Send the file as multipart field 'file', or as the raw request body with
+    ?format=csv|parquet|jsonl. Optional ?source= labels the batch.
+    """
+    if not _token_ok():
+        return jsonify({'error': 'Invalid or missing ingest token'}), 403
+
+    upload = request.files.get('file')
+    filename = upload.filename if upload else None
+    fmt = request.args.get('format')
+    try:
+        fmt = ingest.detect_format(filename, fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fd, tmp_path = tempfile.mkstemp(suffix=f'.{fmt}')
+    os.close(fd)
+    conn = None
+    try:
+        if upload:
+            upload.save(tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = request.stream.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+        if os.path.getsize(tmp_path) == 0:
+            return jsonify({'error': 'Empty batch'}), 400
+
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        summary = ingest.ingest_file(conn, tmp_path, fmt, request.args.get('source'))
+        return jsonify({'success': True, **summary})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Ingestion error: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+        os.unlink(tmp_path)
+
+
+@ingest_bp.route('/api/data-version')
+@require_auth()
+def get_data_version():
+    """Current data versions; clients drop cached responses when these change"""
+    return jsonify(data_version.poller.versions())
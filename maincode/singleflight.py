@@ -0,0 +1,115 @@
+"""Single-flight execution of identical concurrent read queries.
+
+When many users open the dashboard at once they all send the same queries.
+fetchall() keys each query on its whitespace-normalized SQL plus parameters;
+the first caller runs it on its own connection and every identical caller
+that arrives while it is in flight waits for that execution and shares its
+rows (and its exception, if it fails). Nothing is cached after the query
+finishes, so results are never staler than a direct query.
+
+    import singleflight
+    rows = singleflight.fetchall("SELECT COUNT(*) FROM zepto_automation")
+    singleflight.flight.stats()   # executions / coalesced / in flight
+"""
+import re
+import threading
+import time
+
+from routes import data_routes
+
+_WHITESPACE = re.compile(r'\s+')
+TOP_QUERIES = 20
+
+
+def normalize(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executions = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._seconds_saved = 0.0
+        # normalized SQL -> [executions, coalesced]
+        self._by_query = {}
+
+    def do(self, key, fn):
+        label = key[0] if isinstance(key, tuple) else str(key)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+            counts = self._by_query.setdefault(label, [0, 0])
+            counts[0 if leader else 1] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        started = time.time()
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._seconds_saved += (time.time() - started) * call.waiters
+            call.event.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            top = sorted(self._by_query.items(), key=lambda item: item[1][1], reverse=True)[:TOP_QUERIES]
+            return {
+                'executions': self._executions,
+                'coalesced': self._coalesced,
+                'errors': self._errors,
+                'in_flight': len(self._calls),
+                'query_seconds_saved': round(self._seconds_saved, 2),
+                'queries': [{'sql': sql[:200], 'executions': e, 'coalesced': c} for sql, (e, c) in top],
+            }
+
+
+flight = SingleFlight()
+
+
+def fetchall(sql, params=()):
+    """Rows of a read query, shared with identical concurrent callers (treat as read-only)"""
+    params = tuple(params)
+
+    def run():
+        conn = data_routes.get_db_connection()
+        if not conn:
+            raise ConnectionError('Database connection failed')
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    return flight.do((normalize(sql), params), run)
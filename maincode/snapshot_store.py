@@ -0,0 +1,126 @@
+"""Memory-mapped dataset snapshots shared by worker processes.
+
+A snapshot is a directory of NumPy .npy columns plus meta.json. It is
+written once, then published by atomically replacing the CURRENT file of its
+kind, so readers only ever see complete snapshots. Workers open the columns
+with np.load(mmap_mode='r'): the pages are shared through the OS page cache
+and a freshly started worker is warm as soon as it maps the files, without
+querying SQL Server. A lock file makes sure only one worker rebuilds a
+snapshot when the data version changes; the others wait a few seconds for
+its result and otherwise keep their previous snapshot (or use SQL).
+
+    <SNAPSHOT_DIR>/actionable/CURRENT                 -> v12-20261019101500-ab12cd34
+    <SNAPSHOT_DIR>/actionable/v12-20261019101500-ab12cd34/ID.npy, ..., meta.json
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(tempfile.gettempdir(), 'gap_analysis_snapshots'))
+# Rebuild even without a data version change after this long (catches writers that don't bump versions)
+MAX_AGE_SECONDS = float(os.environ.get('SNAPSHOT_MAX_AGE_SECONDS', 3600))
+KEEP_SNAPSHOTS = 2
+LOCK_WAIT_SECONDS = float(os.environ.get('SNAPSHOT_LOCK_WAIT_SECONDS', 5))
+# A lock this old belongs to a builder that crashed
+LOCK_STALE_SECONDS = float(os.environ.get('SNAPSHOT_LOCK_STALE_SECONDS', 300))
+
+
+def _kind_dir(kind, root):
+    return os.path.join(root or SNAPSHOT_DIR, kind)
+
+
+def publish(kind, arrays, meta, root=None):
+    """Write arrays + meta as a new snapshot and make it CURRENT; returns its directory"""
+    base = _kind_dir(kind, root)
+    os.makedirs(base, exist_ok=True)
+    name = f"v{meta.get('version', 0)}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(base, f'.{name}.tmp')
+    os.makedirs(staging)
+    try:
+        for column, values in arrays.items():
+            np.save(os.path.join(staging, f'{column}.npy'), np.ascontiguousarray(values), allow_pickle=False)
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), **meta, 'columns': list(arrays)}, f)
+        final = os.path.join(base, name)
+        os.rename(staging, final)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(base, f'.CURRENT.{uuid.uuid4().hex[:8]}')
+    with open(pointer, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(base, 'CURRENT'))
+    _prune(base, name)
+    return final
+
+
+def load(kind, root=None):
+    """(meta, {column: read-only memory-mapped array}) of the CURRENT snapshot, or None"""
+    base = _kind_dir(kind, root)
+    try:
+        with open(os.path.join(base, 'CURRENT'), encoding='utf-8') as f:
+            path = os.path.join(base, f.read().strip())
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {column: np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r', allow_pickle=False)
+                  for column in meta['columns']}
+    except (OSError, ValueError, KeyError):
+        return None
+    return meta, arrays
+
+
+def expired(meta):
+    return time.time() - meta.get('created_at', 0) > MAX_AGE_SECONDS
+
+
+def _prune(base, current):
+    """Remove all but the newest KEEP_SNAPSHOTS snapshots (mapped files survive on POSIX)"""
+    names = sorted((n for n in os.listdir(base) if n.startswith('v') and n != current),
+                   key=lambda n: os.path.getmtime(os.path.join(base, n)), reverse=True)
+    for name in names[KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+
+@contextmanager
+def build_lock(kind, root=None, wait_seconds=LOCK_WAIT_SECONDS):
+    """Cross-process lock held while one worker rebuilds a snapshot.
+
+    Yields True when this process holds the lock, False if it gave up
+    waiting (the caller should then serve what it has instead of building).
+    """
+    base = _kind_dir(kind, root)
+    os.makedirs(base, exist_ok=True)
+    path = os.path.join(base, 'BUILD.lock')
+    deadline = time.time() + wait_seconds
+    fd = None
+    while fd is None:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                    os.unlink(path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                break
+            time.sleep(0.2)
+    try:
+        yield fd is not None
+    finally:
+        if fd is not None:
+            os.close(fd)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,744 @@
+let allData = [];
+let viewData = [];
+let recordsById = new Map();
+let pendingReasons = new Map();
+let dataTable = null;
+let plantsByState = {};
+let materials = [];
+let plantFacetCounts = null;
+let sessionTimer = null;
+let currentFilters = {};
+let selectedRecords = new Set();
+
+// Reasons for non-fulfillment
+const REASONS = [
+    "Product non Availability at Factory",
+    "Product non Availability at SO",
+    "Product non availability at CFA",
+    "Supply not made as per PO time lines",
+    "PO price issue",
+    "Appointment issues",
+    "Supply rejected by customer",
+    "Mutiple point Delivery",
+    "Due to Quality Issue",
+    "Due to Delayed Delivery"
+];
+
+// Initial page data arrives in one /api/bootstrap round trip. Each part is used once;
+// later reloads (and a failed bootstrap) call the endpoint itself.
+let bootstrapData = null;
+
+function loadBootstrap(page) {
+    bootstrapData = fetch(`/api/bootstrap/${page}`)
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
+}
+
+async function bootstrapFetch(part, url) {
+    const payload = bootstrapData ? await bootstrapData : null;
+    if (payload && payload.parts[part] != null) {
+        const body = payload.parts[part];
+        delete payload.parts[part];
+        return new Response(JSON.stringify(body), {
+            status: payload.status[part],
+            headers: {'Content-Type': 'application/json'}
+        });
+    }
+    return fetch(url);
+}
+
+// Load dashboard data on page load
+document.addEventListener('DOMContentLoaded', function() {
+    verifySession();
+    initializeDataTable();
+    loadBootstrap('dashboard');
+    loadFilterOptions();
+    loadLowFillRateData();
+    startSessionTimer();
+    initializeBulkActions();
+
+    // Event handlers
+    document.getElementById('logout-btn').addEventListener('click', logout);
+    document.getElementById('download-btn').addEventListener('click', downloadData);
+});
+
+// Initialize bulk action functionality
+function initializeBulkActions() {
+    // Populate bulk reason dropdown
+    const bulkReasonSelect = document.getElementById('bulk-reason-select');
+    REASONS.forEach(reason => {
+        const option = document.createElement('option');
+        option.value = reason;
+        option.textContent = reason;
+        bulkReasonSelect.appendChild(option);
+    });
+
+    // Bulk reason selection handler
+    bulkReasonSelect.addEventListener('change', function() {
+        const saveAllBtn = document.getElementById('save-all-btn');
+        saveAllBtn.disabled = !this.value || selectedRecords.size === 0;
+    });
+
+    // Save all button handler
+    document.getElementById('save-all-btn').addEventListener('click', saveAllSelected);
+
+    // Clear selection handler
+    document.getElementById('clear-selection-btn').addEventListener('click', clearSelection);
+
+    // Select all checkbox handler
+    document.getElementById('select-all-checkbox').addEventListener('change', toggleSelectAll);
+}
+
+// Toggle select all functionality
+function toggleSelectAll() {
+    const selectAllCheckbox = document.getElementById('select-all-checkbox');
+
+    // Every record in the current view, including rows not rendered yet
+    viewData.forEach(record => {
+        if (record.has_feedback) return;
+        if (selectAllCheckbox.checked) {
+            selectedRecords.add(record.id);
+        } else {
+            selectedRecords.delete(record.id);
+        }
+    });
+
+    dataTable.refresh();
+    updateBulkSelectionUI();
+}
+
+// Handle individual record selection
+function handleRecordSelection(checkbox) {
+    const recordId = parseInt(checkbox.dataset.recordId);
+    const row = checkbox.closest('tr');
+
+    if (checkbox.checked) {
+        selectedRecords.add(recordId);
+        row.classList.add('selected');
+    } else {
+        selectedRecords.delete(recordId);
+        row.classList.remove('selected');
+    }
+
+    updateBulkSelectionUI();
+}
+
+// Update bulk selection UI
+function updateBulkSelectionUI() {
+    const bulkBar = document.getElementById('bulk-selection-bar');
+    const selectedCountSpan = document.getElementById('selected-count');
+    const selectAllCheckbox = document.getElementById('select-all-checkbox');
+
+    selectedCountSpan.textContent = selectedRecords.size;
+
+    if (selectedRecords.size > 0) {
+        bulkBar.classList.add('show');
+    } else {
+        bulkBar.classList.remove('show');
+        document.getElementById('bulk-reason-select').value = '';
+        document.getElementById('save-all-btn').disabled = true;
+    }
+
+    // Update select all checkbox state from the records in view, not the rendered rows
+    let totalCheckboxes = 0;
+    let checkedCheckboxes = 0;
+    viewData.forEach(record => {
+        if (!record.has_feedback) {
+            totalCheckboxes++;
+            if (selectedRecords.has(record.id)) checkedCheckboxes++;
+        }
+    });
+
+    selectAllCheckbox.indeterminate = checkedCheckboxes > 0 && checkedCheckboxes < totalCheckboxes;
+    selectAllCheckbox.checked = checkedCheckboxes > 0 && checkedCheckboxes === totalCheckboxes;
+}
+
+// Clear all selections
+function clearSelection() {
+    selectedRecords.clear();
+    if (dataTable) dataTable.refresh();
+    updateBulkSelectionUI();
+}
+
+// Save all selected records
+async function saveAllSelected() {
+    const bulkReason = document.getElementById('bulk-reason-select').value;
+    if (!bulkReason || selectedRecords.size === 0) return;
+
+    const saveAllBtn = document.getElementById('save-all-btn');
+    const originalText = saveAllBtn.innerHTML;
+
+    saveAllBtn.disabled = true;
+    saveAllBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
+
+    let successCount = 0;
+    let errorCount = 0;
+    const totalRecords = selectedRecords.size;
+
+    for (const recordId of selectedRecords) {
+        try {
+            const response = await fetch('/api/submit-feedback', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    record_id: recordId,
+                    reason: bulkReason,
+                    comments: ''
+                })
+            });
+
+            const result = await response.json();
+
+            if (response.ok) {
+                successCount++;
+                updateRecordFeedbackUI(recordId, bulkReason);
+            } else {
+                errorCount++;
+                console.error(`Error saving feedback for record ${recordId}:`, result.error);
+            }
+        } catch (error) {
+            errorCount++;
+            console.error(`Error saving feedback for record ${recordId}:`, error);
+        }
+    }
+
+    clearSelection();
+    showBulkSaveResults(successCount, errorCount, totalRecords);
+
+    saveAllBtn.innerHTML = originalText;
+    saveAllBtn.disabled = true;
+}
+
+function updateRecordFeedbackUI(recordId, reason) {
+    const record = recordsById.get(recordId);
+    if (record) {
+        record.has_feedback = true;
+        record.feedback_reason = reason;
+    }
+    selectedRecords.delete(recordId);
+    pendingReasons.delete(recordId);
+    dataTable.refresh();
+}
+
+function showBulkSaveResults(successCount, errorCount, totalRecords) {
+    const modal = document.getElementById('successModal');
+    const messageEl = document.getElementById('success-message');
+    const detailsEl = document.getElementById('success-details');
+
+    if (errorCount === 0) {
+        messageEl.textContent = `All ${successCount} Records Saved Successfully!`;
+        detailsEl.textContent = 'Thank you for providing feedback on multiple gap analysis records.';
+    } else if (successCount > 0) {
+        messageEl.textContent = `${successCount} of ${totalRecords} Records Saved`;
+        detailsEl.textContent = `${errorCount} records could not be saved due to errors. Please check individual records and try again.`;
+    } else {
+        messageEl.textContent = 'No Records Could Be Saved';
+        detailsEl.textContent = 'All selected records encountered errors. Please try again or contact support.';
+    }
+
+    new bootstrap.Modal(modal).show();
+}
+
+async function verifySession() {
+    try {
+        const response = await fetch('/api/verify-session');
+        const result = await response.json();
+
+        if (!response.ok || !result.valid) {
+            window.location.href = '/login';
+            return;
+        }
+
+        document.getElementById('user-email').textContent = result.user_email;
+
+        if (result.time_remaining_minutes < 30) {
+            showSessionWarning(result.time_remaining_minutes);
+        }
+
+    } catch (error) {
+        console.error('Session verification error:', error);
+        window.location.href = '/login';
+    }
+}
+
+function startSessionTimer() {
+    sessionTimer = setInterval(verifySession, 5 * 60 * 1000);
+}
+
+function showSessionWarning(minutesRemaining) {
+    const sessionWarning = document.getElementById('session-warning');
+    const sessionTimerSpan = document.getElementById('session-timer');
+
+    sessionTimerSpan.textContent = `${minutesRemaining} minutes remaining`;
+    sessionWarning.style.display = 'block';
+}
+
+async function logout() {
+    try {
+        const response = await fetch('/api/logout', {
+            method: 'POST'
+        });
+
+        if (sessionTimer) {
+            clearInterval(sessionTimer);
+        }
+
+        window.location.href = '/login';
+
+    } catch (error) {
+        console.error('Logout error:', error);
+        window.location.href = '/login';
+    }
+}
+
+async function downloadData(event) {
+    event.preventDefault();
+
+    try {
+        const downloadBtn = document.getElementById('download-btn');
+        const originalText = downloadBtn.innerHTML;
+
+        downloadBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Generating...';
+        downloadBtn.style.pointerEvents = 'none';
+
+        let url = '/api/download-data';
+        const params = new URLSearchParams();
+
+        if (currentFilters.state) params.append('state', currentFilters.state);
+        if (currentFilters.plant) params.append('plant', currentFilters.plant);
+        if (currentFilters.material) params.append('material', currentFilters.material);
+        if (currentFilters.dateFrom) params.append('date_from', currentFilters.dateFrom);
+        if (currentFilters.dateTo) params.append('date_to', currentFilters.dateTo);
+
+        if (params.toString()) {
+            url += '?' + params.toString();
+        }
+
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = '';
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+
+        setTimeout(() => {
+            downloadBtn.innerHTML = originalText;
+            downloadBtn.style.pointerEvents = 'auto';
+        }, 2000);
+
+    } catch (error) {
+        console.error('Download error:', error);
+        alert('Error downloading data. Please try again.');
+
+        const downloadBtn = document.getElementById('download-btn');
+        downloadBtn.innerHTML = '<i class="fas fa-download me-1"></i>Download Excel';
+        downloadBtn.style.pointerEvents = 'auto';
+    }
+}
+
+async function loadFilterOptions() {
+    try {
+        const response = await bootstrapFetch('filter_options', '/api/filter-options');
+        const data = await response.json();
+
+        if (data.error) {
+            console.error('Error loading filter options:', data.error);
+            return;
+        }
+
+        plantsByState = data.plants_by_state;
+        materials = data.materials;
+
+        const stateSelect = document.getElementById('state-filter');
+        stateSelect.innerHTML = '<option value="">All States</option>';
+        data.states.forEach(state => {
+            const option = document.createElement('option');
+            option.value = state;
+            option.textContent = state;
+            stateSelect.appendChild(option);
+        });
+
+        const materialSelect = document.getElementById('material-filter');
+        materialSelect.innerHTML = '<option value="">All Materials</option>';
+        data.materials.forEach(material => {
+            const option = document.createElement('option');
+            option.value = material;
+            option.textContent = material;
+            materialSelect.appendChild(option);
+        });
+
+        populateAllPlants();
+
+    } catch (error) {
+        console.error('Error loading filter options:', error);
+        if (error.message.includes('401')) {
+            window.location.href = '/login';
+        }
+    }
+}
+
+function plantCount(plant) {
+    // Counts under the applied filters once /api/faceted-counts has answered
+    return plantFacetCounts ? (plantFacetCounts[plant.name] || 0) : plant.count;
+}
+
+async function refreshPlantCounts(params) {
+    try {
+        const response = await fetch('/api/faceted-counts?' + params.toString());
+        if (!response.ok) return;
+        const result = await response.json();
+        plantFacetCounts = result.facets.plant;
+
+        document.querySelectorAll('#plant-filter option').forEach(option => {
+            if (option.value) {
+                option.textContent = `${option.value} (${plantFacetCounts[option.value] || 0} records)`;
+            }
+        });
+    } catch (error) {
+        console.error('Error loading faceted counts:', error);
+    }
+}
+
+function populateAllPlants() {
+    const plantSelect = document.getElementById('plant-filter');
+    plantSelect.innerHTML = '<option value="">All Plants</option>';
+
+    Object.keys(plantsByState).forEach(state => {
+        plantsByState[state].forEach(plant => {
+            const option = document.createElement('option');
+            option.value = plant.name;
+            option.textContent = `${plant.name} (${plantCount(plant)} records)`;
+            plantSelect.appendChild(option);
+        });
+    });
+}
+
+document.getElementById('state-filter').addEventListener('change', function() {
+    const selectedState = this.value;
+    const plantSelect = document.getElementById('plant-filter');
+
+    plantSelect.value = '';
+
+    if (selectedState === '') {
+        populateAllPlants();
+    } else {
+        plantSelect.innerHTML = '<option value="">All Plants</option>';
+
+        if (plantsByState[selectedState]) {
+            plantsByState[selectedState].forEach(plant => {
+                const option = document.createElement('option');
+                option.value = plant.name;
+                option.textContent = `${plant.name} (${plantCount(plant)} records)`;
+                plantSelect.appendChild(option);
+            });
+        }
+    }
+});
+
+async function loadLowFillRateData() {
+    try {
+        const response = await bootstrapFetch('data', '/api/low-fill-rate-data');
+        const result = await response.json();
+
+        if (result.error) {
+            document.getElementById('loading').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error loading data: ${result.error}
+                </div>
+            `;
+            return;
+        }
+
+        allData = result.data;
+        displayData(allData);
+
+        document.getElementById('loading').style.display = 'none';
+        document.getElementById('data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error loading data:', error);
+        if (error.message.includes('401')) {
+            window.location.href = '/login';
+            return;
+        }
+        document.getElementById('loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading data. Please try again.
+            </div>
+        `;
+    }
+}
+
+// Records table: windowed rendering, delegated row events, search/sort in a worker
+function initializeDataTable() {
+    dataTable = new TableView({
+        scroller: document.getElementById('data-scroll'),
+        tbody: document.getElementById('data-table-body'),
+        header: document.querySelector('#data-container thead'),
+        search: document.getElementById('table-search'),
+        columns: 10,
+        renderRow: renderRecordRow,
+        emptyHtml: `
+            <tr>
+                <td colspan="10" class="text-center py-5">
+                    <i class="fas fa-info-circle text-muted me-2"></i>
+                    No gap analysis records found with fill rate < 95%
+                </td>
+            </tr>
+        `,
+        workerUrl: TABLE_WORKER_URL,
+        searchFields: ['po_no', 'material_description', 'material', 'state', 'plant_name', 'feedback_reason'],
+        sortFields: ['po_no', 'material_description', 'po_date', 'delivery_date', 'po_quantity',
+                     'sales_quantity', 'fill_rate_percent', 'feedback_reason'],
+        onChange: function(rows, total) {
+            viewData = rows;
+            document.getElementById('record-count').textContent = recordCountText(rows.length, total);
+            updateBulkSelectionUI();
+        }
+    });
+
+    const tbody = document.getElementById('data-table-body');
+    tbody.addEventListener('change', function(event) {
+        const target = event.target;
+        if (target.classList.contains('record-checkbox')) {
+            handleRecordSelection(target);
+        } else if (target.classList.contains('reason-select')) {
+            const recordId = parseInt(target.dataset.recordId);
+            if (target.value) {
+                pendingReasons.set(recordId, target.value);
+            } else {
+                pendingReasons.delete(recordId);
+            }
+            target.closest('tr').querySelector('.save-btn').disabled = !target.value;
+        }
+    });
+    tbody.addEventListener('click', function(event) {
+        const button = event.target.closest('.save-btn');
+        if (button && !button.disabled) {
+            saveInlineFeedback(button);
+        }
+    });
+}
+
+function displayData(data) {
+    clearSelection();
+    pendingReasons.clear();
+    recordsById = new Map(data.map(record => [record.id, record]));
+    return dataTable.load(data);
+}
+
+function renderRecordRow(record, index) {
+    const selected = !record.has_feedback && selectedRecords.has(record.id);
+    let checkboxContent = '';
+    let feedbackContent = '';
+
+    if (record.has_feedback) {
+        checkboxContent = `<input type="checkbox" class="form-check-input record-checkbox" disabled>`;
+        feedbackContent = `
+            <div class="feedback-status">
+                <span class="feedback-completed">
+                    <i class="fas fa-check-circle me-1"></i>
+                    ${record.feedback_reason}
+                </span>
+            </div>
+        `;
+    } else {
+        const pending = pendingReasons.get(record.id) || '';
+        checkboxContent = `<input type="checkbox" class="form-check-input record-checkbox" data-record-id="${record.id}"${selected ? ' checked' : ''}>`;
+        feedbackContent = `
+            <div class="feedback-pending">
+                <select class="reason-select" data-record-id="${record.id}">
+                    <option value="">Select reason...</option>
+                    ${REASONS.map(reason => `<option value="${reason}"${reason === pending ? ' selected' : ''}>${reason}</option>`).join('')}
+                </select>
+                <button class="save-btn" data-record-id="${record.id}"${pending ? '' : ' disabled'}>
+                    <i class="fas fa-save"></i> Save
+                </button>
+            </div>
+        `;
+    }
+
+    return `
+        <tr${selected ? ' class="selected"' : ''}>
+            <td>${checkboxContent}</td>
+            <td><span class="fw-bold text-primary">${index + 1}</span></td>
+            <td><span class="fw-bold">${record.po_no}</span></td>
+            <td>
+                <div class="text-truncate-custom" title="${record.material_description}">
+                    ${record.material_description}
+                </div>
+            </td>
+            <td><small class="text-muted">${record.po_date || 'N/A'}</small></td>
+            <td><small class="text-muted">${record.delivery_date || 'N/A'}</small></td>
+            <td><span class="fw-semibold">${record.po_quantity.toLocaleString()}</span></td>
+            <td><span class="fw-semibold">${record.sales_quantity.toLocaleString()}</span></td>
+            <td>
+                <span class="fill-rate-badge fill-rate-low">
+                    ${record.fill_rate_percent.toFixed(1)}%
+                </span>
+            </td>
+            <td>${feedbackContent}</td>
+        </tr>
+    `;
+}
+
+async function saveInlineFeedback(button) {
+    const recordId = parseInt(button.dataset.recordId);
+    const reason = pendingReasons.get(recordId);
+
+    if (!reason) return;
+
+    try {
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
+
+        const response = await fetch('/api/submit-feedback', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                record_id: recordId,
+                reason: reason,
+                comments: ''
+            })
+        });
+
+        const result = await response.json();
+
+        if (!response.ok) {
+            if (response.status === 401) {
+                window.location.href = '/login';
+                return;
+            }
+            throw new Error(result.error);
+        }
+
+        updateRecordFeedbackUI(recordId, reason);
+        updateBulkSelectionUI();
+
+        document.getElementById('success-message').textContent = 'Feedback Submitted Successfully!';
+        document.getElementById('success-details').textContent = 'Thank you for providing feedback on this gap analysis record.';
+        new bootstrap.Modal(document.getElementById('successModal')).show();
+
+    } catch (error) {
+        console.error('Error saving feedback:', error);
+        button.innerHTML = '<i class="fas fa-exclamation-triangle"></i> Error';
+        button.style.background = '#ef4444';
+        button.disabled = false;
+
+        setTimeout(() => {
+            button.innerHTML = '<i class="fas fa-save"></i> Save';
+            button.style.background = '';
+        }, 3000);
+    }
+}
+
+// Filter functionality
+document.getElementById('apply-filters').addEventListener('click', function() {
+    const stateFilter = document.getElementById('state-filter').value;
+    const plantFilter = document.getElementById('plant-filter').value;
+    const materialFilter = document.getElementById('material-filter').value;
+    const dateFromFilter = document.getElementById('date-from-filter').value;
+    const dateToFilter = document.getElementById('date-to-filter').value;
+
+    applyFilters(stateFilter, plantFilter, materialFilter, dateFromFilter, dateToFilter);
+});
+
+document.getElementById('clear-filters').addEventListener('click', function() {
+    document.getElementById('state-filter').value = '';
+    document.getElementById('plant-filter').value = '';
+    document.getElementById('material-filter').value = '';
+    document.getElementById('date-from-filter').value = '';
+    document.getElementById('date-to-filter').value = '';
+
+    currentFilters = {};
+    plantFacetCounts = null;
+    populateAllPlants();
+    loadLowFillRateData();
+});
+
+document.getElementById('today-filter').addEventListener('click', function() {
+    const today = new Date().toISOString().split('T')[0];
+    document.getElementById('date-from-filter').value = today;
+    document.getElementById('date-to-filter').value = today;
+
+    const stateFilter = document.getElementById('state-filter').value;
+    const plantFilter = document.getElementById('plant-filter').value;
+    const materialFilter = document.getElementById('material-filter').value;
+
+    applyFilters(stateFilter, plantFilter, materialFilter, today, today);
+});
+
+async function applyFilters(state, plant, material, dateFrom, dateTo) {
+    try {
+        currentFilters = {
+            state: state,
+            plant: plant,
+            material: material,
+            dateFrom: dateFrom,
+            dateTo: dateTo
+        };
+
+        document.getElementById('loading').style.display = 'block';
+        document.getElementById('data-container').style.display = 'none';
+
+        let url = '/api/filtered-data?';
+        const params = new URLSearchParams();
+
+        if (state) params.append('state', state);
+        if (plant) params.append('plant', plant);
+        if (material) params.append('material', material);
+        if (dateFrom) params.append('date_from', dateFrom);
+        if (dateTo) params.append('date_to', dateTo);
+
+        url += params.toString();
+
+        const response = await fetch(url);
+        const result = await response.json();
+
+        if (!response.ok) {
+            if (response.status === 401) {
+                window.location.href = '/login';
+                return;
+            }
+            document.getElementById('loading').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error loading filtered data: ${result.error}
+                </div>
+            `;
+            return;
+        }
+
+        allData = result.data;
+        displayData(allData);
+        refreshPlantCounts(params);
+
+        document.getElementById('loading').style.display = 'none';
+        document.getElementById('data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error applying filters:', error);
+        document.getElementById('loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading filtered data. Please try again.
+            </div>
+        `;
+    }
+}
+
+// Keyboard shortcuts
+document.addEventListener('keydown', function(e) {
+    if ((e.ctrlKey || e.metaKey) && e.key === 'Enter') {
+        document.getElementById('apply-filters').click();
+    }
+    if (e.key === 'Escape') {
+        document.getElementById('clear-filters').click();
+    }
+});
@@ -0,0 +1,308 @@
+// Application state
+let currentEmail = '';
+let resendTimer = null;
+let resendCount = 0;
+
+// DOM elements
+const emailStep = document.getElementById('email-step');
+const otpStep = document.getElementById('otp-step');
+const emailForm = document.getElementById('email-form');
+const otpForm = document.getElementById('otp-form');
+const emailInput = document.getElementById('email');
+const sendOtpBtn = document.getElementById('send-otp-btn');
+const verifyOtpBtn = document.getElementById('verify-otp-btn');
+const maskedEmailSpan = document.getElementById('masked-email');
+const resendTimerDiv = document.getElementById('resend-timer');
+const resendLink = document.getElementById('resend-otp');
+const backLink = document.getElementById('back-to-email');
+const alertContainer = document.getElementById('alert-container');
+const otpInputs = document.querySelectorAll('.otp-input');
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    setupEventListeners();
+    setupOtpInputs();
+});
+
+function setupEventListeners() {
+    emailForm.addEventListener('submit', handleEmailSubmit);
+    otpForm.addEventListener('submit', handleOtpSubmit);
+    resendLink.addEventListener('click', handleResendOtp);
+    backLink.addEventListener('click', handleBackToEmail);
+}
+
+function setupOtpInputs() {
+    otpInputs.forEach((input, index) => {
+        input.addEventListener('input', (e) => {
+            if (e.target.value.length === 1) {
+                if (index < otpInputs.length - 1) {
+                    otpInputs[index + 1].focus();
+                }
+            }
+        });
+
+        input.addEventListener('keydown', (e) => {
+            if (e.key === 'Backspace' && e.target.value === '') {
+                if (index > 0) {
+                    otpInputs[index - 1].focus();
+                }
+            }
+
+            // Only allow numbers
+            if (!/[0-9]/.test(e.key) && !['Backspace', 'Delete', 'Tab', 'ArrowLeft', 'ArrowRight'].includes(e.key)) {
+                e.preventDefault();
+            }
+        });
+
+        input.addEventListener('paste', (e) => {
+            e.preventDefault();
+            const pastedData = e.clipboardData.getData('text');
+            if (/^\d{6}$/.test(pastedData)) {
+                pastedData.split('').forEach((digit, i) => {
+                    if (i < otpInputs.length) {
+                        otpInputs[i].value = digit;
+                    }
+                });
+                otpInputs[otpInputs.length - 1].focus();
+            }
+        });
+    });
+}
+
+async function handleEmailSubmit(e) {
+    e.preventDefault();
+
+    const email = emailInput.value.trim();
+
+    if (!validateEmail(email)) {
+        return;
+    }
+
+    try {
+        setButtonLoading(sendOtpBtn, true);
+
+        const response = await fetch('/api/send-otp', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ email })
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            currentEmail = email;
+            showOtpStep();
+            showAlert('OTP sent successfully! Check your email.', 'success');
+        } else {
+            showAlert(result.error || 'Failed to send OTP. Please try again.', 'danger');
+        }
+    } catch (error) {
+        console.error('Send OTP error:', error);
+        showAlert('Network error. Please check your connection and try again.', 'danger');
+    } finally {
+        setButtonLoading(sendOtpBtn, false);
+    }
+}
+
+async function handleOtpSubmit(e) {
+    e.preventDefault();
+
+    const otp = Array.from(otpInputs).map(input => input.value).join('');
+
+    if (otp.length !== 6) {
+        showAlert('Please enter the complete 6-digit OTP.', 'danger');
+        return;
+    }
+
+    try {
+        setButtonLoading(verifyOtpBtn, true);
+
+        const response = await fetch('/api/verify-otp', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ 
+                email: currentEmail,
+                otp: otp 
+            })
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            showAlert('Login successful! Redirecting to dashboard...', 'success');
+
+            // Redirect to dashboard after 2 seconds
+            setTimeout(() => {
+                window.location.href = '/dashboard';
+            }, 2000);
+        } else {
+            showAlert(result.error || 'Invalid OTP. Please try again.', 'danger');
+            clearOtpInputs();
+        }
+    } catch (error) {
+        console.error('Verify OTP error:', error);
+        showAlert('Network error. Please check your connection and try again.', 'danger');
+    } finally {
+        setButtonLoading(verifyOtpBtn, false);
+    }
+}
+
+async function handleResendOtp(e) {
+    e.preventDefault();
+
+    if (resendCount >= 3) {
+        showAlert('Maximum resend attempts reached. Please try again later.', 'danger');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/send-otp', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ email: currentEmail })
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            resendCount++;
+            startResendTimer();
+            clearOtpInputs();
+            showAlert('New OTP sent successfully!', 'success');
+        } else {
+            showAlert(result.error || 'Failed to resend OTP.', 'danger');
+        }
+    } catch (error) {
+        showAlert('Network error. Please try again.', 'danger');
+    }
+}
+
+function handleBackToEmail(e) {
+    e.preventDefault();
+    showEmailStep();
+    clearOtpInputs();
+    clearTimer();
+    resendCount = 0;
+}
+
+function validateEmail(email) {
+    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+
+    if (!emailRegex.test(email)) {
+        showAlert('Please enter a valid email address.', 'danger');
+        return false;
+    }
+
+    if (!email.endsWith('@heritagefoods.in')) {
+        showAlert('Only @heritagefoods.in email addresses are allowed.', 'danger');
+        return false;
+    }
+
+    return true;
+}
+
+function showEmailStep() {
+    emailStep.style.display = 'block';
+    otpStep.style.display = 'none';
+    emailStep.classList.add('step-transition');
+}
+
+function showOtpStep() {
+    emailStep.style.display = 'none';
+    otpStep.style.display = 'block';
+    otpStep.classList.add('step-transition');
+
+    maskedEmailSpan.textContent = maskEmail(currentEmail);
+    startResendTimer();
+    otpInputs[0].focus();
+}
+
+function maskEmail(email) {
+    const [username, domain] = email.split('@');
+    const maskedUsername = username.charAt(0) + '*'.repeat(Math.max(0, username.length - 2)) + username.charAt(username.length - 1);
+    return maskedUsername + '@' + domain;
+}
+
+function startResendTimer() {
+    let timeLeft = 60;
+    resendLink.style.display = 'none';
+    resendTimerDiv.style.display = 'block';
+
+    resendTimer = setInterval(() => {
+        resendTimerDiv.textContent = `Resend OTP in ${timeLeft}s`;
+        timeLeft--;
+
+        if (timeLeft < 0) {
+            clearTimer();
+            resendTimerDiv.style.display = 'none';
+            resendLink.style.display = 'inline-block';
+        }
+    }, 1000);
+}
+
+function clearTimer() {
+    if (resendTimer) {
+        clearInterval(resendTimer);
+        resendTimer = null;
+    }
+}
+
+function clearOtpInputs() {
+    otpInputs.forEach(input => input.value = '');
+    otpInputs[0].focus();
+}
+
+function setButtonLoading(button, loading) {
+    if (loading) {
+        button.classList.add('btn-loading');
+        button.disabled = true;
+    } else {
+        button.classList.remove('btn-loading');
+        button.disabled = false;
+    }
+}
+
+function showAlert(message, type) {
+    const alertTypes = {
+        'success': { icon: 'fas fa-check-circle', class: 'alert-success' },
+        'danger': { icon: 'fas fa-exclamation-circle', class: 'alert-danger' },
+        'info': { icon: 'fas fa-info-circle', class: 'alert-info' }
+    };
+
+    const alertInfo = alertTypes[type] || alertTypes['info'];
+
+    alertContainer.innerHTML = `
+        <div class="alert ${alertInfo.class}" role="alert">
+            <i class="${alertInfo.icon}"></i>
+            ${message}
+        </div>
+    `;
+
+    // Auto-hide success and info alerts after 5 seconds
+    if (type === 'success' || type === 'info') {
+        setTimeout(() => {
+            alertContainer.innerHTML = '';
+        }, 5000);
+    }
+}
+
+// Check for existing session on page load
+if (sessionStorage.getItem('user_email') && sessionStorage.getItem('login_time')) {
+    const loginTime = parseInt(sessionStorage.getItem('login_time'));
+    const currentTime = Date.now();
+    const sessionDuration = 8 * 60 * 60 * 1000; // 8 hours
+
+    if (currentTime - loginTime < sessionDuration) {
+        // Valid session exists, redirect to dashboard
+        window.location.href = '/dashboard';
+    } else {
+        // Session expired, clear storage
+        sessionStorage.clear();
+    }
+}
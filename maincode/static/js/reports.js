@@ -0,0 +1,733 @@
+let allFeedbackData = [];
+let allPlantData = [];
+let feedbackTable = null;
+let plantTable = null;
+let currentFilters = {};
+let reasonChart = null;
+
+// Initial page data arrives in one /api/bootstrap round trip. Each part is used once;
+// later reloads (and a failed bootstrap) call the endpoint itself.
+let bootstrapData = null;
+
+function loadBootstrap(page) {
+    bootstrapData = fetch(`/api/bootstrap/${page}`)
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
+}
+
+async function bootstrapFetch(part, url) {
+    const payload = bootstrapData ? await bootstrapData : null;
+    if (payload && payload.parts[part] != null) {
+        const body = payload.parts[part];
+        delete payload.parts[part];
+        return new Response(JSON.stringify(body), {
+            status: payload.status[part],
+            headers: {'Content-Type': 'application/json'}
+        });
+    }
+    return fetch(url);
+}
+
+// Load page data on load
+document.addEventListener('DOMContentLoaded', function() {
+    initializeTables();
+    loadBootstrap('reports');
+    loadFilterOptions();
+    loadSummaryStats();
+    loadReportsData();
+    loadPlantFeedbackStats();
+
+    // Event handlers
+    document.getElementById('logout-btn').addEventListener('click', logout);
+    document.getElementById('download-feedback-btn').addEventListener('click', downloadFeedbackReports);
+    document.getElementById('download-plant-btn').addEventListener('click', downloadPlantReports);
+    document.getElementById('apply-filters').addEventListener('click', applyFilters);
+    document.getElementById('clear-filters').addEventListener('click', clearFilters);
+    document.getElementById('this-week-filter').addEventListener('click', setThisWeekFilter);
+    document.getElementById('this-month-filter').addEventListener('click', setThisMonthFilter);
+});
+
+async function logout() {
+    try {
+        const response = await fetch('/api/logout', {
+            method: 'POST'
+        });
+
+        window.location.href = '/login';
+
+    } catch (error) {
+        console.error('Logout error:', error);
+        window.location.href = '/login';
+    }
+}
+
+async function loadFilterOptions() {
+    try {
+        const response = await bootstrapFetch('filter_options', '/api/reports-filter-options');
+        const data = await response.json();
+
+        if (!response.ok) {
+            console.error('Error loading filter options:', data.error);
+            if (response.status === 401) {
+                window.location.href = '/login';
+            }
+            return;
+        }
+
+        // Populate user filter
+        const userSelect = document.getElementById('user-filter');
+        userSelect.innerHTML = '<option value="">All Users</option>';
+        data.users.forEach(user => {
+            const option = document.createElement('option');
+            option.value = user;
+            option.textContent = user;
+            userSelect.appendChild(option);
+        });
+
+        // Populate reason filter
+        const reasonSelect = document.getElementById('reason-filter');
+        reasonSelect.innerHTML = '<option value="">All Reasons</option>';
+        data.reasons.forEach(reason => {
+            const option = document.createElement('option');
+            option.value = reason;
+            option.textContent = reason;
+            reasonSelect.appendChild(option);
+        });
+
+        // Populate state filter
+        const stateSelect = document.getElementById('state-filter');
+        stateSelect.innerHTML = '<option value="">All States</option>';
+        data.states.forEach(state => {
+            const option = document.createElement('option');
+            option.value = state;
+            option.textContent = state;
+            stateSelect.appendChild(option);
+        });
+
+        // Populate plant filter
+        const plantSelect = document.getElementById('plant-filter');
+        plantSelect.innerHTML = '<option value="">All Plants</option>';
+        data.plants.forEach(plant => {
+            const option = document.createElement('option');
+            option.value = plant;
+            option.textContent = plant;
+            plantSelect.appendChild(option);
+        });
+
+    } catch (error) {
+        console.error('Error loading filter options:', error);
+        if (error.message.includes('401')) {
+            window.location.href = '/login';
+        }
+    }
+}
+
+async function loadSummaryStats() {
+    try {
+        const response = await bootstrapFetch('summary_stats', '/api/feedback-summary-stats');
+        const data = await response.json();
+
+        if (!response.ok) {
+            console.error('Error loading summary stats:', data.error);
+            if (response.status === 401) {
+                window.location.href = '/login';
+            }
+            return;
+        }
+
+        // Display summary statistics
+        const summaryStatsEl = document.getElementById('summary-stats');
+        summaryStatsEl.innerHTML = `
+            <div class="stat-item">
+                <div class="stat-number">${data.total_feedback}</div>
+                <div class="stat-label">Total Feedback</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">${data.unique_users}</div>
+                <div class="stat-label">Active Users</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">${data.reason_stats.length}</div>
+                <div class="stat-label">Unique Reasons</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">${data.state_stats.length}</div>
+                <div class="stat-label">States Covered</div>
+            </div>
+        `;
+
+        // Create charts and populate tables
+        createReasonChart(data.reason_stats);
+        populateUserStatsTable(data.user_stats.slice(0, 10)); // Top 10 users
+
+    } catch (error) {
+        console.error('Error loading summary stats:', error);
+        if (error.message.includes('401')) {
+            window.location.href = '/login';
+        }
+    }
+}
+
+function populateUserStatsTable(userStats) {
+    const tbody = document.getElementById('userStatsBody');
+    tbody.innerHTML = '';
+
+    if (userStats.length === 0) {
+        tbody.innerHTML = `
+            <tr>
+                <td colspan="2" class="text-center text-muted">No user data available</td>
+            </tr>
+        `;
+        return;
+    }
+
+    userStats.forEach((user, index) => {
+        const row = document.createElement('tr');
+        const userDisplay = user.user.split('@')[0]; // Show only username part
+
+        row.innerHTML = `
+            <td>
+                <span class="user-badge" title="${user.user}">
+                    <i class="fas fa-user me-1"></i>${userDisplay}
+                </span>
+            </td>
+            <td>
+                <span class="badge bg-primary">${user.count}</span>
+            </td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
+async function loadPlantFeedbackStats() {
+    try {
+        const response = await bootstrapFetch('plant_stats', '/api/plant-feedback-stats');
+        const data = await response.json();
+
+        if (!response.ok) {
+            console.error('Error loading plant feedback stats:', data.error);
+            document.getElementById('plant-loading').innerHTML = `
+                <div class="alert alert-warning">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Plant statistics not available: ${data.error}
+                </div>
+            `;
+            return;
+        }
+
+        allPlantData = data.plant_stats || [];
+        displayPlantData(allPlantData);
+
+        document.getElementById('plant-loading').style.display = 'none';
+        document.getElementById('plant-data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error loading plant feedback stats:', error);
+        document.getElementById('plant-loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading plant statistics. Please try again.
+            </div>
+        `;
+    }
+}
+
+function displayPlantData(plantStats) {
+    plantStats.forEach(plant => {
+        plant.completion = plant.total_records > 0 ? (plant.feedback_provided / plant.total_records) * 100 : 0;
+    });
+    return plantTable.load(plantStats);
+}
+
+function completionBadgeClass(percentage) {
+    if (percentage >= 80) return 'bg-success';
+    if (percentage >= 50) return 'bg-warning';
+    return 'bg-danger';
+}
+
+function renderPlantRow(plant) {
+    const completionPercentage = plant.completion.toFixed(1);
+
+    return `
+        <tr>
+            <td><strong>${plant.plant_name}</strong></td>
+            <td><small class="text-muted">${plant.state}</small></td>
+            <td><small class="text-muted">${plant.date}</small></td>
+            <td><span class="badge bg-info">${plant.total_records}</span></td>
+            <td><span class="badge bg-success">${plant.feedback_provided}</span></td>
+            <td><span class="badge bg-warning">${plant.pending_feedback}</span></td>
+            <td><span class="badge ${completionBadgeClass(plant.completion)}">${completionPercentage}%</span></td>
+        </tr>
+    `;
+}
+
+// Grand total over the rows currently shown
+function displayPlantTotals(plantStats) {
+    const tfoot = document.getElementById('plant-stats-footer');
+
+    if (plantStats.length === 0) {
+        tfoot.innerHTML = '';
+        return;
+    }
+
+    let totalRecords = 0;
+    let totalFeedbackProvided = 0;
+    let totalPending = 0;
+
+    plantStats.forEach(plant => {
+        totalRecords += plant.total_records;
+        totalFeedbackProvided += plant.feedback_provided;
+        totalPending += plant.pending_feedback;
+    });
+
+    // Calculate overall completion percentage
+    const overallCompletion = totalRecords > 0 ? 
+        ((totalFeedbackProvided / totalRecords) * 100).toFixed(1) : 0;
+
+    // Add grand total row
+    tfoot.innerHTML = `
+        <tr>
+            <td colspan="3"><strong>GRAND TOTAL</strong></td>
+            <td><span class="badge bg-info fs-6">${totalRecords}</span></td>
+            <td><span class="badge bg-success fs-6">${totalFeedbackProvided}</span></td>
+            <td><span class="badge bg-warning fs-6">${totalPending}</span></td>
+            <td><span class="badge ${completionBadgeClass(overallCompletion)} fs-6">${overallCompletion}%</span></td>
+        </tr>
+    `;
+}
+
+function createReasonChart(reasonStats) {
+    const ctx = document.getElementById('reasonChart').getContext('2d');
+
+    if (reasonChart) {
+        reasonChart.destroy();
+    }
+
+    if (reasonStats.length === 0) {
+        ctx.font = '16px Arial';
+        ctx.fillStyle = '#6b7280';
+        ctx.textAlign = 'center';
+        ctx.fillText('No reason data available', ctx.canvas.width / 2, ctx.canvas.height / 2);
+        return;
+    }
+
+    reasonChart = new Chart(ctx, {
+        type: 'doughnut',
+        data: {
+            labels: reasonStats.map(item => item.reason),
+            datasets: [{
+                data: reasonStats.map(item => item.count),
+                backgroundColor: [
+                    '#3b82f6', '#ef4444', '#f59e0b', '#10b981', '#8b5cf6',
+                    '#f97316', '#06b6d4', '#84cc16', '#ec4899', '#6b7280'
+                ],
+                borderWidth: 2,
+                borderColor: '#ffffff'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom',
+                    labels: {
+                        boxWidth: 12,
+                        font: {
+                            size: 11
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+async function loadReportsData() {
+    try {
+        const response = await bootstrapFetch('reports_data', '/api/feedback-reports-data');
+        const result = await response.json();
+
+        if (!response.ok) {
+            if (response.status === 401) {
+                window.location.href = '/login';
+                return;
+            }
+            document.getElementById('feedback-loading').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error loading data: ${result.error}
+                </div>
+            `;
+            return;
+        }
+
+        allFeedbackData = result.data;
+        displayFeedbackData(allFeedbackData);
+
+        document.getElementById('feedback-loading').style.display = 'none';
+        document.getElementById('feedback-data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error loading reports data:', error);
+        if (error.message.includes('401')) {
+            window.location.href = '/login';
+            return;
+        }
+        document.getElementById('feedback-loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading data. Please try again.
+            </div>
+        `;
+    }
+}
+
+// Both tables render only the rows in view; search and sort run in a worker
+function initializeTables() {
+    feedbackTable = new TableView({
+        scroller: document.getElementById('feedback-scroll'),
+        tbody: document.getElementById('feedback-table-body'),
+        header: document.querySelector('#feedback-data-container thead'),
+        search: document.getElementById('feedback-search'),
+        columns: 10,
+        renderRow: renderFeedbackRow,
+        emptyHtml: `
+            <tr>
+                <td colspan="10" class="text-center py-5">
+                    <i class="fas fa-info-circle text-muted me-2"></i>
+                    No feedback reports found for the selected criteria
+                </td>
+            </tr>
+        `,
+        workerUrl: TABLE_WORKER_URL,
+        searchFields: ['user_email', 'reason', 'comments', 'po_no', 'material_description', 'state', 'plant_name'],
+        sortFields: ['user_email', 'reason', 'po_no', 'material_description', 'fill_rate_percent',
+                     'state', 'plant_name', 'feedback_date'],
+        onChange: function(rows, total) {
+            document.getElementById('record-count').textContent = recordCountText(rows.length, total);
+        }
+    });
+
+    plantTable = new TableView({
+        scroller: document.getElementById('plant-scroll'),
+        tbody: document.getElementById('plant-stats-body'),
+        header: document.querySelector('#plant-data-container thead'),
+        search: document.getElementById('plant-search'),
+        columns: 7,
+        renderRow: renderPlantRow,
+        emptyHtml: `
+            <tr>
+                <td colspan="7" class="text-center py-5">
+                    <i class="fas fa-info-circle text-muted me-2"></i>
+                    No plant feedback statistics available
+                </td>
+            </tr>
+        `,
+        workerUrl: TABLE_WORKER_URL,
+        searchFields: ['plant_name', 'state', 'date'],
+        sortFields: ['plant_name', 'state', 'date', 'total_records', 'feedback_provided',
+                     'pending_feedback', 'completion'],
+        onChange: function(rows, total) {
+            document.getElementById('plant-record-count').textContent = recordCountText(rows.length, total);
+            displayPlantTotals(rows);
+        }
+    });
+}
+
+function displayFeedbackData(data) {
+    return feedbackTable.load(data);
+}
+
+function renderFeedbackRow(record, index) {
+    const userDisplay = record.user_email.split('@')[0]; // Show only username part
+    const commentsDisplay = record.comments || 'No comments';
+
+    return `
+        <tr>
+            <td><span class="fw-bold text-primary">${index + 1}</span></td>
+            <td>
+                <span class="user-badge" title="${record.user_email}">
+                    <i class="fas fa-user me-1"></i>${userDisplay}
+                </span>
+            </td>
+            <td>
+                <span class="reason-badge">
+                    ${record.reason}
+                </span>
+            </td>
+            <td>
+                <div class="text-truncate-custom" title="${commentsDisplay}">
+                    ${commentsDisplay}
+                </div>
+            </td>
+            <td><span class="fw-bold">${record.po_no}</span></td>
+            <td>
+                <div class="text-truncate-custom" title="${record.material_description}">
+                    ${record.material_description}
+                </div>
+            </td>
+            <td>
+                <span class="fill-rate-badge fill-rate-low">
+                    ${record.fill_rate_percent.toFixed(1)}%
+                </span>
+            </td>
+            <td><small class="text-muted">${record.state}</small></td>
+            <td><small class="text-muted">${record.plant_name}</small></td>
+            <td><small class="text-muted">${record.feedback_date}</small></td>
+        </tr>
+    `;
+}
+
+async function applyFilters() {
+    const userFilter = document.getElementById('user-filter').value;
+    const reasonFilter = document.getElementById('reason-filter').value;
+    const stateFilter = document.getElementById('state-filter').value;
+    const plantFilter = document.getElementById('plant-filter').value;
+    const dateFromFilter = document.getElementById('date-from-filter').value;
+    const dateToFilter = document.getElementById('date-to-filter').value;
+
+    currentFilters = {
+        user: userFilter,
+        reason: reasonFilter,
+        state: stateFilter,
+        plant: plantFilter,
+        dateFrom: dateFromFilter,
+        dateTo: dateToFilter
+    };
+
+    // Apply filters to both tables
+    await applyFeedbackFilters();
+    await applyPlantFilters();
+}
+
+async function applyFeedbackFilters() {
+    try {
+        document.getElementById('feedback-loading').style.display = 'block';
+        document.getElementById('feedback-data-container').style.display = 'none';
+
+        let url = '/api/feedback-reports-data?';
+        const params = new URLSearchParams();
+
+        if (currentFilters.user) params.append('user', currentFilters.user);
+        if (currentFilters.reason) params.append('reason', currentFilters.reason);
+        if (currentFilters.state) params.append('state', currentFilters.state);
+        if (currentFilters.plant) params.append('plant', currentFilters.plant);
+        if (currentFilters.dateFrom) params.append('date_from', currentFilters.dateFrom);
+        if (currentFilters.dateTo) params.append('date_to', currentFilters.dateTo);
+
+        url += params.toString();
+
+        const response = await fetch(url);
+        const result = await response.json();
+
+        if (!response.ok) {
+            if (response.status === 401) {
+                window.location.href = '/login';
+                return;
+            }
+            document.getElementById('feedback-loading').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error loading filtered data: ${result.error}
+                </div>
+            `;
+            return;
+        }
+
+        allFeedbackData = result.data;
+        displayFeedbackData(allFeedbackData);
+
+        document.getElementById('feedback-loading').style.display = 'none';
+        document.getElementById('feedback-data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error applying feedback filters:', error);
+        document.getElementById('feedback-loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading filtered data. Please try again.
+            </div>
+        `;
+    }
+}
+
+async function applyPlantFilters() {
+    try {
+        document.getElementById('plant-loading').style.display = 'block';
+        document.getElementById('plant-data-container').style.display = 'none';
+
+        let url = '/api/plant-feedback-stats?';
+        const params = new URLSearchParams();
+
+        if (currentFilters.state) params.append('state', currentFilters.state);
+        if (currentFilters.plant) params.append('plant', currentFilters.plant);
+        if (currentFilters.dateFrom) params.append('date_from', currentFilters.dateFrom);
+        if (currentFilters.dateTo) params.append('date_to', currentFilters.dateTo);
+
+        url += params.toString();
+
+        const response = await fetch(url);
+        const result = await response.json();
+
+        if (!response.ok) {
+            document.getElementById('plant-loading').innerHTML = `
+                <div class="alert alert-warning">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error loading plant data: ${result.error}
+                </div>
+            `;
+            return;
+        }
+
+        allPlantData = result.plant_stats || [];
+        displayPlantData(allPlantData);
+
+        document.getElementById('plant-loading').style.display = 'none';
+        document.getElementById('plant-data-container').style.display = 'block';
+
+    } catch (error) {
+        console.error('Error applying plant filters:', error);
+        document.getElementById('plant-loading').innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Error loading plant data. Please try again.
+            </div>
+        `;
+    }
+}
+
+function clearFilters() {
+    document.getElementById('user-filter').value = '';
+    document.getElementById('reason-filter').value = '';
+    document.getElementById('state-filter').value = '';
+    document.getElementById('plant-filter').value = '';
+    document.getElementById('date-from-filter').value = '';
+    document.getElementById('date-to-filter').value = '';
+
+    currentFilters = {};
+    loadReportsData();
+    loadPlantFeedbackStats();
+}
+
+function setThisWeekFilter() {
+    const today = new Date();
+    const firstDay = new Date(today.setDate(today.getDate() - today.getDay()));
+    const lastDay = new Date(today.setDate(today.getDate() - today.getDay() + 6));
+
+    document.getElementById('date-from-filter').value = firstDay.toISOString().split('T')[0];
+    document.getElementById('date-to-filter').value = lastDay.toISOString().split('T')[0];
+
+    applyFilters();
+}
+
+function setThisMonthFilter() {
+    const today = new Date();
+    const firstDay = new Date(today.getFullYear(), today.getMonth(), 1);
+    const lastDay = new Date(today.getFullYear(), today.getMonth() + 1, 0);
+
+    document.getElementById('date-from-filter').value = firstDay.toISOString().split('T')[0];
+    document.getElementById('date-to-filter').value = lastDay.toISOString().split('T')[0];
+
+    applyFilters();
+}
+
+async function downloadFeedbackReports(event) {
+    event.preventDefault();
+
+    try {
+        const downloadBtn = document.getElementById('download-feedback-btn');
+        const originalText = downloadBtn.innerHTML;
+
+        downloadBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Generating...';
+        downloadBtn.style.pointerEvents = 'none';
+
+        let url = '/api/download-feedback-reports';
+        const params = new URLSearchParams();
+
+        if (currentFilters.user) params.append('user', currentFilters.user);
+        if (currentFilters.reason) params.append('reason', currentFilters.reason);
+        if (currentFilters.state) params.append('state', currentFilters.state);
+        if (currentFilters.plant) params.append('plant', currentFilters.plant);
+        if (currentFilters.dateFrom) params.append('date_from', currentFilters.dateFrom);
+        if (currentFilters.dateTo) params.append('date_to', currentFilters.dateTo);
+
+        if (params.toString()) {
+            url += '?' + params.toString();
+        }
+
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = '';
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+
+        setTimeout(() => {
+            downloadBtn.innerHTML = originalText;
+            downloadBtn.style.pointerEvents = 'auto';
+        }, 2000);
+
+    } catch (error) {
+        console.error('Download error:', error);
+        alert('Error downloading feedback reports. Please try again.');
+
+        const downloadBtn = document.getElementById('download-feedback-btn');
+        downloadBtn.innerHTML = '<i class="fas fa-download me-1"></i>Download Excel';
+        downloadBtn.style.pointerEvents = 'auto';
+    }
+}
+
+async function downloadPlantReports(event) {
+    event.preventDefault();
+
+    try {
+        const downloadBtn = document.getElementById('download-plant-btn');
+        const originalText = downloadBtn.innerHTML;
+
+        downloadBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Generating...';
+        downloadBtn.style.pointerEvents = 'none';
+
+        let url = '/api/download-plant-feedback-stats';
+        const params = new URLSearchParams();
+
+        if (currentFilters.state) params.append('state', currentFilters.state);
+        if (currentFilters.plant) params.append('plant', currentFilters.plant);
+        if (currentFilters.dateFrom) params.append('date_from', currentFilters.dateFrom);
+        if (currentFilters.dateTo) params.append('date_to', currentFilters.dateTo);
+
+        if (params.toString()) {
+            url += '?' + params.toString();
+        }
+
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = '';
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+
+        setTimeout(() => {
+            downloadBtn.innerHTML = originalText;
+            downloadBtn.style.pointerEvents = 'auto';
+        }, 2000);
+
+    } catch (error) {
+        console.error('Download error:', error);
+        alert('Error downloading plant reports. Please try again.');
+
+        const downloadBtn = document.getElementById('download-plant-btn');
+        downloadBtn.innerHTML = '<i class="fas fa-download me-1"></i>Download Excel';
+        downloadBtn.style.pointerEvents = 'auto';
+    }
+}
+
+// Keyboard shortcuts
+document.addEventListener('keydown', function(e) {
+    if ((e.ctrlKey || e.metaKey) && e.key === 'Enter') {
+        applyFilters();
+    }
+    if (e.key === 'Escape') {
+        clearFilters();
+    }
+});
@@ -0,0 +1,71 @@
+// Free-text filtering and sorting of table rows, off the main thread.
+//
+// Loaded with new Worker(...) it answers two messages:
+//   {type: 'load', columns: {field: [values...]}, search: [fields]}
+//   {type: 'query', seq, search: 'text', sortKey: 'field', sortDir: 1|-1}
+//     -> {seq, indices: Int32Array}  (row positions in display order)
+// Loaded as a page script it only defines the functions, so RowQuery can run
+// the same code inline when workers are unavailable.
+
+function buildHaystack(columns, searchFields) {
+    const fields = searchFields.filter(field => columns[field]);
+    const length = fields.length ? columns[fields[0]].length : 0;
+    const haystack = new Array(length);
+    for (let i = 0; i < length; i++) {
+        let text = '';
+        for (const field of fields) {
+            const value = columns[field][i];
+            if (value !== null && value !== undefined) text += String(value).toLowerCase() + '\u0001';
+        }
+        haystack[i] = text;
+    }
+    return haystack;
+}
+
+function compareValues(a, b) {
+    if (a === b) return 0;
+    if (a === null || a === undefined || a === '') return 1;
+    if (b === null || b === undefined || b === '') return -1;
+    if (typeof a === 'number' && typeof b === 'number') return a - b;
+    const left = String(a).toLowerCase();
+    const right = String(b).toLowerCase();
+    return left < right ? -1 : left > right ? 1 : 0;
+}
+
+function queryRows(columns, haystack, length, search, sortKey, sortDir) {
+    const needle = (search || '').trim().toLowerCase();
+    let indices = [];
+    for (let i = 0; i < length; i++) {
+        if (!needle || haystack[i].includes(needle)) indices.push(i);
+    }
+    const values = sortKey ? columns[sortKey] : null;
+    if (values) {
+        const direction = sortDir < 0 ? -1 : 1;
+        // Blank values stay last in both directions; ties keep the server order
+        indices.sort((a, b) => {
+            const blankA = values[a] === null || values[a] === undefined || values[a] === '';
+            const blankB = values[b] === null || values[b] === undefined || values[b] === '';
+            if (blankA !== blankB) return blankA ? 1 : -1;
+            return direction * compareValues(values[a], values[b]) || a - b;
+        });
+    }
+    return Int32Array.from(indices);
+}
+
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    let columns = {};
+    let haystack = [];
+    let length = 0;
+
+    self.onmessage = function(event) {
+        const message = event.data;
+        if (message.type === 'load') {
+            columns = message.columns;
+            haystack = buildHaystack(columns, message.search);
+            length = message.length;
+        } else if (message.type === 'query') {
+            const indices = queryRows(columns, haystack, length, message.search, message.sortKey, message.sortDir);
+            self.postMessage({seq: message.seq, indices: indices}, [indices.buffer]);
+        }
+    };
+}
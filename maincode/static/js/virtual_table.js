@@ -0,0 +1,227 @@
+// Windowed table rendering shared by the dashboard and reports pages.
+//
+// VirtualTable keeps only the rows in (and just around) the viewport in the
+// DOM, between two spacer rows that stand in for the rest, and re-renders
+// that window as the user scrolls. Rows are rebuilt from the data array, so
+// per-row state (selection, a chosen reason) must live in page variables,
+// and row listeners are attached once to the tbody (event delegation).
+//
+// RowQuery sends the searchable/sortable columns to table_worker.js and
+// resolves each query with the matching rows in display order; it falls
+// back to running the same functions inline if the worker cannot start.
+// TableView ties the two to a sortable header and a search box.
+
+class VirtualTable {
+    constructor(options) {
+        this.scroller = options.scroller;
+        this.tbody = options.tbody;
+        this.columns = options.columns;
+        this.renderRow = options.renderRow;
+        this.emptyHtml = options.emptyHtml || '';
+        this.rowHeight = options.rowHeight || 56;
+        this.overscan = options.overscan || 10;
+        this.rows = [];
+        this.range = null;
+        this.measured = false;
+        this.frame = null;
+
+        this.scroller.addEventListener('scroll', () => this.schedule(), {passive: true});
+        window.addEventListener('resize', () => this.schedule());
+    }
+
+    setRows(rows) {
+        this.rows = rows;
+        this.scroller.scrollTop = 0;
+        this.refresh();
+    }
+
+    // Re-render the current window, e.g. after a row's state changed
+    refresh() {
+        this.range = null;
+        this.render();
+    }
+
+    schedule() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    render() {
+        if (this.rows.length === 0) {
+            this.tbody.innerHTML = this.emptyHtml;
+            this.range = null;
+            return;
+        }
+
+        const viewport = this.scroller.clientHeight || window.innerHeight;
+        const first = Math.max(0, Math.floor(this.scroller.scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(this.rows.length, first + Math.ceil(viewport / this.rowHeight) + 2 * this.overscan);
+        if (this.measured && this.range && this.range[0] === first && this.range[1] === last) return;
+        this.range = [first, last];
+
+        const html = [this.spacer(first * this.rowHeight)];
+        for (let i = first; i < last; i++) {
+            html.push(this.renderRow(this.rows[i], i));
+        }
+        html.push(this.spacer((this.rows.length - last) * this.rowHeight));
+        this.tbody.innerHTML = html.join('');
+
+        if (!this.measured) this.measure();
+    }
+
+    // Use the real average row height once the table is visible
+    measure() {
+        const rendered = this.tbody.querySelectorAll('tr:not(.virtual-spacer)');
+        let total = 0;
+        rendered.forEach(row => total += row.offsetHeight);
+        if (!rendered.length || total === 0) return;
+
+        this.measured = true;
+        const height = total / rendered.length;
+        if (Math.abs(height - this.rowHeight) > 1) {
+            this.rowHeight = height;
+            this.refresh();
+        }
+    }
+
+    spacer(height) {
+        if (height <= 0) return '';
+        return `<tr class="virtual-spacer" aria-hidden="true"><td colspan="${this.columns}" style="height: ${height}px"></td></tr>`;
+    }
+}
+
+class RowQuery {
+    constructor(workerUrl, searchFields, sortFields) {
+        this.searchFields = searchFields;
+        this.fields = Array.from(new Set(searchFields.concat(sortFields)));
+        this.rows = [];
+        this.seq = 0;
+        this.pending = new Map();
+        this.worker = null;
+
+        if (window.Worker && workerUrl) {
+            try {
+                this.worker = new Worker(workerUrl);
+                this.worker.onmessage = event => this.receive(event.data);
+                this.worker.onerror = () => this.fallBack();
+            } catch (error) {
+                this.worker = null;
+            }
+        }
+    }
+
+    columnsOf(rows) {
+        const columns = {};
+        this.fields.forEach(field => {
+            columns[field] = rows.map(row => row[field]);
+        });
+        return columns;
+    }
+
+    load(rows) {
+        this.rows = rows;
+        this.columns = null;
+        this.haystack = null;
+        if (this.worker) {
+            this.worker.postMessage({type: 'load', columns: this.columnsOf(rows), search: this.searchFields, length: rows.length});
+        }
+    }
+
+    // Resolves with the matching rows in display order, or null if a newer query superseded it
+    query(search, sortKey, sortDir) {
+        const seq = ++this.seq;
+        this.pending.forEach(resolve => resolve(null));
+        this.pending.clear();
+
+        if (!this.worker) {
+            return Promise.resolve(this.queryInline(search, sortKey, sortDir));
+        }
+        return new Promise(resolve => {
+            this.pending.set(seq, resolve);
+            this.lastQuery = [search, sortKey, sortDir];
+            this.worker.postMessage({type: 'query', seq: seq, search: search, sortKey: sortKey, sortDir: sortDir});
+        });
+    }
+
+    receive(message) {
+        const resolve = this.pending.get(message.seq);
+        if (!resolve) return;
+        this.pending.delete(message.seq);
+        resolve(Array.from(message.indices, i => this.rows[i]));
+    }
+
+    queryInline(search, sortKey, sortDir) {
+        if (!this.columns) {
+            this.columns = this.columnsOf(this.rows);
+            this.haystack = buildHaystack(this.columns, this.searchFields);
+        }
+        const indices = queryRows(this.columns, this.haystack, this.rows.length, search, sortKey, sortDir);
+        return Array.from(indices, i => this.rows[i]);
+    }
+
+    fallBack() {
+        console.warn('Table worker unavailable, filtering on the page instead');
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        this.pending.forEach(resolve => resolve(this.queryInline(...(this.lastQuery || ['', null, 1]))));
+        this.pending.clear();
+    }
+}
+
+// A VirtualTable fed through a RowQuery, with click-to-sort headers (th[data-sort])
+// and an optional search box. onChange(rows, total) runs after every re-query.
+class TableView {
+    constructor(options) {
+        this.table = new VirtualTable(options);
+        this.query = new RowQuery(options.workerUrl, options.searchFields, options.sortFields);
+        this.search = options.search || null;
+        this.onChange = options.onChange || (() => {});
+        this.sort = {key: null, dir: 1};
+        this.rows = [];
+        this.total = 0;
+
+        if (options.header) {
+            options.header.addEventListener('click', event => {
+                const th = event.target.closest('th[data-sort]');
+                if (!th) return;
+                const key = th.dataset.sort;
+                this.sort = {key: key, dir: this.sort.key === key ? -this.sort.dir : 1};
+                options.header.querySelectorAll('th[data-sort]').forEach(h => h.classList.remove('sort-asc', 'sort-desc'));
+                th.classList.add(this.sort.dir > 0 ? 'sort-asc' : 'sort-desc');
+                this.update();
+            });
+        }
+        if (this.search) {
+            let timer = null;
+            this.search.addEventListener('input', () => {
+                clearTimeout(timer);
+                timer = setTimeout(() => this.update(), 150);
+            });
+        }
+    }
+
+    load(rows) {
+        this.total = rows.length;
+        this.query.load(rows);
+        return this.update();
+    }
+
+    async update() {
+        const rows = await this.query.query(this.search ? this.search.value : '', this.sort.key, this.sort.dir);
+        if (rows === null) return;
+        this.rows = rows;
+        this.table.setRows(rows);
+        this.onChange(rows, this.total);
+    }
+
+    refresh() {
+        this.table.refresh();
+    }
+}
+
+function recordCountText(shown, total) {
+    return shown === total ? `${total} records` : `${shown} of ${total} records`;
+}
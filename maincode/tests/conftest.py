@@ -0,0 +1,23 @@
+"""Shared fixtures: a small stand-in database (benchmarks/localdb.py) and a signed-in client."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def db_path(tmp_path_factory):
+    from benchmarks import localdb
+
+    path = str(tmp_path_factory.mktemp('db') / 'gap.sqlite')
+    localdb.build_database(path, rows=3000, seed=1)
+    return path
+
+
+@pytest.fixture(scope='session')
+def client(db_path):
+    from benchmarks.run import create_client
+
+    return create_client(db_path)
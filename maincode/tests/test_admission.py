@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+import admission
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def _in_thread(controller, user, outcome):
+    def run():
+        try:
+            outcome[user] = controller.acquire(user)
+        except admission.Rejected as e:
+            outcome[user] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_per_user_limit():
+    controller = admission.AdmissionController(max_heavy=4, max_per_user=1, max_queue=4, queue_timeout=1)
+    ticket = controller.acquire('a')
+    with pytest.raises(admission.Rejected) as rejected:
+        controller.acquire('a')
+    assert rejected.value.reason == 'user_limit'
+    assert rejected.value.retry_after >= 1
+    controller.acquire('b')
+    controller.release(ticket)
+    controller.release(controller.acquire('a'))
+
+
+def test_global_limit_queues_then_rejects():
+    controller = admission.AdmissionController(max_heavy=2, max_per_user=1, max_queue=1, queue_timeout=5)
+    running = [controller.acquire('a'), controller.acquire('b')]
+    outcome = {}
+    waiter = _in_thread(controller, 'c', outcome)
+    _wait_for(lambda: controller.stats()['queue_depth'] == 1)
+
+    with pytest.raises(admission.Rejected) as rejected:
+        controller.acquire('d')
+    assert rejected.value.reason == 'queue_full'
+    assert 'c' not in outcome
+
+    controller.release(running[0])
+    waiter.join(5)
+    assert isinstance(outcome['c'], admission._Ticket)
+    stats = controller.stats()
+    assert (stats['running'], stats['queue_depth']) == (2, 0)
+    assert stats['totals']['rejected_queue_full'] == 1
+
+
+def test_queue_is_first_in_first_out():
+    controller = admission.AdmissionController(max_heavy=1, max_per_user=1, max_queue=4, queue_timeout=5)
+    ticket = controller.acquire('a')
+    outcome = {}
+    threads = []
+    for depth, user in enumerate(['b', 'c', 'd'], start=1):
+        threads.append(_in_thread(controller, user, outcome))
+        _wait_for(lambda: controller.stats()['queue_depth'] == depth)
+
+    order = []
+    for user in ['b', 'c', 'd']:
+        controller.release(ticket)
+        _wait_for(lambda: user in outcome)
+        order.append(user)
+        ticket = outcome[user]
+        assert controller.stats()['running'] == 1
+    controller.release(ticket)
+    for thread in threads:
+        thread.join(5)
+    assert order == ['b', 'c', 'd']
+    assert controller.stats()['by_user'] == {}
+
+
+def test_queue_timeout():
+    controller = admission.AdmissionController(max_heavy=1, max_per_user=1, max_queue=1, queue_timeout=0.1)
+    ticket = controller.acquire('a')
+    with pytest.raises(admission.Rejected) as rejected:
+        controller.acquire('b')
+    assert rejected.value.reason == 'timeout'
+    stats = controller.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['by_user'] == {'a': 1}
+    controller.release(ticket)
+    controller.release(controller.acquire('b'))
+
+
+def test_heavy_route_rejected_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(admission, 'controller',
+                        admission.AdmissionController(max_heavy=1, max_per_user=0, max_queue=1, queue_timeout=1))
+    response = client.get('/api/download-data')
+    assert response.status_code == 429
+    assert response.get_json()['reason'] == 'user_limit'
+    assert int(response.headers['Retry-After']) >= 1
+    # Light endpoints are never held back
+    assert client.get('/api/dashboard-stats').status_code == 200
+
+
+def test_heavy_route_releases_its_slot(client, monkeypatch):
+    monkeypatch.setattr(admission, 'controller', admission.AdmissionController(max_heavy=1, max_per_user=1))
+    for _ in range(2):
+        assert client.get('/api/download-feedback-reports').status_code in (200, 404)
+    stats = admission.controller.stats()
+    assert stats['running'] == 0
+    assert stats['totals']['completed'] == 2
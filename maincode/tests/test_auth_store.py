@@ -0,0 +1,83 @@
+import hashlib
+import threading
+
+import pytest
+
+from auth_store import InMemoryAuthStore
+
+
+def test_concurrent_attempts_get_distinct_counts():
+    store = InMemoryAuthStore(sweep_interval=0)
+    store.put_otp('a@heritagefoods.in', 'hash', ttl=60)
+    counts = []
+    barrier = threading.Barrier(8)
+
+    def attempt():
+        barrier.wait()
+        counts.append(store.increment_otp_attempts('a@heritagefoods.in'))
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(counts) == list(range(1, 9))
+
+
+def test_attempts_without_otp():
+    store = InMemoryAuthStore(sweep_interval=0)
+    assert store.increment_otp_attempts('nobody@heritagefoods.in') == 0
+    assert store.get_otp('nobody@heritagefoods.in') is None
+
+
+@pytest.fixture
+def auth_module(client, monkeypatch):
+    import auth
+
+    monkeypatch.setattr(auth, 'auth_store', InMemoryAuthStore(sweep_interval=0))
+    return auth
+
+
+def _put_otp(auth, email, otp):
+    auth.auth_store.put_otp(email, hashlib.sha256(f"{email}_{otp}".encode()).hexdigest(), ttl=600)
+
+
+def test_concurrent_guesses_check_at_most_three(client, auth_module):
+    email = 'guess@heritagefoods.in'
+    _put_otp(auth_module, email, '123456')
+    # Every request reads the OTP record before any of them goes on to check it
+    barrier = threading.Barrier(6)
+    get_otp = auth_module.auth_store.get_otp
+
+    def racing_get_otp(address):
+        record = get_otp(address)
+        barrier.wait(5)
+        return record
+
+    auth_module.auth_store.get_otp = racing_get_otp
+    statuses = []
+
+    def guess(otp):
+        response = client.application.test_client().post('/api/verify-otp', json={'email': email, 'otp': otp})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=guess, args=(f'{i:06d}',)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every compared (wrong) guess is counted against the login rate limit
+    compared = auth_module.auth_store.count_attempts(f"{email}_login", auth_module.RATE_LIMIT_WINDOW_SECONDS)
+    assert compared <= 3
+    assert statuses.count(401) <= 2
+    assert set(statuses) <= {401, 404, 429}
+
+
+def test_third_wrong_guess_locks_the_otp(client, auth_module):
+    email = 'wrong@heritagefoods.in'
+    _put_otp(auth_module, email, '123456')
+    verify = client.application.test_client()
+    statuses = [verify.post('/api/verify-otp', json={'email': email, 'otp': '000000'}).status_code
+                for _ in range(4)]
+    assert statuses == [401, 401, 429, 429]
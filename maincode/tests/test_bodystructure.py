@@ -0,0 +1,135 @@
+import base64
+import hashlib
+import os
+import quopri
+
+import pytest
+
+from po_ingest import bodystructure
+
+TEXT = b'("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 12 1 NIL NIL NIL NIL)'
+PDF = b'("application" "pdf" ("name" "po.pdf") NIL NIL "base64" 3000 NIL ("attachment" ("filename" "po.pdf")) NIL NIL)'
+RENAMED = (b'("application" "octet-stream" NIL NIL NIL "base64" 500 NIL '
+           b'("attachment" ("filename*" "utf-8\'\'PO%20copy.PDF")) NIL NIL)')
+IMAGE = b'("image" "png" ("name" "logo.png") "<logo>" NIL "base64" 800 NIL ("inline" NIL) NIL NIL)'
+ENVELOPE = b'("Wed, 5 Mar 2025 10:00:00 +0530" "PO_1" NIL NIL NIL NIL NIL NIL NIL "<1@spar>")'
+
+
+def _forwarded(body):
+    return b'("message" "rfc822" NIL NIL NIL "7bit" 4000 ' + ENVELOPE + b' ' + body + b' 60 NIL NIL NIL NIL)'
+
+
+def _fetch(uid, structure, subject=b'Subject: PO_4500012345\r\n\r\n'):
+    """imaplib's data for one UID FETCH (UID INTERNALDATE BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT)])"""
+    head = (f'{uid} (UID {uid} INTERNALDATE "05-Mar-2025 10:00:00 +0530" BODYSTRUCTURE ').encode()
+    return [(head + structure + b' BODY[HEADER.FIELDS (SUBJECT)] {%d}' % len(subject), subject), b')']
+
+
+def test_parse_fetch_response():
+    structure = b'(' + TEXT + PDF + b' "mixed" ("boundary" "b1") NIL NIL NIL)'
+    messages = bodystructure.parse_fetch_response(_fetch(42, structure) + _fetch(43, PDF))
+    assert sorted(messages) == [42, 43]
+    items = messages[42]
+    assert items['UID'] == '42'
+    assert items['INTERNALDATE'] == b'05-Mar-2025 10:00:00 +0530'
+    assert items['BODY[HEADER.FIELDS (SUBJECT)]'] == b'Subject: PO_4500012345\r\n\r\n'
+    assert b'mixed' in items['BODYSTRUCTURE']
+
+
+def _parts(structure):
+    tree = bodystructure.parse_fetch_response(_fetch(1, structure))[1]['BODYSTRUCTURE']
+    return list(bodystructure.iter_parts(tree))
+
+
+def test_iter_parts_sections_and_filenames():
+    related = b'(' + TEXT + IMAGE + b' "related" NIL NIL NIL NIL)'
+    structure = b'(' + related + PDF + RENAMED + b' "mixed" ("boundary" "b1") NIL NIL NIL)'
+    assert [(p['section'], p['content_type'], p['encoding'], p['size'], p['filename'], p['disposition'])
+            for p in _parts(structure)] == [
+        ('1.1', 'text/plain', '7bit', 12, '', ''),
+        ('1.2', 'image/png', 'base64', 800, 'logo.png', 'inline'),
+        ('2', 'application/pdf', 'base64', 3000, 'po.pdf', 'attachment'),
+        ('3', 'application/octet-stream', 'base64', 500, 'PO copy.PDF', 'attachment'),
+    ]
+
+
+def test_single_part_message():
+    assert [(p['section'], p['filename']) for p in _parts(PDF)] == [('1', 'po.pdf')]
+
+
+def test_forwarded_message_parts():
+    nested = b'(' + TEXT + PDF + b' "mixed" NIL NIL NIL NIL)'
+    structure = b'(' + TEXT + _forwarded(nested) + _forwarded(PDF) + b' "mixed" NIL NIL NIL NIL)'
+    assert [(p['section'], p['content_type']) for p in _parts(structure)] == [
+        ('1', 'text/plain'),
+        ('2.1', 'text/plain'),
+        ('2.2', 'application/pdf'),
+        # a single-part encapsulated body is part <n>.1, not the whole message
+        ('3.1', 'application/pdf'),
+    ]
+
+
+def test_pdf_parts():
+    structure = b'(' + TEXT + PDF + RENAMED + IMAGE + b' "mixed" NIL NIL NIL NIL)'
+    tree = bodystructure.parse_fetch_response(_fetch(1, structure))[1]['BODYSTRUCTURE']
+    assert [p['section'] for p in bodystructure.pdf_parts(tree)] == ['2', '3']
+
+
+PAYLOAD = bytes(range(256)) * 40 + b'%PDF-1.4 = end'
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class Sink:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+
+@pytest.mark.parametrize('encoding, encoded', [
+    ('base64', base64.encodebytes(PAYLOAD)),
+    ('quoted-printable', quopri.encodestring(PAYLOAD)),
+    ('7bit', PAYLOAD),
+    (None, PAYLOAD),
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 77, 1000, 100000])
+def test_stream_decoder_chunk_boundaries(encoding, encoded, chunk_size):
+    sink = Sink()
+    decoder = bodystructure.StreamDecoder(sink, encoding)
+    for chunk in _chunks(encoded, chunk_size):
+        decoder.feed(chunk)
+    assert decoder.close() == len(PAYLOAD)
+    assert sink.data == PAYLOAD
+
+
+def test_stream_decoder_unpadded_base64():
+    sink = Sink()
+    decoder = bodystructure.StreamDecoder(sink, 'BASE64')
+    decoder.feed(base64.b64encode(b'%PDF-1.7').rstrip(b'='))
+    assert decoder.close() == 8
+    assert sink.data == b'%PDF-1.7'
+
+
+def test_stream_to_file(tmp_path):
+    path = str(tmp_path / 'po.part')
+    written, sha256 = bodystructure.stream_to_file(_chunks(base64.encodebytes(PAYLOAD), 500), 'base64', path)
+    assert written == len(PAYLOAD)
+    assert sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    with open(path, 'rb') as f:
+        assert f.read() == PAYLOAD
+
+
+def test_stream_to_file_removes_partial_file(tmp_path):
+    path = str(tmp_path / 'po.part')
+
+    def dropped():
+        yield base64.encodebytes(PAYLOAD[:300])
+        raise ConnectionError('connection dropped')
+
+    with pytest.raises(ConnectionError):
+        bodystructure.stream_to_file(dropped(), 'base64', path)
+    assert not os.path.exists(path)
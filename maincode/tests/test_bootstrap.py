@@ -0,0 +1,43 @@
+import pytest
+
+import admission
+from benchmarks.run import BENCH_USER
+from routes.bootstrap_routes import PAGES
+
+
+@pytest.mark.parametrize('page', sorted(PAGES))
+def test_parts_match_their_endpoints(client, page):
+    response = client.get(f'/api/bootstrap/{page}')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert set(payload['parts']) == set(PAGES[page])
+    assert set(payload['status'].values()) == {200}
+    if page == 'dashboard':
+        assert payload['parts']['filter_options'] == client.get('/api/filter-options').get_json()
+
+
+def test_parts_run_the_request_hooks(client, monkeypatch):
+    controller = admission.AdmissionController(max_heavy=2, max_per_user=1, max_queue=1, queue_timeout=1)
+    monkeypatch.setattr(admission, 'controller', controller)
+    monkeypatch.setattr(admission, 'is_heavy', lambda path: path == '/api/filter-options')
+
+    # Admitted: the part takes a slot and teardown gives it back
+    payload = client.get('/api/bootstrap/dashboard').get_json()
+    assert payload['status']['filter_options'] == 200
+    stats = controller.stats()
+    assert (stats['running'], stats['totals']['admitted'], stats['totals']['completed']) == (0, 1, 1)
+
+    # Over the per-user limit: the part gets the admission hook's 429
+    ticket = controller.acquire(BENCH_USER)
+    try:
+        payload = client.get('/api/bootstrap/dashboard').get_json()
+    finally:
+        controller.release(ticket)
+    assert payload['status'] == {'filter_options': 429, 'data': 200}
+    assert payload['parts']['filter_options']['reason'] == 'user_limit'
+
+
+def test_unknown_page(client):
+    response = client.get('/api/bootstrap/nowhere')
+    assert response.status_code == 404
+    assert response.get_json()['pages'] == sorted(PAGES)
@@ -0,0 +1,89 @@
+from collections import Counter
+
+import pytest
+
+import actionable
+
+
+@pytest.fixture
+def snapshot(client, monkeypatch, tmp_path):
+    snapshot = actionable.ActionableSnapshot(root=str(tmp_path))
+    monkeypatch.setattr(actionable, 'snapshot', snapshot)
+    return snapshot
+
+
+def _facet_values(row):
+    return {
+        'state': row['state'],
+        'plant': row['plant_name'],
+        'material': row['material_description'],
+        'month': row['delivery_date'][:7] or None,
+        'feedback': 'provided' if row['has_feedback'] else 'pending',
+    }
+
+
+def _expected(rows, selected):
+    """Facet counts worked out row by row from the listing"""
+    values = [_facet_values(row) for row in rows]
+
+    def matches(v, facets):
+        return all(v[facet] == value for facet, value in facets.items())
+
+    facets = {}
+    for facet in actionable.FACETS:
+        others = {name: value for name, value in selected.items() if name != facet}
+        counts = Counter(v[facet] for v in values if matches(v, others) and v[facet] is not None)
+        facets[facet] = dict(counts)
+    return {'total': sum(1 for v in values if matches(v, selected)), 'facets': facets}
+
+
+def _selections(rows):
+    first = _facet_values(rows[0])
+    return [
+        {},
+        {'state': first['state']},
+        {'state': first['state'], 'feedback': 'pending'},
+        {'plant': first['plant'], 'month': first['month']},
+        {'material': first['material'], 'feedback': 'provided'},
+        {'state': 'Nowhere'},
+    ]
+
+
+def test_facet_counts_match_the_listing(snapshot):
+    rows = snapshot.listing(snapshot.threshold)
+    assert rows
+    for selected in _selections(rows):
+        assert snapshot.facet_counts(snapshot.threshold, selected) == _expected(rows, selected), selected
+
+
+def test_date_range_applies_to_every_facet(snapshot):
+    in_range = snapshot.listing(snapshot.threshold, date_from='2025-02-01', date_to='2025-03-31')
+    selected = {'feedback': 'pending'}
+    counts = snapshot.facet_counts(snapshot.threshold, selected, '2025-02-01', '2025-03-31')
+    assert counts == _expected(in_range, selected)
+    assert set(counts['facets']['month']) <= {'2025-02', '2025-03'}
+
+
+def test_faceted_counts_route(client, snapshot):
+    rows = snapshot.listing(snapshot.threshold)
+    state = _facet_values(rows[0])['state']
+    response = client.get('/api/faceted-counts', query_string={'state': state, 'feedback': 'pending'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body.pop('threshold') == snapshot.threshold
+    assert body == _expected(rows, {'state': state, 'feedback': 'pending'})
+
+    other = client.get('/api/faceted-counts', query_string={'threshold': 50})
+    assert other.status_code == 400
+
+
+def test_submitted_feedback_moves_between_statuses(client):
+    # The shared snapshot, so later tests see the submission too
+    snapshot = actionable.snapshot
+    before = snapshot.facet_counts(snapshot.threshold)['facets']['feedback']
+    record = next(row for row in snapshot.listing(snapshot.threshold) if not row['has_feedback'])
+    response = client.post('/api/submit-feedback', json={'record_id': record['id'], 'reason': 'PO price issue'})
+    assert response.status_code == 200
+
+    after = snapshot.facet_counts(snapshot.threshold)['facets']['feedback']
+    assert after == {'pending': before['pending'] - 1, 'provided': before['provided'] + 1}
@@ -0,0 +1,90 @@
+import pytest
+
+import feedback_summary
+
+
+def _sql_stats(db_path):
+    """The summary the way the endpoint used to build it, one query per statistic"""
+    from benchmarks import localdb
+
+    conn = localdb.LocalConnection(db_path)
+    try:
+        cursor = conn.cursor()
+
+        def rows(sql):
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+        state = feedback_summary._STATE_SQL
+        return {
+            'total_feedback': rows("SELECT COUNT(*) FROM fill_rate_feedback")[0][0],
+            'unique_users': rows("SELECT COUNT(DISTINCT user_email) FROM fill_rate_feedback")[0][0],
+            'reasons': dict(rows("SELECT reason, COUNT(*) FROM fill_rate_feedback GROUP BY reason")),
+            'users': dict(rows("SELECT user_email, COUNT(*) FROM fill_rate_feedback GROUP BY user_email")),
+            'states': dict(rows(f"SELECT {state}, COUNT(*) FROM fill_rate_feedback GROUP BY {state}")),
+        }
+    finally:
+        conn.close()
+
+
+def test_summary_matches_sql(client, db_path):
+    stats = feedback_summary.FeedbackSummary().get()
+    expected = _sql_stats(db_path)
+    assert stats['total_feedback'] == expected['total_feedback'] > 0
+    assert stats['unique_users'] == expected['unique_users']
+    assert {r['reason']: r['count'] for r in stats['reason_stats']} == expected['reasons']
+    assert {r['user']: r['count'] for r in stats['user_stats']} == expected['users']
+    assert {r['state']: r['count'] for r in stats['state_stats']} == expected['states']
+    counts = [r['count'] for r in stats['reason_stats']]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_summarize_rolls_up_cells():
+    stats = feedback_summary.summarize([
+        ('Late', 'a@x', 'Goa', 2),
+        ('Late', None, feedback_summary.UNKNOWN_STATE, 1),
+        ('Price', 'a@x', 'Goa', 1),
+        ('Price', 'b@x', 'Kerala', 3),
+    ])
+    assert stats == {
+        'total_feedback': 7,
+        'unique_users': 2,
+        'reason_stats': [{'reason': 'Price', 'count': 4}, {'reason': 'Late', 'count': 3}],
+        'user_stats': [{'user': 'a@x', 'count': 3}, {'user': 'b@x', 'count': 3}, {'user': None, 'count': 1}],
+        'state_stats': [{'state': 'Goa', 'count': 3}, {'state': 'Kerala', 'count': 3},
+                        {'state': feedback_summary.UNKNOWN_STATE, 'count': 1}],
+    }
+    assert feedback_summary.summarize([]) == feedback_summary.EMPTY
+
+
+def test_cached_until_feedback_changes(client, monkeypatch):
+    summary = feedback_summary.FeedbackSummary()
+    monkeypatch.setattr(feedback_summary, 'summary', summary)
+    scans = []
+    summarize = feedback_summary.summarize
+
+    def counting_summarize(cells):
+        scans.append(1)
+        return summarize(cells)
+
+    monkeypatch.setattr(feedback_summary, 'summarize', counting_summarize)
+    first = client.get('/api/feedback-summary-stats').get_json()
+    assert client.get('/api/feedback-summary-stats').get_json() == first
+    assert len(scans) == 1
+
+    record = next(row for row in client.get('/api/low-fill-rate-data').get_json()['data'] if not row['has_feedback'])
+    response = client.post('/api/submit-feedback', json={'record_id': record['id'], 'reason': 'PO price issue'})
+    assert response.status_code == 200
+    after = client.get('/api/feedback-summary-stats').get_json()
+    assert len(scans) == 2
+    assert after['total_feedback'] == first['total_feedback'] + 1
+
+    summary.invalidate()
+    assert summary.get() == after
+    assert len(scans) == 3
+
+
+def test_database_down(client, monkeypatch):
+    monkeypatch.setattr(feedback_summary.data_routes, 'get_db_connection', lambda: None)
+    with pytest.raises(ConnectionError):
+        feedback_summary.FeedbackSummary().get()
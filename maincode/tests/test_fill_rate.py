@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+import fill_rate
+
+ENDPOINTS = ['/api/dashboard-stats', '/api/filter-options', '/api/plant-feedback-stats']
+
+
+@pytest.mark.parametrize('threshold', [0, 25, 50, 80, 95, 100])
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_histogram_counts_match_sql(client, monkeypatch, path, threshold):
+    monkeypatch.setattr(fill_rate, 'histogram', fill_rate.FillRateHistogram())
+    from_histogram = client.get(path, query_string={'threshold': threshold})
+    assert fill_rate.histogram.dashboard_counts(threshold) is not None
+
+    # Non-whole thresholds fall back to SQL; force that for whole ones too
+    monkeypatch.setattr(fill_rate.FillRateHistogram, 'usable', staticmethod(lambda value: False))
+    from_sql = client.get(path, query_string={'threshold': threshold})
+
+    assert from_histogram.status_code == from_sql.status_code == 200
+    assert from_histogram.get_json() == from_sql.get_json()
+
+
+def test_fractional_threshold_uses_sql(client):
+    assert fill_rate.histogram.dashboard_counts(72.5) is None
+    assert client.get('/api/dashboard-stats', query_string={'threshold': 72.5}).status_code == 200
+
+
+@pytest.mark.parametrize('value', ['abc', '-1', '101', 'nan'])
+@pytest.mark.parametrize('path', ENDPOINTS + ['/api/low-fill-rate-data', '/api/cube'])
+def test_invalid_threshold(client, path, value):
+    response = client.get(path, query_string={'threshold': value})
+    assert response.status_code == 400
+    assert 'threshold' in response.get_json()['error']
+
+
+def test_submitted_feedback_is_counted(client, monkeypatch):
+    monkeypatch.setattr(fill_rate, 'histogram', fill_rate.FillRateHistogram())
+    before = fill_rate.histogram.dashboard_counts(95)
+    assert fill_rate.histogram.dashboard_counts(95) == before
+
+    record = next(row for row in client.get('/api/low-fill-rate-data').get_json()['data'] if not row['has_feedback'])
+    response = client.post('/api/submit-feedback', json={'record_id': record['id'], 'reason': 'PO price issue'})
+    assert response.status_code == 200
+    assert fill_rate.histogram.dashboard_counts(95) == (before[0], before[1] + 1)
+
+
+def test_readers_are_not_blocked_by_a_rebuild(client, monkeypatch):
+    histogram = fill_rate.FillRateHistogram()
+    monkeypatch.setattr(fill_rate, 'histogram', histogram)
+    counts = histogram.dashboard_counts(95)
+
+    started, release = threading.Event(), threading.Event()
+    build_cells = histogram._build_cells
+
+    def slow_build(cursor):
+        started.set()
+        release.wait(5)
+        return build_cells(cursor)
+
+    monkeypatch.setattr(histogram, '_build_cells', slow_build)
+    monkeypatch.setattr(histogram, '_version', -1)
+    rebuild = threading.Thread(target=histogram.refresh)
+    rebuild.start()
+    assert started.wait(5)
+    # The previous cells keep answering while the rebuild scans
+    assert histogram.dashboard_counts(95) == counts
+    release.set()
+    rebuild.join(5)
+    assert histogram.dashboard_counts(95) == counts
@@ -0,0 +1,88 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from po_ingest import imap_client
+
+
+class FakeConnection:
+    """The bits of imaplib.IMAP4 that idle_wait() uses, over one end of a socket pair"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def readline(self):
+        return self.file.readline()
+
+
+@pytest.fixture
+def server():
+    client_sock, server_sock = socket.socketpair()
+    server_sock.settimeout(10)
+    yield FakeConnection(client_sock), server_sock
+    client_sock.close()
+    server_sock.close()
+
+
+def _answer(server_sock, *chunks, delay=0.0):
+    """Reply to IDLE with each chunk (after delay), then confirm the DONE"""
+    def run():
+        command = server_sock.recv(100)
+        tag = command.split()[0]
+        for chunk in chunks:
+            time.sleep(delay)
+            server_sock.sendall(chunk)
+        while b'DONE' not in server_sock.recv(100):
+            pass
+        server_sock.sendall(tag + b' OK IDLE terminated\r\n')
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_timeout_without_mail(server):
+    conn, server_sock = server
+    _answer(server_sock, b'+ idling\r\n')
+    started = time.time()
+    assert imap_client.idle_wait(conn, 0.2) is False
+    assert time.time() - started >= 0.2
+
+
+def test_new_mail_while_idling(server):
+    conn, server_sock = server
+    _answer(server_sock, b'+ idling\r\n', b'* 12 EXISTS\r\n', delay=0.05)
+    assert imap_client.idle_wait(conn, 5) is True
+
+
+def test_new_mail_reported_before_the_continuation(server):
+    conn, server_sock = server
+    _answer(server_sock, b'* 12 EXISTS\r\n+ idling\r\n')
+    started = time.time()
+    assert imap_client.idle_wait(conn, 5) is True
+    assert time.time() - started < 1
+
+
+def test_new_mail_buffered_with_the_continuation(server):
+    # Both lines arrive in one read, so the EXISTS sits in the file buffer where select() can't see it
+    conn, server_sock = server
+    _answer(server_sock, b'+ idling\r\n* 12 EXISTS\r\n')
+    started = time.time()
+    assert imap_client.idle_wait(conn, 5) is True
+    assert time.time() - started < 1
+
+
+def test_connection_closed_during_idle(server):
+    conn, server_sock = server
+
+    def hang_up():
+        server_sock.recv(100)
+        server_sock.sendall(b'+ idling\r\n* BYE shutting down\r\n')
+    threading.Thread(target=hang_up, daemon=True).start()
+    with pytest.raises(imap_client.imaplib.IMAP4.abort):
+        imap_client.idle_wait(conn, 5)
@@ -0,0 +1,84 @@
+import shutil
+
+import pytest
+
+import data_version
+import ingest
+from routes import data_routes
+
+
+@pytest.fixture
+def conn(db_path, tmp_path, monkeypatch):
+    from benchmarks import localdb
+
+    path = str(tmp_path / 'ingest.sqlite')
+    shutil.copyfile(db_path, path)
+    monkeypatch.setattr(data_routes, 'get_db_connection', lambda: localdb.LocalConnection(path))
+    monkeypatch.setattr(ingest, '_staging_ready', False)
+    return localdb.LocalConnection(path)
+
+
+def _row(conn, po_no, material):
+    cursor = conn.cursor()
+    cursor.execute("SELECT Material_Description, Fill_Rate_Percent, State FROM zepto_automation "
+                   "WHERE PO_No = ? AND Material = ?", (po_no, material))
+    return cursor.fetchall()
+
+
+def _version(conn):
+    return data_version.read_versions(conn).get('zepto_automation', {}).get('version', 0)
+
+
+def test_merge_updates_existing_and_inserts_new(conn, tmp_path):
+    cursor = conn.cursor()
+    cursor.execute("SELECT PO_No, Material, Material_Description, State FROM zepto_automation "
+                   "WHERE Fill_Rate_Percent IS NOT NULL ORDER BY ID")
+    po_no, material, description, state = cursor.fetchall()[0]
+    before = _version(conn)
+
+    batch = tmp_path / 'batch.csv'
+    batch.write_text(
+        "po_no,MATERIAL,Fill_Rate_Percent,Material_Description\n"
+        f"{po_no},{material},12.5,\n"
+        "NEW-1,M-1,40,first\n"
+        "NEW-1,M-1,55,second\n"
+    )
+    summary = ingest.ingest_file(conn, str(batch))
+
+    assert (summary['rows_received'], summary['inserted'], summary['updated']) == (3, 1, 1)
+    assert summary['data_version'] == before + 1 == _version(conn)
+    # Columns missing from the batch keep the stored value; the last staged row per key wins
+    assert _row(conn, po_no, material) == [(description, 12.5, state)]
+    assert _row(conn, 'NEW-1', 'M-1') == [('second', 55.0, None)]
+    cursor.execute(f"SELECT COUNT(*) FROM {ingest.STAGING_TABLE}")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_rejected_batch_changes_nothing(conn, tmp_path):
+    before = _version(conn)
+    batch = tmp_path / 'batch.csv'
+    batch.write_text("PO_No,Material\nNEW-2,M-2\n,M-3\n")
+    with pytest.raises(ValueError):
+        ingest.ingest_file(conn, str(batch), chunk_rows=1)
+
+    assert _row(conn, 'NEW-2', 'M-2') == []
+    assert _version(conn) == before
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {ingest.STAGING_TABLE}")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_jsonl_keys_keep_their_text(tmp_path):
+    batch = tmp_path / 'batch.jsonl'
+    batch.write_text(
+        '{"PO_No": 4500012345, "Material": 100012345, "Fill_Rate_Percent": 87.5}\n'
+        '\n'
+        '{"PO_No": 4500012346.0, "Material": "100012346", "PO_Date": "2025-03-05"}\n'
+    )
+    rows = [row for chunk in ingest.read_chunks(str(batch), 'jsonl') for row in ingest.normalize(chunk)]
+    by_column = [dict(zip(ingest.INGEST_COLUMNS, row)) for row in rows]
+
+    assert [(r['PO_No'], r['Material']) for r in by_column] == [
+        ('4500012345', '100012345'), ('4500012346.0', '100012346')]
+    assert [r['Fill_Rate_Percent'] for r in by_column] == [87.5, None]
+    assert [r['PO_Date'] for r in by_column] == [None, '2025-03-05']
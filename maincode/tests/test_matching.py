@@ -0,0 +1,144 @@
+import shutil
+
+import pandas as pd
+
+import matching
+
+
+def _po(rows):
+    return pd.DataFrame([dict(zip(['ID', 'PO_No', 'Material', 'PO_Date', 'Delivery_Date', 'PO_Quantity_Liters'], row),
+                              Sales_Quantity_Matched=0.0, Fill_Rate_Percent=0.0) for row in rows],
+                        columns=matching.PO_COLUMNS)
+
+
+def _sales(rows):
+    return pd.DataFrame(rows, columns=matching.SALES_COLUMNS)
+
+
+def _matched(result):
+    return dict(zip(result['ID'], zip(result['new_matched'], result['new_fill_rate'])))
+
+
+def test_fifo_fills_earliest_line_first():
+    # ID order is the reverse of PO date order: allocation follows the date
+    po = _po([
+        (1, 'PO1', 'M1', '2025-03-05', '2025-03-06', 100.0),
+        (2, 'PO1', 'M1', '2025-03-01', '2025-03-02', 100.0),
+        (3, 'PO1', 'M1', '2025-03-03', '2025-03-04', 100.0),
+    ])
+    sales = _sales([('PO1', 'M1', '2025-03-04', 90.0), ('PO1', 'M1', '2025-03-06', 60.0)])
+    assert _matched(matching.match(po, sales)) == {2: (100.0, 100.0), 3: (50.0, 50.0), 1: (0.0, 0.0)}
+
+
+def test_same_date_lines_fill_in_id_order():
+    po = _po([
+        (7, 'PO1', 'M1', '2025-03-01', '2025-03-02', 40.0),
+        (5, 'PO1', 'M1', '2025-03-01', '2025-03-02', 40.0),
+    ])
+    sales = _sales([('PO1', 'M1', '2025-03-02', 50.0)])
+    assert _matched(matching.match(po, sales)) == {5: (40.0, 100.0), 7: (10.0, 25.0)}
+
+
+def test_over_billing_is_capped_at_quantity():
+    po = _po([(1, 'PO1', 'M1', '2025-03-01', '2025-03-02', 80.0)])
+    sales = _sales([('PO1', 'M1', '2025-03-02', 500.0)])
+    assert _matched(matching.match(po, sales)) == {1: (80.0, 100.0)}
+
+
+def test_only_invoices_in_window_and_group_count():
+    po = _po([(1, 'PO1', 'M1', '2025-03-10', '2025-03-12', 100.0)])
+    sales = _sales([
+        ('PO1', 'M1', '2025-03-08', 1.0),    # before PO date - BEFORE_DAYS
+        ('PO1', 'M1', '2025-03-09', 2.0),    # window start
+        ('PO1', 'M1', '2025-03-19', 4.0),    # window end: delivery + AFTER_DAYS
+        ('PO1', 'M1', '2025-03-20', 8.0),    # after the window
+        ('PO1', 'M2', '2025-03-11', 16.0),   # other material
+        ('PO2', 'M1', '2025-03-11', 32.0),   # other PO
+    ])
+    assert _matched(matching.match(po, sales, before_days=1, after_days=7)) == {1: (6.0, 6.0)}
+
+
+def test_missing_delivery_date_uses_po_date():
+    po = _po([(1, 'PO1', 'M1', '2025-03-10', '1900-01-01', 10.0)])
+    sales = _sales([('PO1', 'M1', '2025-03-17', 5.0), ('PO1', 'M1', '2025-03-18', 5.0)])
+    assert _matched(matching.match(po, sales, before_days=1, after_days=7)) == {1: (5.0, 50.0)}
+
+
+def test_changed_rows():
+    po = _po([
+        (1, 'PO1', 'M1', '2025-03-01', '2025-03-02', 100.0),
+        (2, 'PO2', 'M1', '2025-03-01', '2025-03-02', 100.0),
+    ])
+    po.loc[po['ID'] == 1, ['Sales_Quantity_Matched', 'Fill_Rate_Percent']] = [100.0, 100.0]
+    sales = _sales([('PO1', 'M1', '2025-03-02', 100.0), ('PO2', 'M1', '2025-03-02', 30.0)])
+    assert list(matching.changed_rows(matching.match(po, sales))['ID']) == [2]
+
+
+def test_line_without_window_is_left_alone():
+    po = _po([
+        (1, 'PO1', 'M1', None, None, 100.0),
+        (2, 'PO1', 'M1', '2025-03-01', '2025-03-02', 100.0),
+    ])
+    sales = _sales([('PO1', 'M1', '2025-03-02', 60.0)])
+    result = matching.match(po, sales)
+    assert _matched(result)[2] == (60.0, 60.0)
+    assert result.loc[result['ID'] == 1, ['new_matched', 'new_fill_rate']].isna().all(axis=None)
+    assert list(matching.changed_rows(result)['ID']) == [2]
+
+
+def test_only_groups_with_sales_lines_are_owned():
+    po = _po([
+        (1, 'PO1', 'M1', '2025-03-01', '2025-03-02', 100.0),
+        (2, 'PO1', 'M2', '2025-03-01', '2025-03-02', 100.0),
+        (3, 'PO2', 'M1', '2025-03-01', '2025-03-02', 100.0),
+    ])
+    sales = _sales([('PO1', 'M1', '2025-03-30', 60.0)])
+    assert list(matching.owned_rows(matching.match(po, sales), sales)['ID']) == [1]
+
+
+def _copy_db(db_path, tmp_path):
+    from benchmarks import localdb
+
+    path = str(tmp_path / 'match.sqlite')
+    shutil.copyfile(db_path, path)
+    return localdb.LocalConnection(path)
+
+
+def _stored(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT ID, Sales_Quantity_Matched, Fill_Rate_Percent FROM zepto_automation ORDER BY ID")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def test_full_run_with_empty_sales_table_writes_nothing(db_path, tmp_path):
+    conn = _copy_db(db_path, tmp_path)
+    before = _stored(conn)
+    stats = matching.recompute(conn, full=True, write=True)
+    assert stats['written'] == 0
+    assert stats['skipped']
+    assert _stored(conn) == before
+
+
+def test_full_run_only_rewrites_groups_with_sales(db_path, tmp_path):
+    conn = _copy_db(db_path, tmp_path)
+    before = _stored(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT ID, PO_No, Material, PO_Date FROM zepto_automation "
+                   "WHERE PO_Date IS NOT NULL ORDER BY ID LIMIT 1")
+    record_id, po_no, material, po_date = cursor.fetchone()
+    matching.ensure_tables(conn)
+    cursor.execute(f"INSERT INTO {matching.SALES_TABLE} (Invoice_No, Invoice_Date, PO_No, Material, "
+                   "Billed_Quantity_Liters) VALUES ('INV1', ?, ?, ?, 0)", (str(po_date)[:10], po_no, material))
+    conn.commit()
+
+    # Without --write nothing changes
+    assert matching.recompute(conn, full=True)['written'] == 0
+    assert _stored(conn) == before
+
+    stats = matching.recompute(conn, full=True, write=True)
+    after = _stored(conn)
+    changed = {row[0] for row, old in zip(after, before) if row != old}
+    cursor.execute("SELECT ID FROM zepto_automation WHERE PO_No = ? AND Material = ?", (po_no, material))
+    assert record_id in changed
+    assert changed <= {row[0] for row in cursor.fetchall()}
+    assert stats['written'] == len(changed)
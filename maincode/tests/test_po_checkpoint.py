@@ -0,0 +1,42 @@
+import os
+
+from po_ingest import checkpoint
+from po_ingest.fetcher import decode_subject, extract_po_number
+
+
+def test_checkpoint_round_trip(tmp_path):
+    state_dir = str(tmp_path / 'state')
+    assert checkpoint.load_checkpoint(state_dir, 'spar') is None
+
+    checkpoint.save_checkpoint(state_dir, 'spar', {'uidvalidity': 7, 'last_uid': 120, 'failed_uids': [99],
+                                                   'updated_at': '2025-03-05 10:00:00'})
+    assert checkpoint.load_checkpoint(state_dir, 'spar') == {
+        'uidvalidity': 7, 'last_uid': 120, 'failed_uids': [99], 'updated_at': '2025-03-05 10:00:00'}
+    # Written through a temp file that is renamed into place
+    assert os.listdir(state_dir) == ['spar.checkpoint.json']
+
+
+def test_checkpoint_overwrite_and_defaults(tmp_path):
+    state_dir = str(tmp_path)
+    checkpoint.save_checkpoint(state_dir, 'spar', {'uidvalidity': 7, 'last_uid': 120})
+    checkpoint.save_checkpoint(state_dir, 'spar', {'uidvalidity': '7', 'last_uid': '121'})
+    assert checkpoint.load_checkpoint(state_dir, 'spar') == {
+        'uidvalidity': 7, 'last_uid': 121, 'failed_uids': [], 'updated_at': None}
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    state_dir = str(tmp_path)
+    with open(checkpoint.checkpoint_path(state_dir, 'spar'), 'w') as f:
+        f.write('{"uidvalidity": 7')
+    assert checkpoint.load_checkpoint(state_dir, 'spar') is None
+
+    with open(checkpoint.checkpoint_path(state_dir, 'spar'), 'w') as f:
+        f.write('{"last_uid": 3}')
+    assert checkpoint.load_checkpoint(state_dir, 'spar') is None
+
+
+def test_subject_po_number():
+    assert extract_po_number('Fwd: PO_4500012345 from SPAR') == '4500012345'
+    assert extract_po_number('Purchase order 4500012345') is None
+    assert decode_subject('=?utf-8?b?UE9fNDUwMDAxMjM0NQ==?=') == 'PO_4500012345'
+    assert decode_subject(None) == ''
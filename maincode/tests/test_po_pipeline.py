@@ -0,0 +1,73 @@
+import pytest
+
+from po_ingest import pipeline
+
+PO_TEXT = """SPAR Hypermarkets Pvt Ltd
+PO Number: 4500012345
+PO Date: 05.03.2025
+Delivery Date: 07/03/2025
+1 100012345 HERITAGE TONED MILK 500ML 24 EA 26.00 624.00
+2 100012346 HERITAGE CURD 1 KG 10 PCS 1,200.50
+3 100012347 HERITAGE PANEER 200 GMS 1,250 EA
+Total 1,848.50
+"""
+
+
+def test_parse_po_text():
+    rows = pipeline.parse_po_text(PO_TEXT, pipeline.DEFAULT_PARSER)
+    assert [(r['Material'], r['Material_Description'], r['UOM'], r['PO_Quantity'], r['PO_Quantity_Liters'])
+            for r in rows] == [
+        ('100012345', 'HERITAGE TONED MILK 500ML', 'EA', 24.0, 12.0),
+        ('100012346', 'HERITAGE CURD 1 KG', 'PCS', 10.0, 10.0),
+        ('100012347', 'HERITAGE PANEER 200 GMS', 'EA', 1250.0, 250.0),
+    ]
+    assert {(r['PO_No'], r['PO_Date'], r['Delivery_Date']) for r in rows} == {
+        ('4500012345', '2025-03-05', '2025-03-07')}
+
+
+def test_parse_po_text_without_line_items():
+    assert pipeline.parse_po_text('PO Number: 1\nnothing to see', pipeline.DEFAULT_PARSER) == []
+
+
+def test_unknown_pack_size_has_no_liters():
+    rows = pipeline.parse_po_text('1 100012345 HERITAGE GHEE JAR 2 EA', pipeline.DEFAULT_PARSER)
+    assert rows[0]['PO_No'] is None
+    assert rows[0]['PO_Quantity_Liters'] is None
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('05.03.2025', '2025-03-05'), ('5-Mar-2025', '2025-03-05'), ('05/03/25', '2025-03-05'),
+    ('2025-03-05', '2025-03-05'), ('March 5', None), (None, None),
+])
+def test_parse_date(value, expected):
+    assert pipeline.parse_date(value, pipeline.DEFAULT_PARSER['date_formats']) == expected
+
+
+def _row(batch_id, po_no):
+    return (batch_id, 'spar', 'a' * 64, po_no, '100012345', 'MILK 500ML', '2025-03-05', '2025-03-07',
+            'EA', 1.0, 0.5, '2025-03-05 10:00:00')
+
+
+def _staged(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT Batch_ID, PO_No FROM po_staging ORDER BY ID")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def test_load_staging(tmp_path):
+    from benchmarks import localdb
+
+    conn = localdb.LocalConnection(str(tmp_path / 'staging.sqlite'))
+    pipeline.load_staging(conn, [_row('b1', str(i)) for i in range(5)], 'b1', batch_size=2)
+    assert _staged(conn) == [('b1', str(i)) for i in range(5)]
+
+
+def test_failed_load_leaves_no_partial_batch(tmp_path):
+    from benchmarks import localdb
+
+    conn = localdb.LocalConnection(str(tmp_path / 'staging.sqlite'))
+    pipeline.load_staging(conn, [_row('b1', '1')], 'b1')
+    rows = [_row('b2', '2'), _row('b2', '3'), ('b2', 'too few columns')]
+    with pytest.raises(Exception):
+        pipeline.load_staging(conn, rows, 'b2', batch_size=2)
+    assert _staged(conn) == [('b1', '1')]
@@ -0,0 +1,95 @@
+import hashlib
+import os
+
+from po_ingest.store import AttachmentStore, index_path, open_store
+
+
+def _store(tmp_path):
+    return AttachmentStore(str(tmp_path / 'attachments.sqlite'))
+
+
+def test_each_source_copy_loads_separately(tmp_path):
+    store = _store(tmp_path)
+    store.record('spar', 'x' * 64, 10, 'spar.pdf', {'po_number': '1'})
+    store.record('zepto', 'x' * 64, 10, 'zepto.pdf', {'po_number': '2'})
+    store.put_parsed('x' * 64, 1, 'ok', [{'Material': '1'}])
+
+    spar = store.unloaded(1, source='spar')
+    assert [(a['source'], a['po_number']) for a in spar] == [('spar', '1')]
+    store.mark_loaded([a['id'] for a in spar], 'batch-1')
+
+    # The same bytes from another source are still waiting
+    assert [(a['source'], a['po_number']) for a in store.unloaded(1)] == [('zepto', '2')]
+
+
+def _sha(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = _store(tmp_path)
+    folder = str(tmp_path)
+    content = b'%PDF-1.4 PO 1'
+    meta = {'po_number': '1', 'message_uid': 10, 'uidvalidity': 7, 'part': '2', 'filename': 'po.pdf'}
+    assert store.put_bytes('spar', folder, content, _sha(content), meta) is True
+    # Re-sent with the same bytes: indexed as a new sighting, not written again
+    assert store.put_bytes('spar', folder, content, _sha(content), dict(meta, message_uid=11)) is False
+
+    path = AttachmentStore.object_path(folder, _sha(content))
+    with open(path, 'rb') as f:
+        assert f.read() == content
+    assert [(a['po_number'], a['message_uid'], a['stored_path']) for a in store.new_since()] == [('1', 10, path)]
+    assert store.seen('spar', 7, 10, '2') and store.seen('spar', 7, 11, 2)
+    assert not store.seen('spar', 8, 10, '2')
+    assert not store.seen('zepto', 7, 10, '2')
+
+
+def test_same_filename_different_content(tmp_path):
+    store = _store(tmp_path)
+    for content in (b'%PDF PO 1', b'%PDF PO 2'):
+        store.put_bytes('spar', str(tmp_path), content, _sha(content), {'filename': 'PO.pdf'})
+    assert sorted(os.path.basename(a['stored_path']) for a in store.new_since()) == sorted(
+        f"{_sha(c)}.pdf" for c in (b'%PDF PO 1', b'%PDF PO 2'))
+
+
+def test_adopt_streamed_file(tmp_path):
+    store = _store(tmp_path)
+    folder = str(tmp_path)
+    content = b'%PDF streamed'
+    for uid in (1, 2):
+        tmp_file = tmp_path / f'{uid}.part'
+        tmp_file.write_bytes(content)
+        assert store.adopt_file('spar', folder, str(tmp_file), _sha(content), len(content),
+                                {'message_uid': uid, 'uidvalidity': 7, 'part': '2'}) is (uid == 1)
+        # Moved into place or dropped as a duplicate; never left behind
+        assert not tmp_file.exists()
+    assert os.path.exists(AttachmentStore.object_path(folder, _sha(content)))
+    assert store.lookup('spar', _sha(content))['size'] == len(content)
+    assert store.lookup('zepto', _sha(content)) is None
+
+
+def test_new_since_filters(tmp_path):
+    store = _store(tmp_path)
+    for po_number, source in (('1', 'spar'), ('2', 'spar'), ('3', 'zepto')):
+        store.record(source, po_number * 64, 10, f'{po_number}.pdf', {'po_number': po_number})
+    first = store.new_since()[0]['id']
+    assert [a['po_number'] for a in store.new_since(after_id=first)] == ['2', '3']
+    assert [a['po_number'] for a in store.new_since(source='spar')] == ['1', '2']
+    assert [a['po_number'] for a in store.new_since(po_number='3')] == ['3']
+    assert [a['po_number'] for a in store.new_since(limit=1)] == ['1']
+    assert store.new_since(since='9999-01-01 00:00:00') == []
+
+
+def test_parsed_cache(tmp_path):
+    store = _store(tmp_path)
+    assert store.get_parsed('x' * 64) is None
+    store.put_parsed('x' * 64, 1, 'failed', [], error='no text layer')
+    store.put_parsed('x' * 64, 2, 'ok', [{'Material': '1'}], pages=3)
+    parsed = store.get_parsed('x' * 64)
+    assert (parsed['parser_version'], parsed['status'], parsed['pages'], parsed['error'], parsed['rows']) == (
+        2, 'ok', 3, None, [{'Material': '1'}])
+
+
+def test_open_store_is_shared(tmp_path):
+    assert open_store(str(tmp_path)) is open_store(str(tmp_path))
+    assert open_store(str(tmp_path)).path == index_path(str(tmp_path))
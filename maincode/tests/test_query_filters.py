@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import pytest
+
+import query_filters
+
+
+def test_same_filters_compile_to_same_sql():
+    first = query_filters.listing(95.0, {'state': 'Kerala', 'date_from': '2025-03-01'})
+    second = query_filters.listing(80.0, {'state': 'Telangana', 'date_from': '2025-04-01'})
+    assert first.sql == second.sql
+    assert first.params == (95.0, 'Kerala', date(2025, 3, 1))
+    # Filters are applied in a fixed order whatever order they arrive in
+    assert (query_filters.listing(95.0, {'plant': 'P', 'state': 'S'}).sql
+            == query_filters.listing(95.0, {'state': 'S', 'plant': 'P'}).sql)
+
+
+def test_values_are_bound_not_inlined():
+    query = query_filters.listing(95.0, {'state': "Kerala' OR 1=1 --", 'material': 'Curd 500ML'})
+    assert 'Kerala' not in query.sql
+    assert 'Curd' not in query.sql
+    assert query.params == (95.0, "Kerala' OR 1=1 --", 'Curd 500ML')
+
+
+def test_date_range_is_half_open():
+    query = query_filters.listing(95.0, {'date_from': '2025-03-01', 'date_to': '2025-03-31 10:00:00'})
+    assert 'z.Delivery_Date >= ?' in query.sql
+    assert 'z.Delivery_Date < ?' in query.sql
+    assert query.params[-2:] == (date(2025, 3, 1), date(2025, 4, 1))
+
+
+def test_plant_stats_group_on_effective_date():
+    query = query_filters.plant_stats_export(95.0, {'date_to': '2025-03-31'})
+    date_sql = query_filters.effective_date.expression()
+    assert f'{date_sql} < ?' in query.sql
+    where = query.sql.split('WHERE', 1)[1].split('GROUP BY')[0]
+    assert ' OR ' not in where
+
+
+def test_feedback_filters():
+    query = query_filters.feedback_reports({'user': 'a_b%', 'state': query_filters.UNKNOWN_STATE,
+                                            'plant': 'Uppal', 'reason': 'PO price issue'})
+    assert "user_email LIKE ? ESCAPE '\\'" in query.sql
+    assert "(state = '0' OR state = '' OR state IS NULL)" in query.sql
+    assert query.params == ('a\\_b\\%%', 'PO price issue', 'Uppal')
+
+
+def test_blank_filters_are_ignored():
+    filters = query_filters.record_filters({'state': '  ', 'plant': '', 'material': None})
+    assert filters == dict.fromkeys(query_filters.RECORD_FILTERS)
+    assert query_filters.listing(95.0, filters).params == (95.0,)
+
+
+@pytest.mark.parametrize('value', ['2025-13-01', '01/03/2025', 'yesterday'])
+def test_malformed_date_raises(value):
+    with pytest.raises(ValueError):
+        query_filters.record_filters({'date_from': value})
+    with pytest.raises(ValueError):
+        query_filters.feedback_filters({'date_to': value})
+
+
+@pytest.mark.parametrize('path', ['/api/filtered-data', '/api/download-data', '/api/feedback-reports-data',
+                                  '/api/download-feedback-reports', '/api/download-plant-feedback-stats'])
+def test_malformed_date_is_a_400(client, path):
+    response = client.get(path, query_string={'date_from': 'not-a-date'})
+    assert response.status_code == 400
+    assert 'date' in response.get_json()['error']
+
+
+def _day(value):
+    return (value if isinstance(value, datetime) else datetime.fromisoformat(str(value))).date()
+
+
+def test_date_range_includes_both_ends(db_path):
+    from benchmarks import localdb
+
+    conn = localdb.LocalConnection(db_path)
+    cursor = conn.cursor()
+    everything = query_filters.listing(95.0)
+    cursor.execute(everything.sql, everything.params)
+    rows = cursor.fetchall()
+    days = sorted({_day(row[5]) for row in rows if row[5] is not None})
+    date_from, date_to = days[len(days) // 3], days[2 * len(days) // 3]
+
+    query = query_filters.listing(95.0, {'date_from': date_from.isoformat(), 'date_to': date_to.isoformat()})
+    cursor.execute(query.sql, query.params)
+    expected = [row[0] for row in rows if row[5] is not None and date_from <= _day(row[5]) <= date_to]
+    assert [row[0] for row in cursor.fetchall()] == expected
+    assert expected
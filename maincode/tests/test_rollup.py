@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+import rollup
+
+_VALID = ("State IS NOT NULL AND State NOT IN ('', '0') "
+          "AND Plant_Name IS NOT NULL AND Plant_Name NOT IN ('', '0')")
+_COLUMNS = {
+    'state': 'State',
+    'plant': 'Plant_Name',
+    'district': 'Sales_District',
+    'cust_group': 'Cust_Group',
+    'material': 'Material_Description',
+    'date': 'Effective_Date',
+    'month': "strftime('%Y-%m', Effective_Date)",
+}
+
+
+def _sql_rollup(db_path, dims, threshold, where='', params=()):
+    from benchmarks import localdb
+
+    keys = [_COLUMNS[d] for d in dims]
+    select = ', '.join(keys + ['COUNT(*)', 'SUM(IFNULL(PO_Quantity_Liters, 0))',
+                               'SUM(IFNULL(Sales_Quantity_Matched, 0))',
+                               'SUM(CASE WHEN Fill_Rate_Percent < ? THEN 1 ELSE 0 END)'])
+    sql = f"SELECT {select} FROM zepto_automation WHERE {_VALID} {where}"
+    if keys:
+        sql += f" GROUP BY {', '.join(keys)}"
+    conn = localdb.LocalConnection(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, (threshold,) + tuple(params))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    out = {}
+    for row in rows:
+        key = tuple(v.strftime('%Y-%m-%d') if hasattr(v, 'strftime') else v for v in row[:len(dims)])
+        out[key] = (int(row[-4]), pytest.approx(row[-3], abs=0.01), pytest.approx(row[-2], abs=0.01), int(row[-1]))
+    return out
+
+
+def _cube_rollup(rows, dims):
+    return {tuple(r[d] for d in dims): (r['records'], r['po_liters'], r['matched_liters'], r['actionable'])
+            for r in rows}
+
+
+@pytest.mark.parametrize('dims', [[], ['state'], ['plant', 'month'], ['district', 'cust_group'],
+                                  ['material', 'date']])
+@pytest.mark.parametrize('threshold', [50, 95])
+def test_cube_matches_sql(client, db_path, dims, threshold):
+    rows = rollup.RollupCube(threshold).query(dims, ['records', 'po_liters', 'matched_liters', 'actionable'])
+    assert _cube_rollup(rows, dims) == _sql_rollup(db_path, dims, threshold)
+
+
+def test_filtered_cube_matches_sql(client, db_path):
+    cube = rollup.RollupCube(90)
+    state = cube.query(['state'])[0]['state']
+    rows = cube.query(['plant'], ['records', 'po_liters', 'matched_liters', 'actionable'],
+                      filters={'state': [state]}, date_from='2025-01-01', date_to='2025-06-30')
+    expected = _sql_rollup(db_path, ['plant'], 90,
+                           "AND State = ? AND Effective_Date BETWEEN '2025-01-01' AND '2025-06-30'", (state,))
+    assert _cube_rollup(rows, ['plant']) == expected
+
+
+def test_unknown_dimension(client):
+    with pytest.raises(ValueError):
+        rollup.cube.query(['colour'])
+    assert client.get('/api/cube', query_string={'dims': 'date,month'}).status_code == 400
+
+
+def test_submitted_feedback_is_counted(client):
+    cube = rollup.cube_for(rollup.fill_rate.DEFAULT_THRESHOLD)
+    before = cube.query([], ['with_feedback'])[0]['with_feedback']
+    assert cube.query([], ['with_feedback'])[0]['with_feedback'] == before
+
+    record = next(row for row in client.get('/api/low-fill-rate-data').get_json()['data'] if not row['has_feedback'])
+    response = client.post('/api/submit-feedback', json={'record_id': record['id'], 'reason': 'PO price issue'})
+    assert response.status_code == 200
+    assert cube.query([], ['with_feedback'])[0]['with_feedback'] == before + 1
+
+
+def test_unchanged_version_skips_the_database(client, monkeypatch):
+    cube = rollup.RollupCube()
+    cube.query(['state'])
+    monkeypatch.setattr(rollup.data_routes, 'get_db_connection', lambda: pytest.fail('database was queried'))
+    cube.query(['state'])
+
+
+def test_queries_are_not_blocked_by_a_rebuild(client, monkeypatch):
+    cube = rollup.RollupCube()
+    rows = cube.query(['state'])
+
+    started, release = threading.Event(), threading.Event()
+    build_cells = cube._build_cells
+
+    def slow_build(cursor):
+        started.set()
+        release.wait(5)
+        return build_cells(cursor)
+
+    monkeypatch.setattr(cube, '_build_cells', slow_build)
+    monkeypatch.setattr(cube, '_version', -1)
+    rebuild = threading.Thread(target=cube.refresh)
+    rebuild.start()
+    assert started.wait(5)
+    # The previous cells keep answering while the rebuild scans
+    assert cube.query(['state']) == rows
+    release.set()
+    rebuild.join(5)
+    assert cube.query(['state']) == rows
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+WAITERS = 8
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def _concurrent(flight, key, fn, count=WAITERS):
+    """Run count identical calls; returns their results (or exceptions) once all are done"""
+    results = [None] * count
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = singleflight.SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def query():
+        calls.append(1)
+        release.wait(5)
+        return [('row',)]
+
+    threads, results = _concurrent(flight, ('SELECT 1', ()), query)
+    _wait_for(lambda: flight.stats()['coalesced'] == WAITERS - 1)
+    assert flight.stats()['in_flight'] == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert (stats['executions'], stats['coalesced'], stats['in_flight']) == (1, WAITERS - 1, 0)
+
+
+def test_error_is_shared():
+    flight = singleflight.SingleFlight()
+    release = threading.Event()
+
+    def query():
+        release.wait(5)
+        raise ValueError('boom')
+
+    threads, results = _concurrent(flight, ('SELECT 1', ()), query)
+    _wait_for(lambda: flight.stats()['coalesced'] == WAITERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()['errors'] == 1
+
+
+def test_results_are_not_cached():
+    flight = singleflight.SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.stats()['executions'] == 2
+
+
+def test_different_keys_run_separately():
+    flight = singleflight.SingleFlight()
+    release = threading.Event()
+    first = threading.Thread(target=flight.do, args=('a', lambda: release.wait(5)))
+    first.start()
+    _wait_for(lambda: flight.stats()['in_flight'] == 1)
+    assert flight.do('b', lambda: 'b') == 'b'
+    release.set()
+    first.join()
+    assert flight.stats()['coalesced'] == 0
+
+
+@pytest.mark.parametrize('sql', ['SELECT  COUNT(*)\n FROM zepto_automation', 'SELECT COUNT(*) FROM zepto_automation'])
+def test_fetchall_matches_direct_query(client, sql):
+    from routes import data_routes
+
+    conn = data_routes.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        expected = cursor.fetchall()
+    finally:
+        conn.close()
+    assert [tuple(row) for row in singleflight.fetchall(sql)] == [tuple(row) for row in expected]
+    assert singleflight.normalize(sql) == 'SELECT COUNT(*) FROM zepto_automation'
@@ -0,0 +1,52 @@
+import os
+import time
+
+import numpy as np
+
+import snapshot_store
+
+
+def test_publish_and_load(tmp_path):
+    arrays = {'ID': np.arange(5, dtype=np.int64), 'rate': np.linspace(0, 1, 5)}
+    snapshot_store.publish('kind', arrays, {'version': 3}, root=str(tmp_path))
+
+    meta, loaded = snapshot_store.load('kind', root=str(tmp_path))
+    assert meta['version'] == 3
+    assert meta['columns'] == ['ID', 'rate']
+    np.testing.assert_array_equal(loaded['ID'], arrays['ID'])
+    np.testing.assert_array_equal(loaded['rate'], arrays['rate'])
+    assert not loaded['ID'].flags.writeable
+
+
+def test_load_without_snapshot(tmp_path):
+    assert snapshot_store.load('kind', root=str(tmp_path)) is None
+
+
+def test_keeps_newest_snapshots(tmp_path):
+    for version in range(5):
+        snapshot_store.publish('kind', {'ID': np.arange(version + 1)}, {'version': version}, root=str(tmp_path))
+    meta, loaded = snapshot_store.load('kind', root=str(tmp_path))
+    assert meta['version'] == 4
+    assert len(loaded['ID']) == 5
+    kept = [name for name in (tmp_path / 'kind').iterdir() if name.name.startswith('v')]
+    assert len(kept) == snapshot_store.KEEP_SNAPSHOTS
+
+
+def test_build_lock_is_exclusive(tmp_path):
+    with snapshot_store.build_lock('kind', root=str(tmp_path)) as locked:
+        assert locked
+        with snapshot_store.build_lock('kind', root=str(tmp_path), wait_seconds=0.3) as other:
+            assert not other
+    with snapshot_store.build_lock('kind', root=str(tmp_path), wait_seconds=0) as locked:
+        assert locked
+
+
+def test_stale_build_lock_is_taken_over(tmp_path, monkeypatch):
+    lock = tmp_path / 'kind' / 'BUILD.lock'
+    lock.parent.mkdir()
+    lock.write_text('12345')
+    old = time.time() - 60
+    os.utime(lock, (old, old))
+    monkeypatch.setattr(snapshot_store, 'LOCK_STALE_SECONDS', 30)
+    with snapshot_store.build_lock('kind', root=str(tmp_path), wait_seconds=5) as locked:
+        assert locked